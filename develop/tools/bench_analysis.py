@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Name: bench_analysis
+Porpose: Benchmark of the audio analysis commands
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+
+DESCRIPTION:
+   Compares the volumedetect and loudnorm (EBU R128 first pass)
+   commands of `ffmpeg_runner.analysis_args`, which decode the
+   audio only, with a generic command on the full input (the
+   video is decoded too) and with the commands formerly built by
+   `VolumeDetectThread` and `Loudnorm`, on the given media files
+   (e.g. long 4K masters). All must report the same measurements.
+
+       python3 develop/tools/bench_analysis.py [-n 3] [-a 0] FILE ...
+
+This file is part of Videomass.
+
+    Videomass is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Videomass is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+HERE = os.path.dirname(os.path.realpath(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(HERE)))
+
+from videomass.vdms_threads.ffmpeg_runner import (build_args,  # noqa: E402
+                                                  analysis_args)
+from videomass.vdms_threads.ffmpeg_output import (parse_line,  # noqa: E402
+                                                  LOUDNORM, VOLUMEDETECT)
+
+LOUDFILTER = 'loudnorm=I=-16:TP=-1.5:LRA=11:print_format=summary'
+
+
+def measurements(lines, kind):
+    """
+    Returns a dict of the LOUDNORM or VOLUMEDETECT values
+    found in `lines`, e.g. {'mean_volume': '-21.1', ...}
+    """
+    events = (parse_line(line) for line in lines)
+    return {event.key: event.value for event in events
+            if event.kind == kind}
+
+
+def generic_commands(ffmpeg, infile, stream):
+    """
+    Returns the measuring commands of `infile` without stream
+    selection, i.e. the video is decoded as well.
+    """
+    return [build_args([ffmpeg, '-hide_banner', '-i', infile,
+                        '-map', '0:v?', '-map', f'0:a:{stream}',
+                        '-af', afilter, '-f', 'null', '-'])
+            for afilter in ('volumedetect', LOUDFILTER)]
+
+
+def legacy_commands(ffmpeg, infile, stream):
+    """
+    Returns the commands formerly built for `infile`, i.e. by
+    `VolumeDetectThread.run` and by `Loudnorm.process_file` with
+    the "Copy" video codec of the A/V Conversions panel.
+    """
+    amap = f'-map 0:a:{stream}'
+    nul = 'NUL' if sys.platform == 'win32' else '/dev/null'
+    return (build_args([ffmpeg], ['-i', infile], '-hide_banner', amap,
+                       '-af volumedetect -vn -sn -dn -f null', [nul]),
+            build_args([ffmpeg], '-nostdin -loglevel info -hide_banner',
+                       ['-i', infile], f'-map 0:v? {amap}',
+                       f'-filter:a: {LOUDFILTER} -vn -sn -pass 1 -f null',
+                       ['-y', nul]))
+
+
+def run(args, number):
+    """
+    Runs `args` `number` times, returns a tuple (best wall
+    time in seconds, output lines of the last run).
+    """
+    best = None
+    for _ in range(number):
+        start = time.perf_counter()
+        proc = subprocess.run(args, stdin=subprocess.DEVNULL,
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.PIPE,
+                              universal_newlines=True, check=True,
+                              encoding='utf8')
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, proc.stderr.splitlines()
+
+
+def main():
+    """
+    Parses the command line and prints the timings
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('files', nargs='+', help='media files')
+    parser.add_argument('-n', '--number', type=int, default=3,
+                        help='runs of each command, the best one counts')
+    parser.add_argument('-a', '--audio', default='0',
+                        help='index of the audio stream to measure')
+    parser.add_argument('--ffmpeg', default='ffmpeg',
+                        help='ffmpeg executable')
+    args = parser.parse_args()
+
+    for infile in args.files:
+        print(f'{infile} ({os.path.getsize(infile) / 1024 ** 2:.1f} MiB)')
+        generic = generic_commands(args.ffmpeg, infile, args.audio)
+        legacy = legacy_commands(args.ffmpeg, infile, args.audio)
+        current = (analysis_args(args.ffmpeg, infile, 'volumedetect',
+                                 stream=args.audio),
+                   analysis_args(args.ffmpeg, infile, LOUDFILTER,
+                                 stream=args.audio))
+        print(f'{"":>14}  {"generic":>9} {"former":>9} {"analysis":>9}')
+        for name, kind, *cmds in zip(('volumedetect', 'loudnorm'),
+                                     (VOLUMEDETECT, LOUDNORM),
+                                     generic, legacy, current):
+            results = [run(cmd, args.number) for cmd in cmds]
+            values = [measurements(out, kind) for _, out in results]
+            if values.count(values[0]) != len(values):
+                sys.exit(f'{name}: the measurements differ')
+            times = [f'{elapsed:8.2f}s' for elapsed, _ in results]
+            speedup = results[0][0] / results[2][0]
+            print(f'{name:>14}: {" ".join(times)}  ({speedup:.0f}x '
+                  f'faster than generic)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Name: bench_ffmpeg_output
+Porpose: Micro-benchmark of the ffmpeg output line classifier
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+
+DESCRIPTION:
+   Compares the precompiled classifier of
+   `videomass/vdms_threads/ffmpeg_output.py` with the keyword
+   list comprehensions formerly used by the log panel, over the
+   ffmpeg logs captured in the `ffmpeg_logs` directory (or the
+   given log files). Both must agree on every line.
+
+       python3 develop/tools/bench_ffmpeg_output.py [-n 200] [LOG ...]
+
+This file is part of Videomass.
+
+    Videomass is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Videomass is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import sys
+import glob
+import argparse
+import timeit
+
+HERE = os.path.dirname(os.path.realpath(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(HERE)))
+
+from videomass.vdms_threads.ffmpeg_output import (classify,  # noqa: E402
+                                                  parse_line,
+                                                  INFO, ERROR,
+                                                  WARNING, TEXT)
+
+
+def legacy_classify(output):
+    """
+    The classification formerly done by `LogOut.update_display`
+    """
+    if [x for x in ('info', 'Info') if x in output]:
+        return INFO
+    if [x for x in ('Failed', 'failed', 'Error', 'error') if x in output]:
+        return ERROR
+    if [x for x in ('warning', 'Warning') if x in output]:
+        return WARNING
+    return TEXT
+
+
+def read_logs(paths):
+    """
+    Returns the lines of the given log files, the ffmpeg
+    stats lines ending with '\\r' are split as the threads
+    read them from the pipe (universal newlines).
+    """
+    lines = []
+    for path in paths:
+        with open(path, 'r', encoding='utf8') as log:
+            lines.extend(log.readlines())
+    return lines
+
+
+def main():
+    """
+    Parses the command line and prints the timings
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('logs', nargs='*',
+                        default=sorted(glob.glob(os.path.join(
+                            HERE, 'ffmpeg_logs', '*.log'))),
+                        help='ffmpeg log files')
+    parser.add_argument('-n', '--number', type=int, default=200,
+                        help='repetitions over all the lines')
+    args = parser.parse_args()
+
+    lines = read_logs(args.logs)
+    if not lines:
+        sys.exit('No lines to parse')
+
+    mismatch = [line for line in lines
+                if classify(line) != legacy_classify(line)]
+    if mismatch:
+        sys.exit(f'Classifiers disagree on:\n{"".join(mismatch)}')
+
+    tests = (('legacy comprehensions', legacy_classify),
+             ('classify', classify),
+             ('parse_line', parse_line),
+             )
+    print(f'{len(lines)} lines from {len(args.logs)} logs, '
+          f'{args.number} repetitions')
+    for name, func in tests:
+        best = min(timeit.repeat(lambda f=func: [f(x) for x in lines],
+                                 number=args.number, repeat=5))
+        usec = best / (args.number * len(lines)) * 1e6
+        print(f'{name:>22}: {usec:.3f} usec/line')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the ffmpeg_output.py objects.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import os.path
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_threads.ffmpeg_output import (classify,
+                                                      parse_line,
+                                                      TEXT, INFO, WARNING,
+                                                      ERROR, LOUDNORM,
+                                                      VOLUMEDETECT)
+except ImportError as error:
+    sys.exit(error)
+
+LOUDNORM_LOG = """[Parsed_loudnorm_0 @ 0x7f627c001d40]
+Input Integrated:    -21.8 LUFS
+Input True Peak:     -17.7 dBTP
+Input LRA:             0.0 LU
+Input Threshold:     -31.8 LUFS
+
+Output Integrated:   -16.0 LUFS
+Output True Peak:    -11.9 dBTP
+Output LRA:            0.0 LU
+Output Threshold:    -26.0 LUFS
+
+Normalization Type:   Linear
+Target Offset:        +0.0 LU
+size=N/A time=00:00:02.02 bitrate=N/A speed=57.1x
+"""
+
+VOLUMEDETECT_LOG = """Stream #0:0: Audio: pcm_s16le, 44100 Hz, mono
+[Parsed_volumedetect_0 @ 0x7fb354001740] n_samples: 89088
+[Parsed_volumedetect_0 @ 0x7fb354001740] mean_volume: -21.1 dB
+[Parsed_volumedetect_0 @ 0x7fb354001740] max_volume: -17.7 dB
+[Parsed_volumedetect_0 @ 0x7fb354001740] histogram_17db: 1943
+"""
+
+
+def measurements(lines, kind):
+    """
+    Returns a dict of the `kind` values found in `lines`
+    """
+    events = (parse_line(line) for line in lines)
+    return {event.key: event.value for event in events
+            if event.kind == kind}
+
+
+class TestClassify(unittest.TestCase):
+    """Test case for the message classes."""
+
+    def test_classes(self):
+        self.assertEqual(classify('Stream mapping:'), TEXT)
+        self.assertEqual(classify('[info] Some information'), INFO)
+        self.assertEqual(classify('Conversion failed!'), ERROR)
+        self.assertEqual(classify('Error opening input file'), ERROR)
+        self.assertEqual(classify('[mp4 @ 0x1] Warning: foo'), WARNING)
+
+    def test_priority(self):
+        # same order of the log panel: info > error > warning
+        self.assertEqual(classify('Info: an error occurred'), INFO)
+        self.assertEqual(classify('warning: decoding error'), ERROR)
+
+
+class TestParseLine(unittest.TestCase):
+    """Test case for the OutputEvent objects."""
+
+    def test_text(self):
+        event = parse_line('size=N/A time=00:00:02.02 bitrate=N/A\n')
+        self.assertEqual((event.kind, event.key, event.value),
+                         (TEXT, None, None))
+        event = parse_line('[out#0/mp4 @ 0x1] video:12KiB audio:8KiB\n')
+        self.assertEqual(event.kind, TEXT)
+        event = parse_line('Input #0, wav, from \'a.wav\':\n')
+        self.assertEqual(event.kind, TEXT)
+
+    def test_classes_first(self):
+        event = parse_line('[Parsed_vidstabtransform_0 @ 0x1] '
+                           'Error: cannot open input file\n')
+        self.assertEqual((event.kind, event.key, event.value),
+                         (ERROR, None, None))
+
+
+class TestMeasurements(unittest.TestCase):
+    """Test case for the loudnorm and volumedetect measurements."""
+
+    def test_loudnorm(self):
+        summary = measurements(LOUDNORM_LOG.splitlines(), LOUDNORM)
+        self.assertEqual(len(summary), 10)
+        self.assertEqual(summary['Input Integrated'], '-21.8')
+        self.assertEqual(summary['Input True Peak'], '-17.7')
+        self.assertEqual(summary['Input LRA'], '0.0')
+        self.assertEqual(summary['Input Threshold'], '-31.8')
+        self.assertEqual(summary['Normalization Type'], 'Linear')
+        self.assertEqual(summary['Target Offset'], '+0.0')
+
+    def test_volumedetect(self):
+        stats = measurements(VOLUMEDETECT_LOG.splitlines(), VOLUMEDETECT)
+        self.assertEqual(stats, {'n_samples': '89088',
+                                 'mean_volume': '-21.1',
+                                 'max_volume': '-17.7',
+                                 'histogram_17db': '1943'})
+        self.assertEqual(measurements(['Conversion failed!'],
+                                      VOLUMEDETECT), {})
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
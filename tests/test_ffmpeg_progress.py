@@ -0,0 +1,95 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the ffmpeg_progress.py objects.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import os.path
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_threads.ffmpeg_progress import (ProgressParser,
+                                                        ProgressPipe)
+except ImportError as error:
+    sys.exit(error)
+
+REPORT = """frame=250
+fps=99.50
+stream_0_0_q=2.0
+bitrate=1234.5kbits/s
+total_size=1310720
+out_time_us=10000000
+out_time_ms=10000000
+out_time=00:00:10.000000
+dup_frames=1
+drop_frames=0
+speed=3.98x
+progress=continue
+"""
+
+
+class TestProgressParser(unittest.TestCase):
+    """Test case for the ProgressParser class."""
+
+    def test_report(self):
+        parser = ProgressParser()
+        reports = [parser.feed(line) for line in REPORT.splitlines()]
+        self.assertEqual(reports[:-1], [None] * (len(reports) - 1))
+        report = reports[-1]
+        self.assertEqual(report.frame, 250)
+        self.assertEqual(report.fps, 99.5)
+        self.assertEqual(report.bitrate, 1234.5)
+        self.assertEqual(report.total_size, 1310720)
+        self.assertEqual(report.msec, 10000)
+        self.assertEqual((report.dup_frames, report.drop_frames), (1, 0))
+        self.assertEqual(report.speed, 3.98)
+        self.assertFalse(report.end)
+        self.assertEqual(report.summary(),
+                         'frame: 250 | fps: 99.5 | size: 1280KiB | '
+                         'bitrate: 1234.5kbits/s | dup: 1 | drop: 0 | '
+                         'speed: 3.98x')
+
+    def test_not_available(self):
+        parser = ProgressParser()
+        for line in ('bitrate=N/A', 'total_size=N/A', 'out_time_us=N/A',
+                     'speed=N/A', 'garbage'):
+            self.assertIsNone(parser.feed(line))
+        report = parser.feed('progress=end')
+        self.assertTrue(report.end)
+        self.assertEqual(report.msec, 0)
+        self.assertIsNone(report.speed)
+        self.assertEqual(report.summary(), '')
+
+    def test_negative_time(self):
+        parser = ProgressParser()
+        parser.feed('out_time_us=-5000')
+        self.assertEqual(parser.feed('progress=continue').msec, 0)
+
+
+class TestProgressPipe(unittest.TestCase):
+    """Test case for the ProgressPipe command line."""
+
+    def setUp(self):
+        self.progress = ProgressPipe(lambda report: None)
+        fd = self.progress.wfd if ProgressPipe.POSIX else 1
+        self.args = f'-progress pipe:{fd} -nostats'
+
+    def tearDown(self):
+        self.progress.close()
+
+    def test_list(self):
+        cmd = ['ffmpeg', '-stats', '-i', 'in.mkv', 'out.mkv']
+        self.assertEqual(self.progress.command(cmd),
+                         ['ffmpeg'] + self.args.split()
+                         + ['-i', 'in.mkv', 'out.mkv'])
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the ffmpeg_runner.py objects.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import os.path
+import tempfile
+import threading
+import time
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_threads.ffmpeg_runner import (split_args,
+                                                      build_args,
+                                                      join_args,
+                                                      parse_cpus,
+                                                      discard_outputs,
+                                                      atomic_outputs,
+                                                      commit_outputs,
+                                                      abandon_outputs,
+                                                      temp_output,
+                                                      analysis_args,
+                                                      pcm_args,
+                                                      video_pass_args,
+                                                      ProcessRunner,
+                                                      WINDOWS)
+except ImportError as error:
+    sys.exit(error)
+
+
+class TestArgs(unittest.TestCase):
+    """Test case for the argument list functions."""
+
+    def test_split(self):
+        self.assertEqual(split_args('-vf "scale=640:-1" -an'),
+                         ['-vf', 'scale=640:-1', '-an'])
+        self.assertEqual(split_args(''), [])
+
+    def test_build(self):
+        args = build_args(['ffmpeg'], '-ss 10 -t 5', '',
+                          ['-i', "it's a \"file\".mkv"], None,
+                          '-c copy', ['-y', 'out file.mkv'])
+        self.assertEqual(args, ['ffmpeg', '-ss', '10', '-t', '5', '-i',
+                                "it's a \"file\".mkv", '-c', 'copy', '-y',
+                                'out file.mkv'])
+
+    def test_join(self):
+        args = ['ffmpeg', '-i', 'my file.mkv', '-vf', 'a="b"', 'out.mkv']
+        line = join_args(args)
+        self.assertEqual(line, 'ffmpeg -i "my file.mkv" -vf "a=\\"b\\"" '
+                               'out.mkv')
+        self.assertEqual(split_args(line), args)
+
+    def test_analysis(self):
+        args = analysis_args('ffmpeg', 'in.mov', 'volumedetect',
+                             '-ss 10 -t 5', '1')
+        self.assertEqual(args[args.index('-i') - 3:args.index('-i')],
+                         ['-vn', '-sn', '-dn'])
+        self.assertLess(args.index('-ss'), args.index('-i'))
+        self.assertEqual(args[args.index('-map') + 1], '0:a:1')
+        self.assertEqual(args[-7:], ['-af', 'volumedetect', '-c:a',
+                                     'pcm_f64le', '-f', 'null', '-'])
+        self.assertNotIn('-map', analysis_args('ffmpeg', 'in.mov', 'x'))
+        args = analysis_args('ffmpeg', 'in.mov', 'x', stream='all')
+        self.assertEqual(args[args.index('-map') + 1], '0:a?')
+
+    def test_pcm(self):
+        args = pcm_args('ffmpeg', 'in.mov', '-ss 10', '2')
+        self.assertLess(args.index('-ss'), args.index('-i'))
+        self.assertEqual(args[args.index('-map') + 1], '0:a:2')
+        self.assertEqual(args[-5:], ['-c:a', 'pcm_f32le', '-f', 'wav',
+                                     'pipe:1'])
+
+    def test_video_pass(self):
+        args = video_pass_args('-c:v libx264 -map 0:v? -map 0:a:1 '
+                               '-pass 1 -sn -filter:a: loudnorm=I=-16 '
+                               '-af "volume=2" -f mp4')
+        self.assertEqual(args, ['-c:v', 'libx264', '-map', '0:v?', '-map',
+                                '0:a:1', '-pass', '1', '-sn', '-f', 'mp4',
+                                '-an'])
+
+    def test_cpus(self):
+        self.assertEqual(parse_cpus('0-3, 6'), {0, 1, 2, 3, 6})
+        self.assertEqual(parse_cpus('2'), {2})
+        self.assertIsNone(parse_cpus(''))
+        self.assertIsNone(parse_cpus('a-b'))
+
+
+@unittest.skipIf(WINDOWS, 'needs a shell script as executable')
+class TestProcessRunner(unittest.TestCase):
+    """Test case for the ProcessRunner class."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def script(self, body):
+        """
+        Writes a fake ffmpeg executable which ignores its args
+        """
+        path = os.path.join(self.tmp.name, 'ffmpeg')
+        with open(path, 'w', encoding='utf8') as exe:
+            exe.write(f'#!/bin/sh\n{body}\n')
+        os.chmod(path, 0o755)
+        return path
+
+    def test_run(self):
+        exe = self.script('echo "one" >&2\necho "two" >&2\nexit 3')
+        runner = ProcessRunner(niceness=5)
+        lines = []
+        status, elapsed = runner.run([exe, '-i', 'in.mkv'], lines.append,
+                                     lambda report: None)
+        self.assertEqual(status, 3)
+        self.assertEqual(lines, ['one\n', 'two\n'])
+        self.assertGreaterEqual(elapsed, 0)
+        self.assertEqual((runner.count, runner.procs), (1, set()))
+
+    def test_undecodable(self):
+        # e.g. file names in a legacy encoding
+        exe = self.script("printf 'caf\\351\\n' >&2")
+        lines = []
+        status = ProcessRunner().run([exe], lines.append,
+                                     lambda report: None)[0]
+        self.assertEqual((status, lines), (0, ['caf\ufffd\n']))
+
+    def test_stream(self):
+        exe = self.script('echo "warn" >&2\nprintf "data"\nexit 2')
+        runner = ProcessRunner()
+        lines, data = [], []
+        status = runner.stream([exe], lambda out: data.append(out.read()),
+                               lines.append)[0]
+        self.assertEqual((status, data, lines), (2, [b'data'], ['warn\n']))
+
+        def failing(out):
+            raise ValueError('bad data')
+
+        exe = self.script('while true; do printf "data"; done')
+        with self.assertRaises(ValueError):
+            runner.stream([exe], failing, print)
+        self.assertEqual(runner.procs, set())
+
+    def test_not_found(self):
+        runner = ProcessRunner()
+        with self.assertRaises(OSError):
+            runner.run([os.path.join(self.tmp.name, 'missing')], print,
+                       lambda report: None)
+
+    def cancelled_run(self, exe, runner):
+        """
+        Runs `exe` and cancels it after a while, returns
+        a tuple (exit status, seconds to end after cancel)
+        """
+        timer = threading.Timer(0.3, runner.cancel)
+        timer.start()
+        status = runner.run([exe], print, lambda report: None)[0]
+        return status, time.monotonic() - timer.interval
+
+    def test_quit(self):
+        # like ffmpeg: finalises and exits with 0 on 'q'
+        exe = self.script('[ "$(head -c 1)" = q ] && exit 0\nexit 1')
+        runner = ProcessRunner()
+        start = time.monotonic()
+        status = self.cancelled_run(exe, runner)[0]
+        self.assertEqual(status, 'stop')
+        self.assertLess(time.monotonic() - start, 3)
+        # cancelled runners do not start new processes
+        self.assertEqual(runner.run([exe], print, lambda report: None),
+                         ('stop', 0.0))
+
+    def test_escalation(self):
+        # ignores 'q' and SIGTERM, must be killed
+        exe = self.script("trap '' TERM\nwhile true; do sleep 0.1; done")
+        runner = ProcessRunner()
+        runner.QUIT_TIMEOUT = runner.TERM_TIMEOUT = 0.5
+        start = time.monotonic()
+        cancel = threading.Timer(0.3, runner.cancel)
+        cancel.start()
+        status = runner.run([exe], print, lambda report: None)[0]
+        self.assertEqual(status, 'stop')
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_cancel_not_blocking(self):
+        exe = self.script("trap '' TERM\nwhile true; do sleep 0.1; done")
+        runner = ProcessRunner()
+        runner.QUIT_TIMEOUT = runner.TERM_TIMEOUT = 0.5
+        job = threading.Thread(target=runner.run,
+                               args=([exe], print, lambda report: None))
+        job.start()
+        while not runner.procs:
+            time.sleep(0.05)
+        start = time.monotonic()
+        runner.cancel()
+        self.assertLess(time.monotonic() - start, 0.2)
+        job.join(5)
+        self.assertFalse(job.is_alive())
+
+
+class TestDiscardOutputs(unittest.TestCase):
+    """Test case for the outputs of interrupted processes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'out.mkv')
+        with open(self.path, 'w', encoding='utf8') as out:
+            out.write('truncated')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_keep(self):
+        self.assertEqual(discard_outputs([self.path], 'keep'), [])
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_delete(self):
+        outputs = [self.path, os.devnull, os.path.join(self.tmp.name, 'x')]
+        self.assertEqual(discard_outputs(outputs, 'delete'),
+                         [(self.path, None)])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_quarantine(self):
+        partial = os.path.join(self.tmp.name, 'out.partial.mkv')
+        self.assertEqual(discard_outputs([self.path], 'quarantine'),
+                         [(self.path, partial)])
+        self.assertTrue(os.path.exists(partial))
+
+    def test_older_files(self):
+        os.utime(self.path, (1000, 1000))
+        self.assertEqual(discard_outputs([self.path], 'delete',
+                                         since=time.time() - 1), [])
+        self.assertTrue(os.path.exists(self.path))
+
+
+class TestAtomicOutputs(unittest.TestCase):
+    """Test case for the outputs written to temporary names."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'out.mkv')
+        self.temp = temp_output(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        """
+        Writes a file as ffmpeg would do
+        """
+        with open(name, 'w', encoding='utf8') as out:
+            out.write(text)
+
+    def test_temp_output(self):
+        self.assertEqual(os.path.dirname(self.temp), self.tmp.name)
+        self.assertTrue(os.path.basename(self.temp).startswith('.out'))
+        self.assertTrue(self.temp.endswith('.mkv'))
+
+    def test_args(self):
+        pattern = os.path.join(self.tmp.name, 'img%03d.png')
+        args = ['ffmpeg', '-i', self.path, '-i', 'in.mov', '-y', self.path,
+                '-f', 'null', os.devnull, pattern, 'udp://host:1234',
+                self.tmp.name]
+        outputs = [self.path, os.devnull, pattern, 'udp://host:1234',
+                   self.tmp.name]
+        newargs, temps = atomic_outputs(args, outputs)
+        self.assertEqual(temps, {self.path: self.temp})
+        self.assertEqual(newargs, args[:6] + [self.temp] + args[7:])
+
+    def test_commit(self):
+        self.write(self.path, 'old')
+        self.write(self.temp, 'new')
+        commit_outputs({self.path: self.temp})
+        self.assertFalse(os.path.exists(self.temp))
+        with open(self.path, encoding='utf8') as out:
+            self.assertEqual(out.read(), 'new')
+        with self.assertRaises(OSError):
+            commit_outputs({self.path: self.temp})
+
+    def test_abandon(self):
+        self.write(self.path, 'old')
+        self.write(self.temp, 'truncated')
+        self.assertEqual(abandon_outputs({self.path: self.temp}, 'delete'),
+                         [(self.path, None)])
+        self.assertFalse(os.path.exists(self.temp))
+        with open(self.path, encoding='utf8') as out:
+            self.assertEqual(out.read(), 'old')
+
+        self.write(self.temp, 'truncated')
+        partial = os.path.join(self.tmp.name, 'out.partial.mkv')
+        self.assertEqual(abandon_outputs({self.path: self.temp},
+                                         'quarantine'),
+                         [(self.path, partial)])
+        self.assertTrue(os.path.exists(partial))
+
+        self.write(self.temp, 'truncated')
+        self.assertEqual(abandon_outputs({self.path: self.temp}, 'keep'), [])
+        with open(self.path, encoding='utf8') as out:
+            self.assertEqual(out.read(), 'truncated')
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
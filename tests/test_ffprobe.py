@@ -5,6 +5,8 @@
 
 import sys
 import os.path
+import struct
+import tempfile
 import unittest
 
 if sys.version_info[0] != 3:
@@ -15,7 +17,11 @@ PATH = os.path.realpath(os.path.abspath(__file__))
 sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
 
 try:
-    from videomass.vdms_threads.ffprobe import ffprobe
+    from videomass.vdms_threads.ffprobe import (ffprobe,
+                                                probe_image,
+                                                ffprobe_batch,
+                                                parse_value,
+                                                )
 except ImportError as error:
     sys.exit(error)
 
@@ -57,6 +63,120 @@ class FFprobeTestCase(unittest.TestCase):
             self.assertEqual(self.data[1], None)
             self.assertTrue(self.data[0])
 
+    def test_import_profile(self):
+        """
+        test the `import` profile with an invalid executable
+        """
+        data = ffprobe('url', '', profile='import', hide_banner=None)
+        self.assertEqual(data[0], None)
+        self.assertTrue(data[1])
+
+
+def jpeg(luma, chroma):
+    """
+    Returns the header of a 1280x720 YCbCr JPEG image with the
+    given sampling factors (e.g. 0x22) of luma and chroma
+    """
+    return (b'\xff\xd8' + b'\xff\xe0' + struct.pack('>H', 16)
+            + b'JFIF\x00' + b'\x00' * 9
+            + b'\xff\xc0' + struct.pack('>HBHHB', 17, 8, 720, 1280, 3)
+            + bytes([1, luma, 0, 2, chroma, 1, 3, chroma, 1])
+            + b'\x00' * 16)
+
+
+class ProbeImageTestCase(unittest.TestCase):
+    """Test case for the in-process image probing"""
+
+    HEADERS = {
+        'png': (b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR'
+                + struct.pack('>IIBB', 640, 480, 8, 6) + b'\x00' * 16),
+        'gif': b'GIF89a' + struct.pack('<HH', 320, 200) + b'\x00' * 16,
+        'bmp': (b'BM' + b'\x00' * 12 + struct.pack('<Iii', 40, 100, -50)
+                + struct.pack('<HH', 1, 24) + b'\x00' * 16),
+        'jpg': jpeg(0x22, 0x11),
+    }
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = {}
+        for ext, data in self.HEADERS.items():
+            self.files[ext] = os.path.join(self.tmp.name, f'image.{ext}')
+            with open(self.files[ext], 'wb') as fobj:
+                fobj.write(data)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def stream(self, ext):
+        return probe_image(self.files[ext])['streams'][0]
+
+    def test_png(self):
+        stream = self.stream('png')
+        self.assertEqual((stream['codec_name'], stream['width'],
+                          stream['height'], stream['pix_fmt']),
+                         ('png', 640, 480, 'rgba'))
+
+    def test_duration(self):
+        self.assertEqual(probe_image(self.files['png'])['format']['duration'],
+                         '0.040000')
+        data = probe_image(self.files['png'], pretty=True)
+        self.assertEqual(data['format']['duration'], '0:00:00.040000')
+
+    def test_gif(self):
+        # may be animated, left to ffprobe
+        self.assertIsNone(probe_image(self.files['gif']))
+
+    def test_bmp(self):
+        stream = self.stream('bmp')
+        self.assertEqual((stream['width'], stream['height'],
+                          stream['pix_fmt']), (100, 50, 'bgr24'))
+
+    def test_jpeg(self):
+        stream = self.stream('jpg')
+        self.assertEqual((stream['codec_name'], stream['width'],
+                          stream['height'], stream['pix_fmt']),
+                         ('mjpeg', 1280, 720, 'yuvj420p'))
+        for luma, chroma, pixfmt in ((0x11, 0x11, 'yuvj444p'),
+                                     (0x12, 0x12, 'yuvj444p'),
+                                     (0x21, 0x11, 'yuvj422p'),
+                                     (0x22, 0x21, 'yuvj440p'),
+                                     (0x12, 0x11, 'yuvj440p'),
+                                     (0x22, 0x12, 'yuvj422p'),
+                                     (0x13, 0x12, None),
+                                     (0x31, 0x21, None)):
+            with open(self.files['jpg'], 'wb') as fobj:
+                fobj.write(jpeg(luma, chroma))
+            self.assertEqual(self.stream('jpg').get('pix_fmt'), pixfmt,
+                             hex(luma))
+
+    def test_not_image(self):
+        other = os.path.join(self.tmp.name, 'video.mov')
+        with open(other, 'wb') as fobj:
+            fobj.write(b'\x00' * 64)
+        self.assertIsNone(probe_image(other))
+
+    def test_batch_order(self):
+        names = [self.files['png'], 'missing.mov', self.files['bmp']]
+        data = ffprobe_batch(names, '', workers=2)
+        self.assertEqual(data[0][0]['streams'][0]['codec_name'], 'png')
+        self.assertIsNone(data[1][0])
+        self.assertEqual(data[2][0]['streams'][0]['codec_name'], 'bmp')
+
+
+class PrettyValueTestCase(unittest.TestCase):
+    """Test case for the values given with the -pretty option"""
+
+    def test_parse_value(self):
+        self.assertAlmostEqual(parse_value('1.363754 Mibyte'), 1430000,
+                               delta=1)
+        self.assertEqual(parse_value('48 KHz'), 48000)
+        self.assertEqual(parse_value('44.100000 KHz'), 44100)
+        self.assertEqual(parse_value('48000 Hz'), 48000)
+        self.assertEqual(parse_value('1430000'), 1430000)
+        self.assertEqual(parse_value('1.200000 Mbit/s'), 1200000)
+        self.assertIsNone(parse_value('N/A'))
+        self.assertIsNone(parse_value(''))
+
 
 def main():
     unittest.main()
@@ -0,0 +1,203 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the job_journal.py object.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import os.path
+import tempfile
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_io.job_journal import (JobJournal,
+                                               valid_output,
+                                               fingerprint)
+except ImportError as error:
+    sys.exit(error)
+
+
+class TestJobJournal(unittest.TestCase):
+    """Test case for the JobJournal class."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.outputs = []
+        for num in range(3):
+            name = os.path.join(self.tmp.name, f'out{num}.mkv')
+            with open(name, 'wb') as fobj:
+                fobj.write(b'\0' * 100)
+            self.outputs.append(name)
+        self.journal = JobJournal(os.path.join(self.tmp.name, 'journal.db'))
+        self.args = ['onepass', ['a.mov', 'b.mov', 'c.mov'], 'mkv',
+                     self.outputs, '[["-c copy", ""]]', None, '', '',
+                     'x.log', 3]
+        self.batch = self.journal.begin('onepass', self.args,
+                                        [1000, 2000, 3000])
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmp.cleanup()
+
+    def test_unfinished(self):
+        self.journal.record(self.batch, 1, 1, self.outputs[:1], 0)
+        self.journal.record(self.batch, 2, 1, self.outputs[1:2], 0)
+        self.journal.record(self.batch, 2, 2, self.outputs[2:], 1)
+        batch = self.journal.unfinished()
+        self.assertEqual(batch['id'], self.batch)
+        self.assertEqual(batch['args'], self.args)
+        self.assertEqual(batch['durations'], [1000, 2000, 3000])
+        self.assertEqual(batch['done'], 1)
+
+    def test_is_done(self):
+        self.journal.record(self.batch, 1, 1, self.outputs[:1], 0)
+        self.journal.record(self.batch, 2, 1, self.outputs[1:2], 'stop')
+        self.assertTrue(self.journal.is_done(self.batch, self.outputs[0]))
+        self.assertFalse(self.journal.is_done(self.batch, self.outputs[1]))
+        self.assertFalse(self.journal.is_done(self.batch, self.outputs[2]))
+
+    def test_changed_output(self):
+        self.journal.record(self.batch, 1, 1, self.outputs[:1], 0)
+        with open(self.outputs[0], 'ab') as fobj:
+            fobj.write(b'\0')
+        self.assertFalse(self.journal.is_done(self.batch, self.outputs[0]))
+        os.remove(self.outputs[0])
+        self.assertFalse(self.journal.is_done(self.batch, self.outputs[0]))
+
+    def test_finish(self):
+        self.journal.record(self.batch, 1, 1, self.outputs[:1], 0)
+        self.journal.finish(self.batch)
+        self.assertIsNone(self.journal.unfinished())
+        self.assertFalse(self.journal.is_done(self.batch, self.outputs[0]))
+
+    def test_new_batch(self):
+        self.journal.record(self.batch, 1, 1, self.outputs[:1], 0)
+        batch = self.journal.begin('onepass', self.args, [1000] * 3)
+        self.assertNotEqual(batch, self.batch)
+        self.assertEqual(self.journal.unfinished()['done'], 0)
+        self.assertFalse(self.journal.is_done(self.batch, self.outputs[0]))
+
+
+class TestStamps(unittest.TestCase):
+    """Test case for the incremental mode stamps."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.infile = os.path.join(self.tmp.name, 'in.mov')
+        self.output = os.path.join(self.tmp.name, 'out.mkv')
+        for name, mtime in ((self.infile, 1000), (self.output, 2000)):
+            with open(name, 'wb') as fobj:
+                fobj.write(b'\0' * 100)
+            os.utime(name, (mtime, mtime))
+        self.journal = JobJournal(os.path.join(self.tmp.name, 'journal.db'))
+        self.digest = fingerprint(['ffmpeg', '-i', self.infile, '-c', 'copy',
+                                   '-y', self.output])
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmp.cleanup()
+
+    def test_fingerprint(self):
+        self.assertNotEqual(self.digest, fingerprint(
+            ['ffmpeg', '-i', self.infile, '-c copy', '-y', self.output]))
+
+    def test_up_to_date(self):
+        self.assertFalse(self.journal.up_to_date(self.infile, [self.output],
+                                                 self.digest))
+        self.journal.stamp([self.output, os.devnull], self.digest)
+        self.assertTrue(self.journal.up_to_date(self.infile, [self.output],
+                                                self.digest))
+        self.assertFalse(self.journal.up_to_date(self.infile, [self.output],
+                                                 fingerprint(['other'])))
+
+    def test_newer_input(self):
+        self.journal.stamp([self.output], self.digest)
+        os.utime(self.infile, (3000, 3000))
+        self.assertFalse(self.journal.up_to_date(self.infile, [self.output],
+                                                 self.digest))
+
+    def test_changed_output(self):
+        self.journal.stamp([self.output], self.digest)
+        os.utime(self.output, (2500, 2500))
+        self.assertFalse(self.journal.up_to_date(self.infile, [self.output],
+                                                 self.digest))
+
+    def test_new_batch(self):
+        self.journal.stamp([self.output], self.digest)
+        self.journal.begin('onepass', [], [])
+        self.assertTrue(self.journal.up_to_date(self.infile, [self.output],
+                                                self.digest))
+
+    def test_prune(self):
+        other = os.path.join(self.tmp.name, 'other.mkv')
+        with open(other, 'wb') as fobj:
+            fobj.write(b'\0' * 10)
+        self.journal.stamp([self.output, other], self.digest)
+        self.assertEqual(self.journal.prune_stamps(), 0)
+        os.remove(other)
+        os.utime(self.output, (2500, 2500))
+        self.assertEqual(self.journal.prune_stamps(), 2)
+        self.assertEqual(self.journal.prune_stamps(), 0)
+
+
+class TestTemps(unittest.TestCase):
+    """Test case for the temporary outputs left by a crash."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = JobJournal(os.path.join(self.tmp.name, 'journal.db'))
+        self.temps = [os.path.join(self.tmp.name, f'.out{num}.tmp.mkv')
+                      for num in range(3)]
+        for name in self.temps[:2]:
+            with open(name, 'wb') as fobj:
+                fobj.write(b'\0')
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmp.cleanup()
+
+    def test_clean_temps(self):
+        self.journal.add_temps(self.temps)
+        self.journal.remove_temps(self.temps[1:2])
+        self.assertEqual(self.journal.clean_temps(), self.temps[:1])
+        self.assertFalse(os.path.exists(self.temps[0]))
+        self.assertTrue(os.path.exists(self.temps[1]))
+        self.assertEqual(self.journal.clean_temps(), [])
+
+
+class TestValidOutput(unittest.TestCase):
+    """Test case for the probe of the unrecorded outputs."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, 'out.mkv')
+        with open(self.output, 'wb') as fobj:
+            fobj.write(b'\0' * 100)
+        self.ffprobe = os.path.join(self.tmp.name, 'ffprobe')
+        with open(self.ffprobe, 'w', encoding='utf8') as exe:
+            exe.write('#!/bin/sh\necho \'{"format": {"duration": "60.2"}}\'\n')
+        os.chmod(self.ffprobe, 0o755)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @unittest.skipIf(sys.platform.startswith('win'), 'POSIX shell needed')
+    def test_duration(self):
+        self.assertTrue(valid_output(self.output, 60000, self.ffprobe))
+        self.assertTrue(valid_output(self.output, 61000, self.ffprobe))
+        self.assertFalse(valid_output(self.output, 120000, self.ffprobe))
+
+    def test_unknown(self):
+        self.assertFalse(valid_output(self.output, 0, self.ffprobe))
+        self.assertFalse(valid_output(self.output + '.x', 60000,
+                                      self.ffprobe))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
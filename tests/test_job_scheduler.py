@@ -0,0 +1,111 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the job_scheduler.py object.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import os.path
+import threading
+import time
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_threads import job_scheduler
+except ImportError as error:
+    sys.exit(error)
+
+
+class TestConcurrentJobs(unittest.TestCase):
+    """Test case for the concurrent_jobs function."""
+
+    def test_ffmpeg_threads(self):
+        self.assertEqual(job_scheduler.ffmpeg_threads('-threads 4'), 4)
+        self.assertEqual(job_scheduler.ffmpeg_threads(''), 0)
+        self.assertEqual(job_scheduler.ffmpeg_threads(None), 0)
+
+    def test_user_value(self):
+        self.assertEqual(job_scheduler.concurrent_jobs(3, '-threads 4'), 3)
+
+    def test_auto(self):
+        self.assertEqual(job_scheduler.concurrent_jobs(0, '-threads 4',
+                                                       cpus=32), 8)
+        self.assertEqual(job_scheduler.concurrent_jobs(0, '-threads 8',
+                                                       cpus=4), 1)
+
+    def test_auto_ffmpeg_threads(self):
+        self.assertEqual(job_scheduler.concurrent_jobs(0, '-threads 0',
+                                                       cpus=32), 1)
+
+
+class TestSplitTimeline(unittest.TestCase):
+    """Test case for the split_timeline function."""
+
+    def test_keyframe_aligned(self):
+        keyframes = [x * 2.0 for x in range(150)]  # GOP of 2 sec.
+        self.assertEqual(job_scheduler.split_timeline(keyframes, 300, 3),
+                         [(0.0, 100.0), (100.0, 100.0), (200.0, None)])
+
+    def test_next_keyframe(self):
+        keyframes = [0.0, 95.0, 130.0, 250.0]
+        self.assertEqual(job_scheduler.split_timeline(keyframes, 300, 3),
+                         [(0.0, 130.0), (130.0, 120.0), (250.0, None)])
+
+    def test_short_segments(self):
+        keyframes = [x * 1.0 for x in range(40)]
+        self.assertEqual(job_scheduler.split_timeline(keyframes, 40, 4),
+                         [(0.0, None)])
+
+    def test_intra_only(self):
+        keyframes = [x / 25 for x in range(25 * 120)]  # all keyframes
+        segments = job_scheduler.split_timeline(keyframes, 120, 2)
+        self.assertEqual(segments, [(0.0, 60.0), (60.0, None)])
+
+
+class TestJobScheduler(unittest.TestCase):
+    """Test case for the JobScheduler class."""
+
+    def test_ordered_results(self):
+        def job(jobid, value):
+            time.sleep(0.01 * (5 - jobid))
+            return jobid, value
+
+        items = [(x,) for x in 'abcd']
+        sched = job_scheduler.JobScheduler(4)
+        self.assertEqual(sched.map(job, items),
+                         [(1, 'a'), (2, 'b'), (3, 'c'), (4, 'd')])
+
+    def test_max_jobs(self):
+        lock = threading.Lock()
+        running = [0, 0]  # current, max
+
+        def job(jobid):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        job_scheduler.JobScheduler(2).map(job, [()] * 6)
+        self.assertEqual(running[1], 2)
+
+    def test_stop(self):
+        stop = threading.Event()
+
+        def job(jobid):
+            stop.set()
+            return jobid
+
+        sched = job_scheduler.JobScheduler(1, stop=stop.is_set)
+        self.assertEqual(sched.map(job, [()] * 3), [1, None, None])
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the log_buffer.py object.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import os.path
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_utils.log_buffer import LogBuffer
+except ImportError as error:
+    sys.exit(error)
+
+
+class TestLogBuffer(unittest.TestCase):
+    """Test case for the LogBuffer class."""
+
+    def test_lines(self):
+        buf = LogBuffer(10)
+        buf.append('one\ntwo\n', 'INFO')
+        buf.append('\n', 'TXT0')
+        self.assertEqual(list(buf), [('one', 'INFO'), ('two', 'INFO'),
+                                     ('', 'TXT0')])
+
+    def test_partial_line(self):
+        buf = LogBuffer(10)
+        buf.append('[Job 1] ', 'TXT3')
+        buf.append('Conversion failed\n', 'ERR1')
+        buf.append('next', 'TXT3')
+        buf.append(' line\n', 'INFO')
+        self.assertEqual(list(buf), [('[Job 1] Conversion failed', 'ERR1'),
+                                     ('next line', 'TXT3')])
+        self.assertEqual(buf.first_error, 0)
+
+    def test_bounded(self):
+        buf = LogBuffer(3)
+        buf.append('a\nb\n', 'TXT3')
+        buf.append('error\n', 'ERR0')
+        self.assertEqual(buf.append('c\nd\ne\n', 'TXT3'), 3)
+        self.assertEqual(len(buf), 3)
+        self.assertEqual(buf.start, 3)
+        self.assertEqual(buf[0], ('c', 'TXT3'))
+        self.assertEqual(buf.first_error, 2)
+        self.assertIsNone(buf.position(buf.first_error))
+        self.assertEqual(buf.position(4), 1)
+
+    def test_first_error(self):
+        buf = LogBuffer(5)
+        buf.append('a\nb\n', 'TXT3')
+        self.assertIsNone(buf.position(buf.first_error))
+        buf.append('error 1\n', 'ERR0')
+        buf.append('error 2\n', 'ERR1')
+        self.assertEqual(buf.position(buf.first_error), 2)
+        buf.clear()
+        self.assertEqual((len(buf), buf.start, buf.first_error), (0, 0, None))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
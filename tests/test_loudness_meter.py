@@ -0,0 +1,177 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the loudness_meter.py objects.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import io
+import os.path
+import struct
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_threads.loudness_meter import (LoudnessMeter,
+                                                       MeterReader,
+                                                       channel_weights,
+                                                       read_wav_header,
+                                                       volumedetect_stats,
+                                                       loudnorm_stats)
+except ImportError as error:
+    sys.exit(error)
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None  # the meter is optional
+
+RATE = 48000
+
+
+def sine(freq, seconds, amplitude=1.0, phase=0.0, rate=RATE):
+    """
+    Returns the samples of a sine wave
+    """
+    times = numpy.arange(int(seconds * rate)) / rate
+    return amplitude * numpy.sin(2 * numpy.pi * freq * times + phase)
+
+
+def wav_header(channels, rate=RATE, mask=None):
+    """
+    Returns the header of a WAV stream of 32-bit float samples
+    like the one written by ffmpeg on a pipe
+    """
+    if mask is None:
+        fmt = struct.pack('<HHIIHH', 3, channels, rate,
+                          rate * channels * 4, channels * 4, 32)
+    else:
+        fmt = struct.pack('<HHIIHHHHIH14s', 0xFFFE, channels, rate,
+                          rate * channels * 4, channels * 4, 32, 22, 32,
+                          mask, 3, b'\x00\x00\x00\x00\x10\x00\x80\x00'
+                          b'\x00\xaa\x008\x9bq')
+    return (b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE'
+            + b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+            + b'LIST' + struct.pack('<I', 3) + b'abc\x00'
+            + b'data' + struct.pack('<I', 0xFFFFFFFF))
+
+
+class Pipe(io.BytesIO):
+    """A stream returning few bytes at a time, like a pipe"""
+
+    def read(self, size=-1):
+        return super().read(min(size, 1001) if size > 0 else 1001)
+
+
+@unittest.skipIf(numpy is None, 'requires NumPy')
+class TestLoudnessMeter(unittest.TestCase):
+    """Test case for the LoudnessMeter class."""
+
+    def measure(self, samples, channels=1, **kwargs):
+        """
+        Returns the result of the meter fed with `samples`
+        """
+        meter = LoudnessMeter(RATE, channels, **kwargs)
+        meter.feed(samples)
+        return meter.result()
+
+    def test_reference(self):
+        # BS.1770: 0 dBFS 997 Hz sine on a channel reads -3.01 LUFS
+        result = self.measure(sine(997, 20))
+        self.assertAlmostEqual(result['integrated'], -3.01, delta=0.02)
+        samples = numpy.stack([sine(1000, 20, 0.1)] * 2, axis=1)
+        result = self.measure(samples, channels=2)
+        self.assertAlmostEqual(result['integrated'], -20.0, delta=0.05)
+        self.assertAlmostEqual(result['threshold'], -30.0, delta=0.05)
+        self.assertAlmostEqual(result['lra'], 0.0, delta=0.01)
+        for chan in result['channels']:
+            self.assertAlmostEqual(chan['integrated'], -23.0, delta=0.05)
+
+    def test_blocks(self):
+        samples = numpy.random.default_rng(1).normal(0, 0.1, (RATE * 7, 2))
+        meter = LoudnessMeter(RATE, 2)
+        for start in range(0, len(samples), 12345):
+            meter.feed(samples[start:start + 12345].ravel())
+        whole = self.measure(samples, channels=2)
+        result = meter.result()
+        for key in ('integrated', 'threshold', 'lra', 'true_peak',
+                    'peak', 'rms', 'duration'):
+            self.assertAlmostEqual(result[key], whole[key], places=6)
+
+    def test_levels(self):
+        result = self.measure(sine(997, 5, 0.5))
+        self.assertAlmostEqual(result['peak'], -6.02, delta=0.01)
+        self.assertAlmostEqual(result['rms'], -9.03, delta=0.01)
+        # samples at +/- 0.707 of a rate/4 sine: the true peak is 0
+        result = self.measure(sine(RATE / 4, 5, phase=numpy.pi / 4))
+        self.assertAlmostEqual(result['peak'], -3.01, delta=0.01)
+        self.assertAlmostEqual(result['true_peak'], 0.0, delta=0.2)
+
+    def test_gating(self):
+        samples = numpy.concatenate((numpy.zeros(RATE * 20),
+                                     sine(997, 10, 0.1)))
+        result = self.measure(samples, segment=10)
+        # the blocks across the onset are partly silent
+        self.assertAlmostEqual(result['integrated'], -23.01, delta=0.1)
+        self.assertEqual([seg['start'] for seg in result['segments']],
+                         [0.0, 10.0, 20.0])
+        self.assertEqual(result['segments'][0]['integrated'], -numpy.inf)
+        self.assertEqual(result['segments'][0]['peak'], -numpy.inf)
+        self.assertAlmostEqual(result['segments'][2]['peak'], -20.0,
+                               delta=0.01)
+
+    def test_silence(self):
+        result = self.measure(numpy.zeros(RATE))
+        self.assertEqual(volumedetect_stats(result),
+                         {'max_volume': '-99.0', 'mean_volume': '-99.0'})
+        self.assertEqual(loudnorm_stats(result)['Input Integrated'],
+                         '-99.00')
+
+    def test_weights(self):
+        self.assertEqual(channel_weights(2), [1.0, 1.0])
+        self.assertEqual(channel_weights(6, 0x3F),  # 5.1
+                         [1.0, 1.0, 1.0, 0.0, 1.41, 1.41])
+        self.assertEqual(channel_weights(6, 0x60F),  # 5.1(side)
+                         [1.0, 1.0, 1.0, 0.0, 1.41, 1.41])
+
+
+@unittest.skipIf(numpy is None, 'requires NumPy')
+class TestMeterReader(unittest.TestCase):
+    """Test case for the WAV stream reading."""
+
+    def test_header(self):
+        stream = io.BytesIO(wav_header(6, mask=0x3F) + b'x')
+        self.assertEqual(read_wav_header(stream),
+                         (RATE, 6, [1.0, 1.0, 1.0, 0.0, 1.41, 1.41]))
+        self.assertEqual(stream.read(), b'x')
+        self.assertIsNone(read_wav_header(io.BytesIO(b'')))
+        with self.assertRaises(ValueError):
+            read_wav_header(io.BytesIO(b'RIFF\x00\x00'))
+        with self.assertRaises(ValueError):
+            read_wav_header(io.BytesIO(wav_header(2).replace(
+                b'\x03\x00\x02\x00', b'\x01\x00\x02\x00')))
+
+    def test_reader(self):
+        samples = numpy.stack([sine(997, 3, 0.5)] * 2, axis=1)
+        stream = Pipe(wav_header(2) + samples.astype('<f4').tobytes())
+        seconds = []
+        reader = MeterReader(progress=seconds.append)
+        reader(stream)
+        self.assertIsNone(reader.error)
+        self.assertAlmostEqual(seconds[-1], 3.0)
+        self.assertAlmostEqual(reader.meter.result()['peak'], -6.02,
+                               delta=0.01)
+
+    def test_not_wav(self):
+        reader = MeterReader()
+        reader(io.BytesIO(b'not a wav stream'))
+        self.assertIsNone(reader.meter)
+        self.assertTrue(reader.error)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
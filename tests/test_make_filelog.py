@@ -0,0 +1,80 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the make_filelog.py objects.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import os.path
+import tempfile
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_io import make_filelog
+except ImportError as error:
+    sys.exit(error)
+
+
+class TestLogWriter(unittest.TestCase):
+    """Test case for the LogWriter class."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.logfile = os.path.join(self.tmpdir.name, 'test.log')
+
+    def tearDown(self):
+        make_filelog.close_logwriter()
+        self.tmpdir.cleanup()
+
+    def read(self, name='test.log'):
+        with open(os.path.join(self.tmpdir.name, name),
+                  encoding='utf8') as log:
+            return log.read()
+
+    def test_write_and_flush(self):
+        writer = make_filelog.LogWriter(self.logfile)
+        for num in range(100):
+            writer.write(f'line {num}\n')
+        writer.flush()
+        self.assertEqual(self.read().splitlines(),
+                         [f'line {num}' for num in range(100)])
+        writer.close()
+        self.assertFalse(writer.is_alive())
+
+    def test_rotation(self):
+        writer = make_filelog.LogWriter(self.logfile, maxsize=100,
+                                        backups=2)
+        for num in range(4):
+            writer.write(f'{num}' * 150 + '\n')
+            writer.flush()
+        writer.close()
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)),
+                         ['test.log', 'test.log.1', 'test.log.2'])
+        self.assertEqual(self.read(), '')
+        self.assertEqual(self.read('test.log.1'), '3' * 150 + '\n')
+        self.assertEqual(self.read('test.log.2'), '2' * 150 + '\n')
+
+    def test_logwrite(self):
+        logfile = make_filelog.make_log_template('test.log',
+                                                 self.tmpdir.name, 'w')
+        make_filelog.logwrite('command', '', logfile)
+        make_filelog.logwrite('', 'error', logfile)
+        self.assertIs(make_filelog.get_logwriter(logfile),
+                      make_filelog.get_logwriter(logfile))
+        make_filelog.close_logwriter(logfile)
+        self.assertTrue(self.read().endswith('command\n\n...error\n\n'))
+
+        # a new template writes the queued text first
+        make_filelog.logwrite('other', '', logfile)
+        make_filelog.make_log_template('test.log', self.tmpdir.name, 'a')
+        self.assertIn('other\n\n\n====', self.read())
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
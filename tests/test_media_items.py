@@ -0,0 +1,126 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the media_items.py objects.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import os.path
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_io.media_items import MediaItem, MediaList
+except ImportError as error:
+    sys.exit(error)
+
+PROBE = {'format': {'filename': '/tmp/a.mkv',
+                    'duration': '0:01:40.010000',
+                    'size': '1.5 Mibyte'},
+         'streams': [{'index': 0, 'codec_type': 'video',
+                      'codec_name': 'h264', 'width': 1920, 'height': 1080},
+                     {'index': 1, 'codec_type': 'audio',
+                      'codec_name': 'aac', 'sample_rate': '48000'}]}
+
+
+class TestMediaItem(unittest.TestCase):
+    """Test case for the MediaItem class."""
+
+    def test_from_probe(self):
+        item = MediaItem.from_probe('/tmp/a.mkv', PROBE, 'a')
+        self.assertEqual(item.duration, 100010)
+        self.assertEqual(item.time, '0:01:40.010000')
+        self.assertEqual(item.size, '1.5 Mibyte')
+        self.assertEqual(item.codec_type, 'video')
+        self.assertEqual(item.codec_name, 'h264')
+        self.assertEqual((item.width, item.height), (1920, 1080))
+        self.assertEqual(len(item.streams), 2)
+
+    def test_missing_duration(self):
+        item = MediaItem.from_probe('/tmp/a.png',
+                                    {'format': {}, 'streams': []}, 'a')
+        self.assertEqual((item.time, item.duration), ('00:00:00.000', 0))
+        self.assertEqual(item.codec_type, '')
+        self.assertIsNone(item.width)
+
+    def test_slots(self):
+        item = MediaItem('/tmp/a.mkv', 'a')
+        with self.assertRaises(AttributeError):
+            item.data = {}
+
+    def test_lazy_probe(self):
+        calls = []
+
+        def loader(path):
+            calls.append(path)
+            return PROBE
+
+        item = MediaItem.from_probe('/tmp/a.mkv', PROBE, 'a', loader=loader)
+        self.assertEqual(calls, [])
+        self.assertIs(item.probe, PROBE)
+        self.assertIs(item.probe, PROBE)
+        self.assertEqual(calls, ['/tmp/a.mkv'])
+
+    def test_summary(self):
+        item = MediaItem.from_probe('/tmp/a.mkv', PROBE, 'a')
+        self.assertIsNone(item.probe)
+        self.assertEqual(item.summary()['format']['filename'], '/tmp/a.mkv')
+        self.assertEqual(item.summary()['streams'], PROBE['streams'])
+
+
+class TestMediaList(unittest.TestCase):
+    """Test case for the MediaList class."""
+
+    def setUp(self):
+        self.media = MediaList()
+        for name, time in (('a', '0:00:01.000'), ('b', None),
+                           ('c', '0:00:03.500')):
+            self.media.append(MediaItem(f'/tmp/{name}.mkv', name, time))
+
+    def test_access(self):
+        self.assertEqual(len(self.media), 3)
+        self.assertIn('/tmp/b.mkv', self.media)
+        self.assertEqual(self.media[2].outputname, 'c')
+        self.assertEqual(self.media[-1].outputname, 'c')
+        self.assertEqual(self.media['/tmp/a.mkv'].outputname, 'a')
+        self.assertEqual(self.media.index('/tmp/c.mkv'), 2)
+        self.assertEqual(self.media.paths(),
+                         ['/tmp/a.mkv', '/tmp/b.mkv', '/tmp/c.mkv'])
+        self.assertEqual(self.media.durations(), [1000, 0, 3500])
+        self.assertEqual(self.media.outputnames(), ['a', 'b', 'c'])
+
+    def test_duplicate(self):
+        with self.assertRaises(ValueError):
+            self.media.append(MediaItem('/tmp/a.mkv', 'x'))
+        self.assertEqual(len(self.media), 3)
+
+    def test_remove(self):
+        self.media.remove(1)
+        self.assertEqual(self.media.index('/tmp/c.mkv'), 1)
+        self.media.remove('/tmp/a.mkv')
+        self.assertEqual(self.media.paths(), ['/tmp/c.mkv'])
+        self.assertNotIn('/tmp/a.mkv', self.media)
+        with self.assertRaises(ValueError):
+            self.media.index('/tmp/a.mkv')
+
+    def test_remove_many(self):
+        self.media.append(MediaItem('/tmp/d.mkv', 'd'))
+        self.media.remove(3, 0, 2)  # positions before the removal
+        self.assertEqual(self.media.paths(), ['/tmp/b.mkv'])
+        self.assertEqual(self.media.index('/tmp/b.mkv'), 0)
+
+    def test_rename_and_clear(self):
+        self.media[0].outputname = 'new'
+        self.assertEqual(self.media.outputnames(), ['new', 'b', 'c'])
+        self.media.clear()
+        self.assertFalse(self.media)
+        self.assertEqual(self.media.paths(), [])
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
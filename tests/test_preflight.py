@@ -0,0 +1,128 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the preflight.py object.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import os.path
+import tempfile
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_io.preflight import (parse_bitrate,
+                                             estimate_pass,
+                                             preset_jobs,
+                                             shortages,
+                                             smallest_first,
+                                             fitting_jobs)
+    from videomass.vdms_io.media_items import MediaItem
+except ImportError as error:
+    sys.exit(error)
+
+# streams as given by ffprobe with the -pretty option, see filedrop
+VIDEO = {'codec_type': 'video', 'width': 19200, 'height': 2400,
+         'avg_frame_rate': '30/1', 'bit_rate': '1.200000 Mbit/s'}
+AUDIO = {'codec_type': 'audio', 'sample_rate': '48 KHz',
+         'bit_rate': '128 Kbit/s'}
+PROBE = {'format': {'duration': '0:00:10.000000', 'size': '1.363754 Mibyte',
+                    'bit_rate': '1.144000 Mbit/s'},
+         'streams': [VIDEO, AUDIO]}
+
+
+class TestEstimate(unittest.TestCase):
+    """Test case for the output size estimates."""
+
+    def test_bitrate(self):
+        self.assertEqual(parse_bitrate('500k'), 500000)
+        self.assertEqual(parse_bitrate('2.5M'), 2500000)
+        self.assertIsNone(parse_bitrate('fast'))
+
+    def test_hap(self):
+        size = estimate_pass('-c:v hap -format hap_q -an', [VIDEO, AUDIO],
+                             10000)
+        self.assertAlmostEqual(size / (19200 * 2400 * 30 * 10), 1.0,
+                               delta=0.1)
+        half = estimate_pass('-c:v hap -an', [VIDEO], 10000)
+        self.assertAlmostEqual(half / size, 0.5, delta=0.01)
+        small = estimate_pass('-c:v hap -an -vf scale=1920:1080', [VIDEO],
+                              10000)
+        self.assertLess(small, half / 20)
+
+    def test_bitrate_options(self):
+        size = estimate_pass('-c:v libx264 -b:v 8M -c:a aac -b:a 128k',
+                             [VIDEO, AUDIO], 10000)
+        self.assertAlmostEqual(size, (8e6 + 128e3) * 10 / 8, delta=size / 10)
+
+    def test_fallbacks(self):
+        self.assertEqual(estimate_pass('-c copy', [VIDEO], 10000, 123), 123)
+        self.assertEqual(estimate_pass('-c:v libx264 -crf 18', [VIDEO],
+                                       10000, 456), 456)
+        self.assertEqual(estimate_pass('-vn -f null', [VIDEO], 10000, 1), 0)
+
+    def test_pcm(self):
+        size = estimate_pass('-vn -c:a pcm_s24le', [VIDEO, AUDIO], 10000)
+        self.assertAlmostEqual(size, 48000 * 3 * 2 * 10, delta=size / 10)
+        audio = dict(AUDIO, sample_rate='44.100000 KHz')
+        size = estimate_pass('-vn -c:a pcm_s16le', [audio], 10000)
+        self.assertAlmostEqual(size, 44100 * 2 * 2 * 10, delta=size / 10)
+        size = estimate_pass('-vn -c:a pcm_s16le -ar 8000', [AUDIO], 10000)
+        self.assertAlmostEqual(size, 8000 * 2 * 2 * 10, delta=size / 10)
+        audio = dict(AUDIO, sample_rate='N/A')
+        size = estimate_pass('-vn -c:a pcm_s16le', [audio], 10000)
+        self.assertAlmostEqual(size, 48000 * 2 * 2 * 10, delta=size / 10)
+
+    def test_preset_jobs(self):
+        item = MediaItem.from_probe('/in.mov', PROBE, 'in')
+        passes = [['-c copy', '_a'], ['-c:v libx264 -crf 18', '_b']]
+        jobs = preset_jobs(passes, ['/out/in.mov'], [item])
+        self.assertEqual(jobs, [[('/out/in_a.mov', 1429999),
+                                 ('/out/in_b.mov', 1429999)]])
+
+    def test_time_seq(self):
+        item = MediaItem.from_probe('/in.mov', PROBE, 'in')
+        passes = [['-c copy', '_a'], ['-c:v prores_ks -c:a pcm_s16le', '_b']]
+        whole = preset_jobs(passes, ['/out/in.mov'], [item])
+        part = preset_jobs(passes, ['/out/in.mov'], [item],
+                           '-ss 00:00:01.000 -t 00:00:02.500')
+        self.assertEqual(part[0][0], ('/out/in_a.mov', 1429999 // 4))
+        self.assertAlmostEqual(part[0][1][1], whole[0][1][1] / 4, delta=1)
+        longer = preset_jobs(passes, ['/out/in.mov'], [item], '-t 60')
+        self.assertEqual(longer, whole)
+
+
+class TestFreeSpace(unittest.TestCase):
+    """Test case for the free space of the destinations."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.names = [os.path.join(self.tmp.name, f'out{n}.mov')
+                      for n in range(3)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_shortages(self):
+        self.assertEqual(shortages([(self.names[0], 10)]), [])
+        lacking = shortages([(self.names[0], 10), (self.names[1], 2 ** 62)])
+        self.assertEqual(len(lacking), 1)
+        self.assertEqual(lacking[0][0], self.tmp.name)
+        self.assertEqual(lacking[0][1], 10 + 2 ** 62)
+        missing = os.path.join(self.tmp.name, 'missing', 'out.mov')
+        self.assertEqual(shortages([(missing, 2 ** 62)]), [])
+
+    def test_order(self):
+        jobs = [[(self.names[0], 10)], [(self.names[1], 2 ** 62)],
+                [(self.names[2], 5)]]
+        self.assertEqual(smallest_first(jobs), [2, 0, 1])
+        self.assertEqual(fitting_jobs(jobs), [2, 0])
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
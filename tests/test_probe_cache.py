@@ -0,0 +1,123 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the probe_cache.py object.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import os.path
+import tempfile
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_io.probe_cache import ProbeCache, audio_stream
+    from videomass.vdms_threads.ffmpeg_runner import analysis_args
+except ImportError as error:
+    sys.exit(error)
+
+
+class TestProbeCache(unittest.TestCase):
+    """Test case for the ProbeCache class."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.media = os.path.join(self.tmp.name, 'clip.mov')
+        with open(self.media, 'wb') as fobj:
+            fobj.write(b'\0' * 100)
+        self.dbpath = os.path.join(self.tmp.name, 'cache.db')
+        self.cache = ProbeCache(self.dbpath)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_hit(self):
+        data = {'format': {'duration': '1.0'}}
+        self.cache.put(self.media, 'full', data)
+        self.assertEqual(self.cache.get(self.media, 'full'), data)
+        self.assertIsNone(self.cache.get(self.media, 'other'))
+
+    def test_modified_file(self):
+        self.cache.put(self.media, 'full', {'format': {}})
+        with open(self.media, 'ab') as fobj:
+            fobj.write(b'\0')
+        self.assertIsNone(self.cache.get(self.media, 'full'))
+
+    def test_missing_file(self):
+        missing = os.path.join(self.tmp.name, 'missing.mov')
+        self.cache.put(missing, 'full', {'format': {}})
+        self.assertIsNone(self.cache.get(missing, 'full'))
+
+    def test_eviction(self):
+        self.cache.maxsize = 100
+        self.cache.put(self.media, 'a', {'data': 'x' * 60})
+        self.cache.put(self.media, 'b', {'data': 'y' * 60})
+        self.assertIsNone(self.cache.get(self.media, 'a'))
+        self.assertIsNotNone(self.cache.get(self.media, 'b'))
+
+    def test_total(self):
+        self.cache.put(self.media, 'a', {'data': 'x' * 60})
+        self.cache.put(self.media, 'a', {'data': 'x' * 10})
+        self.cache.put(self.media, 'b', {'data': 'y' * 20})
+        self.assertEqual(self.cache.total, 22 + 32)
+        # the total is read back when the database is opened again
+        other = ProbeCache(self.dbpath)
+        self.assertEqual(other.total, 22 + 32)
+        other.close()
+        self.cache.clear()
+        self.assertEqual(self.cache.total, 0)
+
+    def test_clear(self):
+        self.cache.put(self.media, 'full', {'format': {}})
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(self.media, 'full'))
+
+    def test_measurement(self):
+        stats = {'max_volume': '-1.0', 'mean_volume': '-20.5'}
+        self.cache.put_measurement(self.media, 'volumedetect',
+                                   '-ss 00:00:10  -t 5', '1', stats)
+        self.assertEqual(self.cache.measurement(self.media, 'volumedetect',
+                                                '-ss 00:00:10 -t 5', '1'),
+                         stats)
+        for args in (('loudnorm', '-ss 00:00:10 -t 5', '1'),
+                     ('volumedetect', '', '1'),
+                     ('volumedetect', '-ss 00:00:10 -t 5', '')):
+            self.assertIsNone(self.cache.measurement(self.media, *args))
+        with open(self.media, 'ab') as fobj:
+            fobj.write(b'\0')
+        self.assertIsNone(self.cache.measurement(self.media, 'volumedetect',
+                                                 '-ss 00:00:10 -t 5', '1'))
+
+    def test_audio_stream(self):
+        self.assertEqual(audio_stream('-map 0:v? -map 0:a:2 -vn'), '2')
+        self.assertEqual(audio_stream('-map 0:a:1? -c:a:0 aac'), '1')
+        self.assertEqual(audio_stream('-map 0:a:?'), 'all')
+        self.assertEqual(audio_stream('-map 0:v -map 0:a'), 'all')
+        self.assertIsNone(audio_stream('-map 0:0 -map 0:2'))
+        streams = [{'codec_type': 'video'}, {'codec_type': 'audio'},
+                   {'codec_type': 'audio'}]
+        self.assertEqual(audio_stream('-map 0:0 -map 0:2', streams), '1')
+        self.assertIsNone(audio_stream('-map 0:0', streams))
+        self.assertIsNone(audio_stream('-map 0:5', streams))
+
+    def test_default_audio_map(self):
+        # first pass of the EBU audio preset with the default map
+        args = ('-map 0:a:? -filter:a: loudnorm=I=-16:TP=-1.5:LRA=11:'
+                'print_format=summary -vn -sn -pass 1 -f null')
+        stream = audio_stream(args)
+        self.assertEqual(stream, 'all')
+        args = analysis_args('ffmpeg', 'in.mov', 'loudnorm', '', stream)
+        self.assertEqual(args[args.index('-i') - 3:args.index('-i')],
+                         ['-vn', '-sn', '-dn'])
+        self.assertEqual(args[args.index('-map') + 1], '0:a?')
+        self.assertEqual(audio_stream(''), '')
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
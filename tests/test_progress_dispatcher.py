@@ -0,0 +1,71 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the progress_dispatcher.py object.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import os.path
+import time
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_threads.progress_dispatcher import ProgressDispatcher
+except ImportError as error:
+    sys.exit(error)
+
+
+class TestProgressDispatcher(unittest.TestCase):
+    """Test case for the ProgressDispatcher class."""
+
+    def setUp(self):
+        self.posted = []
+        self.events = ProgressDispatcher(
+            lambda topic, **kwargs: self.posted.append((topic, kwargs)),
+            rate=20)
+
+    def test_coalesce_progress(self):
+        for num in range(100):
+            self.events.send('PROGRESS_EVT', progress=num, duration=0,
+                             jobid=1)
+        self.events.send('PROGRESS_EVT', progress=5, duration=0, jobid=2)
+        self.assertEqual(self.posted, [])
+        time.sleep(0.2)
+        self.assertEqual(self.posted,
+                         [('PROGRESS_EVT', {'progress': 99, 'duration': 0,
+                                            'jobid': 1}),
+                          ('PROGRESS_EVT', {'progress': 5, 'duration': 0,
+                                            'jobid': 2})])
+
+    def test_batch_lines(self):
+        for num in range(3):
+            self.events.send('UPDATE_EVT', output=f'{num}\n', duration=0,
+                             status=0)
+        time.sleep(0.2)
+        self.assertEqual(len(self.posted), 1)
+        topic, kwargs = self.posted[0]
+        self.assertEqual(topic, 'LOG_EVT')
+        self.assertEqual([x['output'] for x in kwargs['lines']],
+                         ['0\n', '1\n', '2\n'])
+
+    def test_immediate_in_order(self):
+        self.events.send('UPDATE_EVT', output='line\n', duration=0,
+                         status=0)
+        self.events.send('PROGRESS_EVT', progress=1, duration=0)
+        self.events.send('UPDATE_EVT', output='', duration=0, status=1)
+        self.events.send('COUNT_EVT', count='', end='Done')
+        self.assertEqual([x[0] for x in self.posted],
+                         ['LOG_EVT', 'PROGRESS_EVT', 'UPDATE_EVT',
+                          'COUNT_EVT'])
+        time.sleep(0.2)
+        self.assertEqual(len(self.posted), 4)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
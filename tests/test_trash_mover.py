@@ -0,0 +1,101 @@
+# -*- coding: UTF-8 -*-
+
+# Porpose: Contains test cases for the trash_mover.py object.
+# Rev: Oct.18.2026 *PEP8 compatible*
+
+import sys
+import os.path
+import tempfile
+import threading
+import unittest
+
+PATH = os.path.realpath(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(PATH)))
+
+try:
+    from videomass.vdms_threads import trash_mover
+    from videomass.vdms_threads.trash_mover import (TrashMover,
+                                                    stream_copy,
+                                                    trash_names)
+except ImportError as error:
+    sys.exit(error)
+
+
+class TestTrashMover(unittest.TestCase):
+    """Test case for the TrashMover class."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.trash = os.path.join(self.tmp.name, 'Trash')
+        os.mkdir(self.trash)
+        self.files = []
+        for num in range(2):
+            name = os.path.join(self.tmp.name, f'src{num}.mov')
+            with open(name, 'wb') as fobj:
+                fobj.write(os.urandom(1000 * (num + 1)))
+            self.files.append(name)
+        self.events = []
+        self.done = threading.Event()
+        self.same_device = trash_mover.same_device
+
+    def tearDown(self):
+        trash_mover.same_device = self.same_device
+        self.tmp.cleanup()
+
+    def post(self, topic, **kwargs):
+        """collects the TRASH_EVT messages"""
+        self.events.append(kwargs)
+        if kwargs['end'] and not kwargs['pending']:
+            self.done.set()
+
+    def test_names(self):
+        names = trash_names(['/a/b.mov'], '/trash', 'today')
+        self.assertEqual(names, [('/a/b.mov', '/trash/today_b.mov')])
+
+    def test_stream_copy(self):
+        dst = os.path.join(self.trash, 'copy.mov')
+        sizes = []
+        self.assertTrue(stream_copy(self.files[1], dst, sizes.append,
+                                    chunk=300))
+        self.assertEqual(sizes, [300, 600, 900, 1200, 1500, 1800, 2000])
+        with open(self.files[1], 'rb') as src, open(dst, 'rb') as cpy:
+            self.assertEqual(src.read(), cpy.read())
+
+    def test_stream_copy_stopped(self):
+        dst = os.path.join(self.trash, 'copy.mov')
+        self.assertFalse(stream_copy(self.files[1], dst, stop=lambda: True))
+        self.assertEqual(os.listdir(self.trash), [])
+
+    def test_rename(self):
+        mover = TrashMover(post=self.post)
+        mover.move(self.files, self.trash)
+        self.assertTrue(self.done.wait(5))
+        mover.stop()
+        self.assertFalse(any(os.path.exists(f) for f in self.files))
+        self.assertEqual(len(os.listdir(self.trash)), 2)
+        self.assertEqual([e['end'] for e in self.events], ['Done', 'Done'])
+
+    def test_deferred(self):
+        trash_mover.same_device = lambda path, directory: False
+        idle = threading.Event()
+        mover = TrashMover(idle=idle.is_set, post=self.post, large=1500)
+        mover.move(self.files, self.trash)
+        self.assertFalse(self.done.wait(0.5))
+        self.assertFalse(os.path.exists(self.files[0]))  # small, moved
+        self.assertTrue(os.path.exists(self.files[1]))  # large, deferred
+        self.assertEqual(mover.pending(), 1)
+        idle.set()
+        self.assertTrue(self.done.wait(5))
+        mover.stop()
+        self.assertFalse(os.path.exists(self.files[1]))
+        self.assertEqual(sorted(os.path.getsize(os.path.join(self.trash, f))
+                                for f in os.listdir(self.trash)),
+                         [1000, 2000])
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -37,6 +37,7 @@ from videomass.vdms_sys.argparser import arguments
 from videomass.vdms_sys.configurator import DataSource
 from videomass.vdms_sys import app_const as appC
 from videomass.vdms_utils.utils import del_filecontents
+from videomass.vdms_io.make_filelog import close_logwriter
 
 # add translation macro to builtin similar to what gettext does
 builtins.__dict__['_'] = wx.GetTranslation
@@ -205,6 +206,7 @@ class Videomass(wx.App):
                     elif os.path.isdir:
                         rmtree(fcache)
 
+        close_logwriter()  # write any queued log text
         if self.appset['clearlogfiles']:
             logdir = self.appset['logdir']
             if os.path.exists(logdir):
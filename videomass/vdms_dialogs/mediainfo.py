@@ -31,12 +31,15 @@ from pubsub import pub
 class MediaStreams(wx.Dialog):
     """
     Display streams information using ffprobe json data.
+    The file list holds only the entries used by the app,
+    so the full ffprobe data is loaded on selecting a file
+    (see `MediaItem.probe`).
     """
 
     def __init__(self, data, OS):
         """
-        list(data):
-            contains ffprobe data from `MainFrame.self.data_files`.
+        MediaList(data):
+            the imported files from `MainFrame.self.data_files`.
         """
         self.data = data
         get = wx.GetApp()  # get data from bootstrap
@@ -161,8 +164,7 @@ class MediaStreams(wx.Dialog):
         self.Layout()
         self.CentreOnScreen()
 
-        flist = [x['format']['filename'] for x in self.data
-                 if x['format']['filename']]
+        flist = [x.path for x in self.data if x.path]
         index = 0
         for files in flist:
             self.file_select.InsertItem(index, files)
@@ -320,14 +322,14 @@ class MediaStreams(wx.Dialog):
         item = self.file_select.GetItemText(index)
 
         index = 0
-
-        for x in self.data:
-            if x.get('format').get('filename') == item:
-                select = self.data[self.data.index(x)]
-                for k, v in x.get('format').items():
-                    self.format_ctrl.InsertItem(index, str(k))
-                    self.format_ctrl.SetItem(index, 1, str(v))
-                    index += 1
+        select = {}
+
+        if item in self.data:
+            select = self.data[item].probe or self.data[item].summary()
+            for k, v in select.get('format').items():
+                self.format_ctrl.InsertItem(index, str(k))
+                self.format_ctrl.SetItem(index, 1, str(v))
+                index += 1
 
         if select.get('streams'):
             index = 0
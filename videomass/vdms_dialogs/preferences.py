@@ -26,10 +26,14 @@ This file is part of Videomass.
 """
 import os
 import sys
+import sqlite3
 import webbrowser
 import wx
 from videomass.vdms_utils.utils import detect_binaries
 from videomass.vdms_io import io_tools
+from videomass.vdms_io.probe_cache import get_cache, DBNAME
+from videomass.vdms_threads.ffmpeg_runner import parse_cpus
+from videomass.vdms_threads import loudness_meter
 from videomass.vdms_sys.settings_manager import ConfigManager
 from videomass.vdms_sys.app_const import supLang
 
@@ -51,6 +55,8 @@ class SetUp(wx.Dialog):
                      ("verbose (Same as `info`, except more verbose)"),
                      ("debug (Show everything, including debugging info)")
                      ]
+    PARTIAL_OUTPUTS = ('keep', 'delete', 'quarantine')
+    LOUDNESS_ENGINES = ('ffmpeg', 'numpy')
     # -----------------------------------------------------------------
 
     def __init__(self, parent):
@@ -128,6 +134,9 @@ class SetUp(wx.Dialog):
         msg = _("Clear the cache when exiting the application")
         self.checkbox_cacheclr = wx.CheckBox(tabOne, wx.ID_ANY, (msg))
         sizerGen.Add(self.checkbox_cacheclr, 0, wx.ALL, 5)
+        self.btn_probecache = wx.Button(tabOne, wx.ID_ANY,
+                                        _("Clear probe cache"))
+        sizerGen.Add(self.btn_probecache, 0, wx.ALL, 5)
         sizerGen.Add((0, 15))
         lablog = wx.StaticText(tabOne, wx.ID_ANY, _('Log folder'))
         sizerGen.Add(lablog, 0, wx.ALL | wx.EXPAND, 5)
@@ -274,6 +283,65 @@ class SetUp(wx.Dialog):
                                             style=wx.TE_PROCESS_ENTER
                                             )
         gridSizopt.Add(self.spinctrl_threads, 1, wx.ALL | wx.ALIGN_CENTER, 5)
+        gridSizjobs = wx.BoxSizer(wx.HORIZONTAL)
+        sizerFFmpeg.Add(gridSizjobs, 0, wx.EXPAND)
+        msg = _("Files processed at the same time (0 = auto):")
+        labFFjobs = wx.StaticText(tabThree, wx.ID_ANY, (msg))
+        gridSizjobs.Add(labFFjobs, 0, wx.LEFT | wx.ALIGN_CENTER, 5)
+        self.spinctrl_jobs = wx.SpinCtrl(tabThree, wx.ID_ANY,
+                                         f"{self.appdata['concurrent_jobs']}",
+                                         size=(-1, -1), min=0, max=64,
+                                         style=wx.TE_PROCESS_ENTER
+                                         )
+        gridSizjobs.Add(self.spinctrl_jobs, 1, wx.ALL | wx.ALIGN_CENTER, 5)
+        gridSiznice = wx.BoxSizer(wx.HORIZONTAL)
+        sizerFFmpeg.Add(gridSiznice, 0, wx.EXPAND)
+        msg = _("Lower the priority of FFmpeg (0 = normal, 19 = lowest):")
+        labFFnice = wx.StaticText(tabThree, wx.ID_ANY, (msg))
+        gridSiznice.Add(labFFnice, 0, wx.LEFT | wx.ALIGN_CENTER, 5)
+        self.spinctrl_nice = wx.SpinCtrl(tabThree, wx.ID_ANY,
+                                         f"{self.appdata['ffmpeg_niceness']}",
+                                         size=(-1, -1), min=0, max=19,
+                                         style=wx.TE_PROCESS_ENTER
+                                         )
+        gridSiznice.Add(self.spinctrl_nice, 1, wx.ALL | wx.ALIGN_CENTER, 5)
+        gridSizcpus = wx.BoxSizer(wx.HORIZONTAL)
+        sizerFFmpeg.Add(gridSizcpus, 0, wx.EXPAND)
+        msg = _("Run FFmpeg on CPU cores (e.g. 0-3,6, empty = all):")
+        labFFcpus = wx.StaticText(tabThree, wx.ID_ANY, (msg))
+        gridSizcpus.Add(labFFcpus, 0, wx.LEFT | wx.ALIGN_CENTER, 5)
+        self.txtctrl_cpus = wx.TextCtrl(tabThree, wx.ID_ANY,
+                                        self.appdata['ffmpeg_affinity'],
+                                        size=(90, -1))
+        gridSizcpus.Add(self.txtctrl_cpus, 1, wx.ALL | wx.ALIGN_CENTER, 5)
+        msg = _("Decode the input file once for presets with multiple "
+                "passes")
+        self.ckbx_fused = wx.CheckBox(tabThree, wx.ID_ANY, (msg))
+        sizerFFmpeg.Add(self.ckbx_fused, 0, wx.ALL, 5)
+        msg = _("Split a single file into segments encoded at the same "
+                "time (intra-only codecs)")
+        self.ckbx_chunked = wx.CheckBox(tabThree, wx.ID_ANY, (msg))
+        sizerFFmpeg.Add(self.ckbx_chunked, 0, wx.ALL, 5)
+        msg = _("Skip the files already converted with the same settings "
+                "(incremental mode)")
+        self.ckbx_incremental = wx.CheckBox(tabThree, wx.ID_ANY, (msg))
+        sizerFFmpeg.Add(self.ckbx_incremental, 0, wx.ALL, 5)
+        msg = _("Output files of interrupted or failed processes")
+        choices = [_("Keep"), _("Delete"), _("Rename as .partial")]
+        self.rdb_partial = wx.RadioBox(tabThree, wx.ID_ANY, (msg),
+                                       choices=choices,
+                                       majorDimension=0,
+                                       style=wx.RA_SPECIFY_COLS,
+                                       )
+        sizerFFmpeg.Add(self.rdb_partial, 0, wx.ALL | wx.EXPAND, 5)
+        msg = _("Audio analysis of the PEAK, RMS and EBU normalizations")
+        choices = [_("FFmpeg filters"), _("Built-in meter (NumPy)")]
+        self.rdb_loudness = wx.RadioBox(tabThree, wx.ID_ANY, (msg),
+                                        choices=choices,
+                                        majorDimension=0,
+                                        style=wx.RA_SPECIFY_COLS,
+                                        )
+        sizerFFmpeg.Add(self.rdb_loudness, 0, wx.ALL | wx.EXPAND, 5)
         # ----
         tabThree.SetSizer(sizerFFmpeg)
         notebook.AddPage(tabThree, _("FFmpeg"))
@@ -475,6 +543,16 @@ class SetUp(wx.Dialog):
         self.Bind(wx.EVT_RADIOBOX, self.logging_ffplay, self.rdbFFplay)
         self.Bind(wx.EVT_RADIOBOX, self.logging_ffmpeg, self.rdbFFmpeg)
         self.Bind(wx.EVT_SPINCTRL, self.on_threads, self.spinctrl_threads)
+        self.Bind(wx.EVT_SPINCTRL, self.on_jobs, self.spinctrl_jobs)
+        self.Bind(wx.EVT_SPINCTRL, self.on_niceness, self.spinctrl_nice)
+        self.Bind(wx.EVT_TEXT, self.on_affinity, self.txtctrl_cpus)
+        self.Bind(wx.EVT_CHECKBOX, self.on_fused_passes, self.ckbx_fused)
+        self.Bind(wx.EVT_CHECKBOX, self.on_chunked, self.ckbx_chunked)
+        self.Bind(wx.EVT_CHECKBOX, self.on_incremental,
+                  self.ckbx_incremental)
+        self.Bind(wx.EVT_RADIOBOX, self.on_partial_outputs, self.rdb_partial)
+        self.Bind(wx.EVT_RADIOBOX, self.on_loudness_engine,
+                  self.rdb_loudness)
         self.Bind(wx.EVT_BUTTON, self.on_outputfile, self.btn_fsave)
         self.Bind(wx.EVT_CHECKBOX, self.set_Samedest, self.ckbx_dir)
         self.Bind(wx.EVT_TEXT, self.set_Suffix, self.text_suffix)
@@ -495,6 +573,7 @@ class SetUp(wx.Dialog):
         self.Bind(wx.EVT_CHECKBOX, self.on_toolbarText, self.checkbox_tbtext)
         self.Bind(wx.EVT_CHECKBOX, self.exit_warn, self.checkbox_exit)
         self.Bind(wx.EVT_CHECKBOX, self.clear_Cache, self.checkbox_cacheclr)
+        self.Bind(wx.EVT_BUTTON, self.clear_probe_cache, self.btn_probecache)
         self.Bind(wx.EVT_CHECKBOX, self.clear_logs, self.checkbox_logclr)
         self.Bind(wx.EVT_BUTTON, self.on_help, btn_help)
         self.Bind(wx.EVT_BUTTON, self.on_cancel, btn_cancel)
@@ -524,6 +603,15 @@ class SetUp(wx.Dialog):
         self.ckbx_trash.SetValue(self.settings['move_file_to_trash'])
         self.ckbx_playlist.SetValue(self.appdata['playlistsubfolder'])
         self.checkbox_ytdlp.SetValue(self.settings['use-downloader'])
+        self.ckbx_fused.SetValue(self.appdata['fused_multipass'])
+        self.ckbx_chunked.SetValue(self.appdata['chunked_encoding'])
+        self.ckbx_incremental.SetValue(self.appdata['incremental_mode'])
+        self.rdb_partial.SetSelection(SetUp.PARTIAL_OUTPUTS.index(
+            self.appdata['partial_outputs']))
+        self.rdb_loudness.SetSelection(SetUp.LOUDNESS_ENGINES.index(
+            self.appdata['loudness_engine']))
+        if not loudness_meter.available():
+            self.rdb_loudness.EnableItem(1, False)
 
         if not self.settings['move_file_to_trash']:
             self.txtctrl_trash.Disable()
@@ -616,6 +704,73 @@ class SetUp(wx.Dialog):
         self.settings['ffthreads'] = f'-threads {sett}'
     # ---------------------------------------------------------------------#
 
+    def on_jobs(self, event):
+        """set max number of ffmpeg processes running at the same time"""
+        self.settings['concurrent_jobs'] = self.spinctrl_jobs.GetValue()
+    # ---------------------------------------------------------------------#
+
+    def on_niceness(self, event):
+        """set the priority decrease of the ffmpeg processes"""
+        self.settings['ffmpeg_niceness'] = self.spinctrl_nice.GetValue()
+    # ---------------------------------------------------------------------#
+
+    def on_affinity(self, event):
+        """set the CPU cores where the ffmpeg processes run"""
+        val = self.txtctrl_cpus.GetValue().strip()
+        self.settings['ffmpeg_affinity'] = val if parse_cpus(val) else ''
+    # ---------------------------------------------------------------------#
+
+    def on_fused_passes(self, event):
+        """
+        set to run all the passes of a preset
+        with a single ffmpeg process
+        """
+        if self.ckbx_fused.IsChecked():
+            self.settings['fused_multipass'] = True
+        else:
+            self.settings['fused_multipass'] = False
+    # ---------------------------------------------------------------------#
+
+    def on_chunked(self, event):
+        """
+        set to encode a single file by segments
+        with concurrent ffmpeg processes
+        """
+        if self.ckbx_chunked.IsChecked():
+            self.settings['chunked_encoding'] = True
+        else:
+            self.settings['chunked_encoding'] = False
+    # ---------------------------------------------------------------------#
+
+    def on_incremental(self, event):
+        """
+        set to skip the ffmpeg commands whose
+        outputs are already up to date
+        """
+        if self.ckbx_incremental.IsChecked():
+            self.settings['incremental_mode'] = True
+        else:
+            self.settings['incremental_mode'] = False
+    # ---------------------------------------------------------------------#
+
+    def on_partial_outputs(self, event):
+        """
+        set what to do with the outputs of
+        interrupted or failed processes
+        """
+        sel = self.rdb_partial.GetSelection()
+        self.settings['partial_outputs'] = SetUp.PARTIAL_OUTPUTS[sel]
+    # ---------------------------------------------------------------------#
+
+    def on_loudness_engine(self, event):
+        """
+        set how the audio is measured for the
+        PEAK, RMS and EBU normalizations
+        """
+        sel = self.rdb_loudness.GetSelection()
+        self.settings['loudness_engine'] = SetUp.LOUDNESS_ENGINES[sel]
+    # ---------------------------------------------------------------------#
+
     def on_outputfile(self, event):
         """set up a custom user path for file exporting"""
 
@@ -948,6 +1103,23 @@ class SetUp(wx.Dialog):
             self.settings['clearcache'] = False
     # --------------------------------------------------------------------#
 
+    def clear_probe_cache(self, event):
+        """
+        Deletes the stored ffprobe data and loudness
+        measurements of the media files
+        """
+        dbpath = os.path.join(self.appdata['cachedir'], DBNAME)
+        if not os.path.isfile(dbpath):
+            return
+        try:
+            get_cache(dbpath).clear()
+        except sqlite3.Error as err:
+            wx.MessageBox(f'{err}', 'ERROR', wx.ICON_ERROR, self)
+            return
+        wx.MessageBox(_("The probe cache has been cleared."),
+                      "Videomass", wx.ICON_INFORMATION, self)
+    # --------------------------------------------------------------------#
+
     def clear_logs(self, event):
         """
         if checked, set to clear all log files on exit
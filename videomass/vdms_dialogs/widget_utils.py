@@ -28,6 +28,7 @@ This file is part of Videomass.
 import wx
 import wx.adv
 from pubsub import pub
+from videomass.vdms_utils.log_buffer import LogBuffer
 
 
 class NormalTransientPopup(wx.PopupTransientWindow):
@@ -133,3 +134,98 @@ class PopupDialog(wx.Dialog):
         # self.Destroy() # do not work
         # self.ai.Stop()
         self.EndModal(1)
+
+
+class LogView(wx.ListCtrl):
+    """
+    A virtual list control showing the last lines of a process
+    log with the colours of the icon theme. The lines are kept
+    by a bounded `LogBuffer`, so that the memory used and the
+    repaint time do not grow on very long runs; the whole log
+    is on disk in the log file.
+
+    Usage:
+        >>> view = LogView(parent, colours)
+        >>> view.append('some text\n', 'INFO')
+    """
+    MAXLINES = 10000  # max number of lines kept in memory
+
+    def __init__(self, parent, colours, maxlines=MAXLINES):
+        """
+        colours: dict of the icon theme colours
+        """
+        self.clr = colours
+        self.buffer = LogBuffer(maxlines)
+        self.attrs = {}  # wx.ItemAttr by colour name
+        wx.ListCtrl.__init__(self, parent, wx.ID_ANY,
+                             style=wx.LC_REPORT
+                             | wx.LC_VIRTUAL
+                             | wx.LC_NO_HEADER
+                             | wx.LC_SINGLE_SEL
+                             )
+        self.InsertColumn(0, '')
+        self.SetBackgroundColour(self.clr['BACKGRD'])
+        self.Bind(wx.EVT_SIZE, self.on_size)
+
+    def on_size(self, event):
+        """
+        Fits the column width to the control
+        """
+        self.SetColumnWidth(0, max(self.GetClientSize()[0], 200))
+        event.Skip()
+
+    def OnGetItemText(self, item, column):
+        """
+        Returns the text of the line `item`
+        """
+        return self.buffer[item][0]
+
+    def OnGetItemAttr(self, item):
+        """
+        Returns the attributes of the line `item`
+        """
+        colour = self.buffer[item][1]
+        if colour not in self.attrs:
+            attr = wx.ItemAttr()
+            attr.SetTextColour(wx.Colour(self.clr[colour]))
+            attr.SetBackgroundColour(wx.Colour(self.clr['BACKGRD']))
+            self.attrs[colour] = attr
+        return self.attrs[colour]
+
+    def append(self, text, colour):
+        """
+        Appends `text` with the `colour` of the icon theme, the
+        view follows the new lines if the last line was visible.
+        """
+        count = len(self.buffer)
+        following = self.GetTopItem() + self.GetCountPerPage() >= count
+        dropped = self.buffer.append(text, colour)
+        self.SetItemCount(len(self.buffer))
+        if dropped or len(self.buffer) == count:
+            self.Refresh()  # the lines were shifted or continued
+        if following and len(self.buffer):
+            self.EnsureVisible(len(self.buffer) - 1)
+
+    def clear(self):
+        """
+        Removes all lines
+        """
+        self.buffer.clear()
+        self.SetItemCount(0)
+        self.Refresh()
+
+    def goto_first_error(self):
+        """
+        Selects and shows the first error line. Returns False
+        if there are no errors, None if the first error line is
+        no longer in the view, True otherwise.
+        """
+        if self.buffer.first_error is None:
+            return False
+        index = self.buffer.position(self.buffer.first_error)
+        if index is None:
+            return None
+        self.EnsureVisible(index)
+        self.Select(index)
+        self.Focus(index)
+        return True
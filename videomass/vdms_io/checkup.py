@@ -27,6 +27,10 @@ This file is part of Videomass.
 import os
 import wx
 from videomass.vdms_dialogs.list_warning import ListWarning
+from videomass.vdms_io.preflight import (shortages,
+                                         smallest_first,
+                                         fitting_jobs)
+from videomass.vdms_threads.ffprobe import format_size
 
 
 def check_inout(file_sources, file_dest):
@@ -121,3 +125,45 @@ def check_files(file_sources,
                 file_dest.append(pathname)
 
     return check_inout(file_sources, file_dest)
+
+
+def check_free_space(jobs):
+    """
+    Pre-flight check of the free space on the destination
+    filesystems before starting a batch. `jobs` is a list of
+    the estimated outputs of each file (see `preflight`).
+    When the space is not enough, asks whether to process the
+    files that fit only or all the files (the smallest first).
+
+    return the list of the indexes of the jobs to run, in order.
+    return None otherwise.
+    """
+    lacking = shortages([need for job in jobs for need in job])
+    if not lacking:
+        return list(range(len(jobs)))
+
+    msg = _('The estimated size of the output files exceeds the free '
+            'space:\n\n')
+    for dirname, needed, free in lacking:
+        msg += _('"{0}"\n  needed: {1}, free: {2}\n').format(
+            dirname, format_size(needed), format_size(free))
+    msg += _('\nProcess only the files that fit, or all the files from '
+             'the smallest, so that as many as possible are completed?')
+    with wx.MessageDialog(None, msg, _('Not enough disk space'),
+                          wx.ICON_WARNING | wx.YES_NO | wx.CANCEL
+                          ) as dlg:
+        dlg.SetYesNoCancelLabels(_('Only the files that fit'),
+                                 _('All, smallest first'), _('Cancel'))
+        answer = dlg.ShowModal()
+
+    if answer == wx.ID_YES:
+        order = fitting_jobs(jobs)
+        if not order:
+            wx.MessageBox(_('None of the files fits in the free space.'),
+                          'Videomass', wx.ICON_ERROR)
+            return None
+        return order
+    if answer == wx.ID_NO:
+        return smallest_first(jobs)
+    return None
+# ------------------------------------------------------------------------#
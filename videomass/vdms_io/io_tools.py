@@ -24,16 +24,21 @@ This file is part of Videomass.
    You should have received a copy of the GNU General Public License
    along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
 """
+import os
+import sqlite3
 import requests
 import wx
 from videomass.vdms_threads.ffplay_file import FilePlay
 from videomass.vdms_threads import generic_downloads
 from videomass.vdms_threads.volumedetect import VolumeDetectThread
+from videomass.vdms_threads.job_scheduler import concurrent_jobs
+from videomass.vdms_threads.ffmpeg_runner import parse_cpus
 from videomass.vdms_threads.check_bin import (ff_conf,
                                               ff_formats,
                                               ff_codecs,
                                               ff_topics,
                                               )
+from videomass.vdms_io.probe_cache import get_cache, DBNAME
 from videomass.vdms_utils.utils import open_default_application
 from videomass.vdms_dialogs.widget_utils import PopupDialog
 from videomass.vdms_ytdlp.ydl_extractinfo import YdlExtractInfo
@@ -92,14 +97,28 @@ def stream_play(filepath, tseq, param, autoexit):
 def volume_detect_process(filelist, time_seq, audiomap, parent=None):
     """
     Run thread to get audio peak level data and show a
-    pop-up dialog with message.
+    pop-up dialog with message. The files are analyzed
+    concurrently, each volumedetect process uses about
+    one CPU core. The files already measured are taken
+    from the probe cache.
     """
     get = wx.GetApp()
+    try:
+        cache = get_cache(os.path.join(get.appset['cachedir'], DBNAME))
+    except sqlite3.Error:
+        cache = None  # measures every time
     thread = VolumeDetectThread(time_seq,
                                 filelist,
                                 audiomap,
                                 get.appset['logdir'],
-                                get.appset['ffmpeg_cmd']
+                                get.appset['ffmpeg_cmd'],
+                                concurrent_jobs(
+                                    get.appset['concurrent_jobs'],
+                                    '-threads 1'),
+                                get.appset['ffmpeg_niceness'],
+                                parse_cpus(get.appset['ffmpeg_affinity']),
+                                cache,
+                                get.appset['loudness_engine'],
                                 )
     dlgload = PopupDialog(parent,
                           _("Videomass - Loading..."),
@@ -0,0 +1,360 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: job_journal.py
+Porpose: Persistent journal of the batch jobs to resume
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of Videomass.
+
+   Videomass is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   Videomass is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from videomass.vdms_threads.ffprobe import ffprobe
+
+JOURNAL = 'job_journal.sqlite'  # database file name inside the cachedir
+JOURNALS = {}  # shared JobJournal instances (see `get_journal`)
+
+
+def fingerprint(args):
+    """
+    Returns the fingerprint (hex digest) of a command given
+    as argument list, see `JobJournal.stamp`.
+    """
+    return hashlib.sha1('\0'.join(args).encode('utf8')).hexdigest()
+
+
+def valid_output(filename, duration, cmd='ffprobe', tolerance=0.02):
+    """
+    Cheap check of an output file which was not recorded as
+    done (e.g. the application crashed before recording it):
+    the container duration is read by ffprobe, without
+    decoding, and compared with the expected `duration` in
+    milliseconds. Truncated outputs fail to probe or are
+    shorter than expected.
+
+    Returns True if the durations match within the given
+    `tolerance` (ratio, at least half a second), False
+    otherwise or if `duration` is unknown.
+    """
+    if not duration or not os.path.isfile(filename):
+        return False
+    data, error = ffprobe(filename, cmd=cmd, profile='check',
+                          loglevel='error')
+    if error:
+        return False
+    try:
+        probed = float(data['format']['duration']) * 1000
+    except (KeyError, TypeError, ValueError):
+        return False
+    return abs(probed - duration) <= max(500, duration * tolerance)
+
+
+class JobJournal:
+    """
+    Persistent journal of a batch of jobs stored as SQLite
+    database, so that a batch interrupted by a crash or by
+    the user can be resumed later, re-processing only the
+    unfinished files.
+
+    A batch is recorded with the arguments needed to start it
+    again, then the status of each pass of each job is recorded
+    with the size and the modification time of its outputs, so
+    that an output which has been changed or deleted since is
+    not taken as done. Only the last batch is kept, it is
+    deleted when it ends.
+
+    Apart from the batches, the outputs of the successful
+    commands are stamped with the command fingerprint, so that
+    a command whose outputs are newer than its input and were
+    written by the same command can be skipped (like `make`),
+    see `up_to_date`; the stamps of the outputs deleted or
+    changed since are dropped by `prune_stamps`. The temporary
+    outputs of the running commands are recorded too, so that
+    those left by a crash can be removed later, see `clean_temps`.
+
+    The same instance can be shared between threads.
+
+    Usage:
+        >>> journal = JobJournal('/path/to/job_journal.sqlite')
+        >>> batch = journal.begin('onepass', args, durations, timeseq)
+        >>> journal.record(batch, jobid, 1, [outputname], 0)
+        >>> journal.finish(batch)
+        >>> if not journal.up_to_date(infile, outputs, digest):
+        >>>     ...  # run the command
+        >>>     journal.stamp(outputs, digest)
+    """
+
+    def __init__(self, dbpath):
+        """
+        dbpath: pathname of the database file
+        """
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(dbpath, check_same_thread=False)
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS batch ('
+                              'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                              'topic TEXT NOT NULL, '
+                              'args TEXT NOT NULL, '
+                              'durations TEXT NOT NULL, '
+                              'timeseq TEXT NOT NULL, '
+                              'created REAL NOT NULL)'
+                              )
+            self.conn.execute('CREATE TABLE IF NOT EXISTS output ('
+                              'batch INTEGER NOT NULL, '
+                              'jobid INTEGER NOT NULL, '
+                              'pass INTEGER NOT NULL, '
+                              'path TEXT NOT NULL, '
+                              'status TEXT NOT NULL, '
+                              'size INTEGER, '
+                              'mtime INTEGER, '
+                              'PRIMARY KEY (batch, path))'
+                              )
+            self.conn.execute('CREATE TABLE IF NOT EXISTS stamp ('
+                              'path TEXT PRIMARY KEY, '
+                              'digest TEXT NOT NULL, '
+                              'size INTEGER NOT NULL, '
+                              'mtime INTEGER NOT NULL)'
+                              )
+            self.conn.execute('CREATE TABLE IF NOT EXISTS temp ('
+                              'path TEXT PRIMARY KEY)'
+                              )
+    # ------------------------------------------------------------------#
+
+    @staticmethod
+    def filestat(filename):
+        """
+        Returns a tuple (abspath, size, mtime) of the given
+        filename, (abspath, None, None) if it does not exist.
+        """
+        path = os.path.abspath(filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return path, None, None
+        return path, stat.st_size, stat.st_mtime_ns
+    # ------------------------------------------------------------------#
+
+    def begin(self, topic, args, durations, timeseq=''):
+        """
+        Records a new batch replacing the previous one (the GUI
+        asks before replacing an unfinished batch), `args`
+        are the arguments of the thread which processes the
+        batch (a JSON serializable sequence), `durations` the
+        list of the file durations in milliseconds.
+        Returns the batch id.
+        """
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM output')
+            self.conn.execute('DELETE FROM batch')
+            cur = self.conn.execute('INSERT INTO batch (topic, args, '
+                                    'durations, timeseq, created) '
+                                    'VALUES (?, ?, ?, ?, ?)',
+                                    (topic, json.dumps(list(args)),
+                                     json.dumps(list(durations)),
+                                     timeseq or '', time.time())
+                                    )
+        return cur.lastrowid
+    # ------------------------------------------------------------------#
+
+    def record(self, batch, jobid, passnum, outputs, status):
+        """
+        Records the exit `status` of the pass `passnum` of the
+        job `jobid` which writes the `outputs` pathnames.
+        """
+        status = 'done' if status == 0 else str(status)
+        rows = [(batch, jobid, passnum) + (path, status, size, mtime)
+                for path, size, mtime in map(JobJournal.filestat, outputs)]
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO output VALUES '
+                                  '(?, ?, ?, ?, ?, ?, ?)', rows)
+    # ------------------------------------------------------------------#
+
+    def is_done(self, batch, filename):
+        """
+        Returns True if the output `filename` was recorded as
+        done and it has not been changed since.
+        """
+        path, size, mtime = JobJournal.filestat(filename)
+        if size is None:
+            return False
+        with self.lock:
+            row = self.conn.execute('SELECT 1 FROM output WHERE batch=? '
+                                    'AND path=? AND status=? AND size=? '
+                                    'AND mtime=?',
+                                    (batch, path, 'done', size, mtime)
+                                    ).fetchone()
+        return row is not None
+    # ------------------------------------------------------------------#
+
+    def stamp(self, outputs, digest):
+        """
+        Records that the `outputs` pathnames were written by
+        the command with the given fingerprint `digest`. The
+        outputs which are not regular files are ignored.
+        """
+        rows = [(path, digest, size, mtime) for path, size, mtime
+                in map(JobJournal.filestat, outputs)
+                if size is not None and os.path.isfile(path)]
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO stamp VALUES '
+                                  '(?, ?, ?, ?)', rows)
+    # ------------------------------------------------------------------#
+
+    def up_to_date(self, infile, outputs, digest):
+        """
+        Returns True if all the `outputs` exist, are newer than
+        `infile` and were written by the command with the given
+        fingerprint `digest` without being changed since.
+        """
+        inmtime = JobJournal.filestat(infile)[2]
+        if inmtime is None or not outputs:
+            return False
+        for output in outputs:
+            path, size, mtime = JobJournal.filestat(output)
+            if size is None or mtime < inmtime:
+                return False
+            with self.lock:
+                row = self.conn.execute('SELECT 1 FROM stamp WHERE path=? '
+                                        'AND digest=? AND size=? AND '
+                                        'mtime=?',
+                                        (path, digest, size, mtime)
+                                        ).fetchone()
+            if row is None:
+                return False
+        return True
+    # ------------------------------------------------------------------#
+
+    def prune_stamps(self):
+        """
+        Deletes the stamps of the outputs which no longer exist
+        or have been changed since, they can't match anymore.
+        Returns the number of deleted stamps.
+        """
+        with self.lock:
+            rows = self.conn.execute('SELECT path, size, mtime FROM '
+                                     'stamp').fetchall()
+        stale = [(path,) for path, size, mtime in rows
+                 if JobJournal.filestat(path)[1:] != (size, mtime)]
+        with self.lock, self.conn:
+            self.conn.executemany('DELETE FROM stamp WHERE path=?', stale)
+        return len(stale)
+    # ------------------------------------------------------------------#
+
+    def add_temps(self, temps):
+        """
+        Records the pathnames of temporary outputs being written
+        """
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO temp VALUES (?)',
+                                  [(os.path.abspath(path),)
+                                   for path in temps])
+    # ------------------------------------------------------------------#
+
+    def remove_temps(self, temps):
+        """
+        Forgets the given temporary outputs, which have
+        been renamed or deleted.
+        """
+        with self.lock, self.conn:
+            self.conn.executemany('DELETE FROM temp WHERE path=?',
+                                  [(os.path.abspath(path),)
+                                   for path in temps])
+    # ------------------------------------------------------------------#
+
+    def clean_temps(self):
+        """
+        Deletes the recorded temporary outputs which still exist,
+        i.e. those left by a crash. Must be called when no command
+        is running. Returns the list of the deleted files.
+        """
+        with self.lock:
+            rows = self.conn.execute('SELECT path FROM temp').fetchall()
+        removed = []
+        for (path,) in rows:
+            try:
+                if os.path.isfile(path):
+                    os.remove(path)
+                    removed.append(path)
+            except OSError:
+                continue  # in use or no permission, leave it
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM temp')
+        return removed
+    # ------------------------------------------------------------------#
+
+    def finish(self, batch):
+        """
+        Deletes the given batch, it has nothing left to resume
+        """
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM output WHERE batch=?', (batch,))
+            self.conn.execute('DELETE FROM batch WHERE id=?', (batch,))
+    # ------------------------------------------------------------------#
+
+    def unfinished(self):
+        """
+        Returns the unfinished batch as dict object with the
+        keys `id`, `topic`, `args`, `durations`, `timeseq`,
+        `created` and `done` (the number of jobs whose passes
+        all succeeded), None if there is no batch to resume.
+        """
+        with self.lock:
+            row = self.conn.execute('SELECT id, topic, args, durations, '
+                                    'timeseq, created FROM batch ORDER BY '
+                                    'id DESC').fetchone()
+            if row is None:
+                return None
+            done = self.conn.execute('SELECT COUNT(DISTINCT jobid) FROM '
+                                     'output WHERE batch=? AND jobid NOT IN '
+                                     '(SELECT jobid FROM output WHERE '
+                                     'batch=? AND status!=?)',
+                                     (row[0], row[0], 'done')
+                                     ).fetchone()[0]
+        return {'id': row[0],
+                'topic': row[1],
+                'args': json.loads(row[2]),
+                'durations': json.loads(row[3]),
+                'timeseq': row[4],
+                'created': row[5],
+                'done': done,
+                }
+    # ------------------------------------------------------------------#
+
+    def close(self):
+        """
+        Closes the database
+        """
+        with self.lock:
+            self.conn.close()
+
+
+def get_journal(dbpath):
+    """
+    Returns the JobJournal instance of `dbpath`, the same
+    instance is shared by all the callers.
+    Raises `sqlite3.Error` if the database can't be opened.
+    """
+    if dbpath not in JOURNALS:
+        JOURNALS[dbpath] = JobJournal(dbpath)
+    return JOURNALS[dbpath]
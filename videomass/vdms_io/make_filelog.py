@@ -27,20 +27,183 @@ This file is part of Videomass.
 
 import time
 import os
+import queue
+from threading import Thread, Lock, Event
+
+
+class LogWriter(Thread):
+    """
+    Background writer of a log file. The file is kept open
+    and the text given to `write` is queued and written by this
+    thread in batches; the file is flushed every `INTERVAL`
+    seconds, on `flush` (e.g. at the end of a job) and on
+    `close`. When the file exceeds `MAXSIZE` bytes it is rotated
+    as `logfile.1`, `logfile.2`, ... up to `BACKUPS` files.
+
+    Usage:
+        >>> writer = get_logwriter('/path/to/logdir/log.log')
+        >>> writer.write('some text\n')
+        >>> writer.flush()
+    """
+    INTERVAL = 1.0  # flush interval in seconds
+    QUEUE_SIZE = 4096  # max number of queued writes
+    MAXSIZE = 8 * 1024 * 1024  # max size of the log file in bytes
+    BACKUPS = 3  # number of the rotated files to keep
+
+    def __init__(self, logfile, maxsize=MAXSIZE, backups=BACKUPS):
+        """
+        logfile: pathname of the log file
+        maxsize: max size in bytes before rotation, 0 to disable
+        backups: number of the rotated files to keep
+        """
+        Thread.__init__(self, daemon=True)
+        self.logfile = logfile
+        self.maxsize = maxsize
+        self.backups = backups
+        self.queue = queue.Queue(maxsize=LogWriter.QUEUE_SIZE)
+        self.file = None
+        self.start()
+
+    def write(self, text):
+        """
+        Queues `text` to be appended to the log file, blocks
+        only if the queue is full.
+        """
+        self.queue.put(text)
+
+    def flush(self, wait=True):
+        """
+        Writes all queued text to disk. If `wait` is True
+        returns when it is done.
+        """
+        done = Event()
+        self.queue.put(done)
+        if wait:
+            done.wait()
+
+    def close(self):
+        """
+        Writes all queued text, closes the file and ends the thread
+        """
+        self.queue.put(None)
+        self.join()
+
+    def rotate(self):
+        """
+        Renames the log file as `logfile.1` shifting the older ones
+        """
+        self.file.close()
+        self.file = None
+        for num in range(self.backups - 1, 0, -1):
+            src = f'{self.logfile}.{num}'
+            if os.path.exists(src):
+                os.replace(src, f'{self.logfile}.{num + 1}')
+        if self.backups:
+            os.replace(self.logfile, f'{self.logfile}.1')
+        else:
+            os.remove(self.logfile)
+        self.file = open(self.logfile, "a", encoding='utf8')
+
+    def append(self, text):
+        """
+        Appends `text` to the log file, rotating it if needed
+        """
+        try:
+            if self.file is None:
+                self.file = open(self.logfile, "a", encoding='utf8')
+            self.file.write(text)
+            if self.maxsize and self.file.tell() > self.maxsize:
+                self.rotate()
+        except OSError:
+            self.file = None  # try to reopen on next write
+
+    def sync(self):
+        """
+        Flushes the file buffer to disk
+        """
+        if self.file:
+            try:
+                self.file.flush()
+            except OSError:
+                self.file = None
+
+    def run(self):
+        """
+        Writes the queued text in batches until `close`
+        """
+        closing = False
+        while not closing:
+            try:
+                items = [self.queue.get(timeout=LogWriter.INTERVAL)]
+            except queue.Empty:
+                self.sync()
+                continue
+            try:
+                while True:  # drain what is already queued
+                    items.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            text = ''.join(x for x in items if isinstance(x, str))
+            if text:
+                self.append(text)
+            requests = [x for x in items if isinstance(x, Event)]
+            closing = None in items
+            if requests or closing:
+                self.sync()
+            for done in requests:
+                done.set()
+
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+LOGWRITERS = {}  # shared LogWriter objects by pathname
+LOCK = Lock()
+
+
+def get_logwriter(logfile):
+    """
+    Returns the LogWriter of `logfile`, which is
+    created at first use.
+    """
+    logfile = os.path.abspath(logfile)
+    with LOCK:
+        if logfile not in LOGWRITERS:
+            LOGWRITERS[logfile] = LogWriter(logfile)
+        return LOGWRITERS[logfile]
+
+
+def close_logwriter(logfile=None):
+    """
+    Closes the LogWriter of `logfile` if any, or all
+    of them if `logfile` is None.
+    """
+    with LOCK:
+        if logfile is None:
+            writers = list(LOGWRITERS.values())
+            LOGWRITERS.clear()
+        else:
+            writer = LOGWRITERS.pop(os.path.abspath(logfile), None)
+            writers = [writer] if writer else []
+    for writer in writers:
+        writer.close()
 
 
 def logwrite(cmd, stderr, logfile):
     """
     This function writes status messages
     to a given `logfile` during a process.
+    The text is written by the LogWriter
+    of the file (see `get_logwriter`).
     """
     if stderr:
         apnd = f"...{stderr}\n\n"
     else:
         apnd = f"{cmd}\n\n"
 
-    with open(logfile, "a", encoding='utf8') as log:
-        log.write(apnd)
+    get_logwriter(logfile).write(apnd)
 
 
 def make_log_template(logname, logdir, mode="a"):
@@ -56,6 +219,7 @@ def make_log_template(logname, logdir, mode="a"):
     """
     current_date = time.strftime("%c")  # date/time
     logfile = os.path.join(logdir, logname)
+    close_logwriter(logfile)  # write any queued text first
 
     with open(logfile, mode, encoding='utf8') as log:
         log.write(f"""
@@ -0,0 +1,251 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: media_items.py
+Porpose: Compact records of the imported media files
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of Videomass.
+
+   Videomass is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   Videomass is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+from videomass.vdms_utils.utils import get_milliseconds
+
+
+class MediaItem:
+    """
+    Compact record of an imported media file holding only
+    the fields used by the app, parsed once from the ffprobe
+    data of the file list (see `ffprobe` profile 'import').
+    The full ffprobe data is loaded on demand by the optional
+    `loader` callable and kept in `probe`.
+
+    Attributes:
+        path: full pathname of the file
+        outputname: output file basename (without extension)
+        time: duration as string 'HH:MM:SS.xxx'
+        duration: duration in milliseconds (int)
+        size: file size as given by ffprobe
+        streams: tuple of the streams (dict) of the file
+    """
+    __slots__ = ('path', 'outputname', 'time', 'duration', 'size',
+                 'streams', '_loader', '_probe')
+
+    def __init__(self, path, outputname, time=None, size='',
+                 streams=(), loader=None):
+        """
+        time: duration as string, None if not available
+        loader: a callable accepting `path` and returning the full
+                ffprobe data (dict) or None on error.
+        """
+        self.path = path
+        self.outputname = outputname
+        if time:
+            self.time = time
+            self.duration = get_milliseconds(time)
+        else:
+            self.time = '00:00:00.000'
+            self.duration = 0
+        self.size = size
+        self.streams = tuple(streams)
+        self._loader = loader
+        self._probe = None
+
+    @classmethod
+    def from_probe(cls, path, probe, outputname, loader=None):
+        """
+        Returns a new MediaItem from the ffprobe data (dict)
+        of `path`.
+        """
+        fmt = probe.get('format', {})
+        return cls(path,
+                   outputname,
+                   time=fmt.get('duration'),
+                   size=fmt.get('size', ''),
+                   streams=probe.get('streams', ()),
+                   loader=loader,
+                   )
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.path!r})'
+
+    def _first(self, key, default=None):
+        """
+        Returns `key` value of the first stream
+        """
+        return self.streams[0].get(key, default) if self.streams else default
+
+    @property
+    def codec_type(self):
+        """codec type of the first stream, e.g. 'video'"""
+        return self._first('codec_type', '')
+
+    @property
+    def codec_name(self):
+        """codec name of the first stream"""
+        return self._first('codec_name', '')
+
+    @property
+    def width(self):
+        """frame width of the first stream, None if missing"""
+        return self._first('width')
+
+    @property
+    def height(self):
+        """frame height of the first stream, None if missing"""
+        return self._first('height')
+
+    @property
+    def probe(self):
+        """
+        The full ffprobe data (dict) of the file loaded by the
+        `loader` at first access, None if it is not available.
+        """
+        if self._probe is None and self._loader:
+            self._probe = self._loader(self.path)
+        return self._probe
+
+    def summary(self):
+        """
+        Returns the data of the item with the same layout
+        of the ffprobe data.
+        """
+        return {'format': {'filename': self.path,
+                           'duration': self.time,
+                           'size': self.size},
+                'streams': list(self.streams)}
+
+
+class MediaList:
+    """
+    Ordered collection of MediaItem objects indexed by
+    pathname. Items can be accessed by position or pathname;
+    membership tests, lookups and removals by pathname are
+    O(1). This replaces the parallel lists of file names,
+    durations and output names kept in sync by index.
+
+    Usage:
+        >>> media = MediaList()
+        >>> media.append(MediaItem('/tmp/a.mkv', 'a'))
+        >>> '/tmp/a.mkv' in media
+        True
+        >>> media[0].outputname
+        'a'
+    """
+
+    def __init__(self):
+        """
+        self.items: dict of MediaItem by pathname
+        self.order: cached list of pathnames, None if outdated
+        self.positions: cached positions by pathname, None if outdated
+        """
+        self.items = {}
+        self.order = None
+        self.positions = None
+
+    def _changed(self):
+        """
+        Invalidates the cached order on any change
+        """
+        self.order = None
+        self.positions = None
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(list(self.items.values()))
+
+    def __contains__(self, path):
+        return path in self.items
+
+    def __getitem__(self, key):
+        """
+        Returns the item at position `key` if it is int,
+        the item with pathname `key` otherwise.
+        """
+        if isinstance(key, int):
+            return self.items[self._order()[key]]
+        return self.items[key]
+
+    def append(self, item):
+        """
+        Appends a MediaItem, raises ValueError if the
+        same pathname is already in the collection.
+        """
+        if item.path in self.items:
+            raise ValueError(f'Duplicate item: "{item.path}"')
+        self.items[item.path] = item
+        self._changed()
+
+    def remove(self, *keys):
+        """
+        Removes the items at the positions or with the pathnames
+        `keys`, the positions are those before the removal. The
+        cached order is rebuilt once for all the `keys`, so that
+        removing a selection of rows costs O(n + k).
+        """
+        paths = [self[key].path for key in keys]
+        for path in paths:
+            del self.items[path]
+        self._changed()
+
+    def clear(self):
+        """
+        Removes all items
+        """
+        self.items.clear()
+        self._changed()
+
+    def index(self, path):
+        """
+        Returns the position of `path`, raises ValueError
+        if it is not in the collection.
+        """
+        if self.positions is None:
+            self.positions = {x: n for n, x in enumerate(self._order())}
+        try:
+            return self.positions[path]
+        except KeyError as err:
+            raise ValueError(f'"{path}" is not in list') from err
+
+    def _order(self):
+        """
+        Returns the cached list of pathnames
+        """
+        if self.order is None:
+            self.order = list(self.items)
+        return self.order
+
+    def paths(self):
+        """
+        Returns the list of pathnames in order
+        """
+        return list(self.items)
+
+    def durations(self):
+        """
+        Returns the list of durations in milliseconds
+        """
+        return [x.duration for x in self.items.values()]
+
+    def outputnames(self):
+        """
+        Returns the list of output names
+        """
+        return [x.outputname for x in self.items.values()]
@@ -0,0 +1,258 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: preflight.py
+Porpose: Estimates the size of the outputs before starting a batch
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of Videomass.
+
+   Videomass is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   Videomass is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import re
+import shutil
+from videomass.vdms_threads.ffmpeg_runner import split_args
+from videomass.vdms_threads.ffprobe import parse_value
+from videomass.vdms_utils.utils import get_milliseconds
+
+# bytes per pixel of each frame of the HAP formats (DXT1, DXT5,
+# scaled YCoCg DXT5), the optional snappy compression only reduces it
+HAP_BYTES_PER_PIXEL = {'hap': 0.5, 'hap_alpha': 1.0, 'hap_q': 1.0}
+# bits per pixel of each frame of the ProRes profiles (prores_ks -profile:v)
+PRORES_BITS_PER_PIXEL = {'0': 0.8, 'proxy': 0.8,
+                         '1': 1.7, 'lt': 1.7,
+                         '2': 2.4, 'standard': 2.4,
+                         '3': 3.6, 'hq': 3.6,
+                         '4': 5.4, '4444': 5.4,
+                         '5': 8.1, '4444xq': 8.1,
+                         }
+AUDIO_BITRATE = 192000  # assumed bits/s of the compressed audio
+MARGIN = 1.05  # container overhead
+
+
+def parse_bitrate(text):
+    """
+    Parses a bitrate option value such as '500k' or '20M'
+    and returns the bits per second (float), None if invalid.
+    """
+    match = re.fullmatch(r'([0-9.]+)([kKmMgG]?)', text.strip())
+    if not match:
+        return None
+    scale = {'': 1, 'k': 1e3, 'm': 1e6, 'g': 1e9}[match.group(2).lower()]
+    return float(match.group(1)) * scale
+
+
+def parse_rate(text):
+    """
+    Parses a frame rate such as '30000/1001' or '25' and
+    returns the frames per second (float), None if invalid.
+    """
+    try:
+        num, den = (str(text).split('/') + ['1'])[:2]
+        return float(num) / float(den)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def option(args, *names):
+    """
+    Returns the value of the last of the `names` options
+    found in the `args` list, None if not found.
+    """
+    value = None
+    for idx, arg in enumerate(args[:-1]):
+        if arg in names:
+            value = args[idx + 1]
+    return value
+
+
+def estimate_pass(args, streams, duration, size=0):
+    """
+    Estimates the size in bytes of the output written by the
+    ffmpeg `args` (string of a preset pass) from a source
+    file with the given `streams` (ffprobe data, also with
+    the `-pretty` units), `duration` (milliseconds) and `size`
+    (bytes).
+
+    HAP has a near-constant size per pixel of each frame,
+    ProRes per profile; other codecs are estimated from
+    their bitrate options, stream copy and codecs without
+    a bitrate as large as the source. Returns 0 for the
+    outputs discarded, e.g. analysis passes (-f null).
+    """
+    try:
+        args = split_args(args)
+    except ValueError:  # unbalanced quotes
+        return int(size or 0)
+    if option(args, '-f') == 'null':
+        return 0
+    seconds = duration / 1000
+    video = next((s for s in streams if s.get('codec_type') == 'video'),
+                 None)
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'),
+                 None)
+    vcodec = option(args, '-c:v', '-vcodec', '-codec:v')
+    acodec = option(args, '-c:a', '-acodec', '-codec:a')
+    copy = option(args, '-c', '-codec')
+    vcodec, acodec = vcodec or copy, acodec or copy
+    if 'copy' in (vcodec, acodec) or not seconds:
+        return int(size or 0)
+
+    total = 0.0
+    if video and '-vn' not in args:
+        width, height = video.get('width') or 0, video.get('height') or 0
+        scale = (re.search(r'scale=(?:w=)?(\d+)[:x](?:h=)?(\d+)',
+                           ' '.join(args))
+                 or re.fullmatch(r'(\d+)x(\d+)', option(args, '-s') or ''))
+        if scale:
+            width, height = int(scale.group(1)), int(scale.group(2))
+        fps = (parse_rate(option(args, '-r') or '')
+               or parse_rate(video.get('avg_frame_rate', '')) or 25.0)
+        pixels = width * height * fps * seconds
+        bitrate = parse_bitrate(option(args, '-b:v', '-vb') or '')
+        if vcodec == 'hap':
+            fmt = option(args, '-format') or 'hap'
+            pad = ((width + 3) // 4 * 4) * ((height + 3) // 4 * 4)
+            total += pad * fps * seconds * HAP_BYTES_PER_PIXEL.get(fmt, 1.0)
+        elif vcodec in ('prores', 'prores_ks', 'prores_aw'):
+            profile = option(args, '-profile:v', '-profile') or '2'
+            total += (pixels * PRORES_BITS_PER_PIXEL.get(profile, 3.6)
+                      / 8)
+        elif bitrate:
+            total += bitrate * seconds / 8
+        else:
+            return int(size or 0)  # quality based, no better guess
+
+    if audio and '-an' not in args:
+        bitrate = parse_bitrate(option(args, '-b:a', '-ab') or '')
+        if acodec and acodec.startswith('pcm_'):
+            bits = int(re.sub(r'\D', '', acodec) or 16)
+            rate = (parse_value(option(args, '-ar') or '')
+                    or parse_value(audio.get('sample_rate', ''))
+                    or 48000)
+            total += rate * bits / 8 * 2 * seconds  # assumes stereo
+        else:
+            total += (bitrate or AUDIO_BITRATE) * seconds / 8
+
+    return int(total * MARGIN)
+
+
+def preset_jobs(passes, outputs, items, timeseq=''):
+    """
+    Estimates the outputs of a batch run with the preset
+    `passes` (list of [args, suffix] items), `outputs` is
+    the list of output pathnames of the files, `items` the
+    list of the source media items (see `MediaItem`) and
+    `timeseq` the selected segment (the ffmpeg -ss/-t
+    options), if any. Returns a list of jobs, each one as
+    list of (output pathname, bytes) tuples.
+    """
+    # only the sizes are estimated, not the time taken by the batch
+    # (a throughput check): the encoding speed depends on the codec
+    # settings and the machine and can't be guessed from probe data
+    try:
+        length = option(split_args(timeseq), '-t')
+    except ValueError:  # unbalanced quotes
+        length = None
+    length = get_milliseconds(length) if length else None
+    jobs = []
+    for outfile, item in zip(outputs, items):
+        name, ext = os.path.splitext(outfile)
+        size = int(parse_value(item.size) or 0)  # e.g. '1.364 Mibyte'
+        duration = item.duration
+        if length is not None and duration and length < duration:
+            size = size * length // duration
+            duration = length
+        jobs.append([(f'{name}{suffix}{ext}',
+                      estimate_pass(args, item.streams, duration, size))
+                     for args, suffix in passes])
+    return jobs
+
+
+def device(path):
+    """
+    Returns the id of the filesystem where the output `path`
+    is written, None if its directory does not exist.
+    """
+    try:
+        return os.stat(os.path.dirname(os.path.abspath(path))).st_dev
+    except OSError:
+        return None
+
+
+def filesystems(needs):
+    """
+    Groups the estimated sizes of the outputs by filesystem,
+    `needs` is a list of (output pathname, bytes) tuples.
+    Returns a dict {filesystem id: [directory, bytes needed,
+    bytes free]}. The outputs in missing directories are
+    left out (see `checkup.check_inout`).
+    """
+    groups = {}
+    for path, size in needs:
+        dev = device(path)
+        if dev is None:
+            continue
+        if dev not in groups:
+            dirname = os.path.dirname(os.path.abspath(path))
+            groups[dev] = [dirname, 0, shutil.disk_usage(dirname).free]
+        groups[dev][1] += size
+    return groups
+
+
+def shortages(needs):
+    """
+    Returns a list of (directory, bytes needed, bytes free)
+    tuples of the filesystems without enough free space for
+    the outputs, see `filesystems`.
+    """
+    return [tuple(group) for group in filesystems(needs).values()
+            if group[1] > group[2]]
+
+
+def smallest_first(jobs):
+    """
+    Given a list of jobs, each one as list of (output pathname,
+    bytes) tuples, returns the list of the job indexes sorted
+    by the size of their outputs, so that as many jobs as
+    possible are completed before the disk is full.
+    """
+    return sorted(range(len(jobs)), key=lambda n: sum(x[1] for x in jobs[n]))
+
+
+def fitting_jobs(jobs):
+    """
+    Returns the list of the indexes of the `jobs` (see
+    `smallest_first`) whose outputs fit in the free space of
+    their filesystems, the smallest first.
+    """
+    free = {dev: group[2] for dev, group in
+            filesystems([need for job in jobs for need in job]).items()}
+    chosen = []
+    for idx in smallest_first(jobs):
+        needs = {}
+        for path, size in jobs[idx]:
+            dev = device(path)
+            if dev in free:
+                needs[dev] = needs.get(dev, 0) + size
+        if all(free[dev] >= size for dev, size in needs.items()):
+            for dev, size in needs.items():
+                free[dev] -= size
+            chosen.append(idx)
+    return chosen
@@ -0,0 +1,280 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: probe_cache.py
+Porpose: Persistent cache of the ffprobe data
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of Videomass.
+
+   Videomass is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   Videomass is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from videomass.vdms_threads.ffprobe import ffprobe
+from videomass.vdms_threads.ffmpeg_runner import (build_args, join_args,
+                                                  ALL_AUDIO)
+
+DBNAME = 'probe_cache.sqlite'  # database file name inside the cachedir
+CACHES = {}  # shared ProbeCache instances (see `get_cache`)
+_AUDIO_MAP = re.compile(r'-map\s+0:(?:(a)(?::(\d+))?|(\d+))\b')
+
+
+def audio_stream(args, streams=None):
+    """
+    Returns the key of the audio stream selected by the -map
+    options of the `args` string: the index (str) of `-map 0:a:N`,
+    ALL_AUDIO for all the audio streams (e.g. `-map 0:a:?`) or
+    an empty string for the default stream (no audio map).
+    The absolute maps `-map 0:N` are resolved to the index of
+    the audio stream with the ffprobe `streams` (list of dict)
+    of the input file; None is returned if they can't.
+    """
+    absolute = []
+    for match in _AUDIO_MAP.finditer(args or ''):
+        audio, index, number = match.groups()
+        if audio:
+            return index or ALL_AUDIO
+        absolute.append(int(number))
+    if not absolute:
+        return ''
+    if streams is None:
+        return None
+    kinds = [stream.get('codec_type') for stream in streams]
+    for number in absolute:
+        if number < len(kinds) and kinds[number] == 'audio':
+            return str(kinds[:number].count('audio'))
+    return None
+
+
+def measure_variant(kind, timeseq='', stream=''):
+    """
+    Returns the variant key of the loudness measurements of
+    the given `kind` (VOLUMEDETECT or LOUDNORM, see
+    `ffmpeg_output`, or `loudness_meter.METER`) taken on the
+    `timeseq` segment (the ffmpeg -ss/-t options) of the audio
+    `stream` key (see `audio_stream`).
+    """
+    return (f'measure:{kind} stream={stream} '
+            f'time={join_args(build_args(timeseq))}')
+
+
+class ProbeCache:
+    """
+    Persistent cache of the ffprobe data stored as SQLite
+    database. Each record is keyed on the absolute pathname,
+    the size and the modification time of the media file,
+    plus the ffprobe options used (`variant`), so a record
+    is never returned for a file that has been changed.
+
+    The total size of the stored data is bounded to `maxsize`
+    bytes: when exceeded, the least recently used records are
+    deleted down to LOW_WATER of `maxsize`, so that the next
+    inserts do not evict again. The total is kept up to date on
+    each insert, instead of summing all the records every time.
+
+    The same instance can be shared between threads.
+
+    The loudness measurements (volumedetect and loudnorm first
+    pass) are stored as well (see `measurement`), so that the
+    PEAK, RMS and EBU R128 normalizations of the same files do
+    not decode the audio again.
+
+    Usage:
+        >>> cache = ProbeCache('/path/to/probe_cache.sqlite')
+        >>> data = cache.get(filename, 'variant')
+        >>> if data is None:
+        >>>     data = ...  # ffprobe data
+        >>>     cache.put(filename, 'variant', data)
+    """
+    MAXSIZE = 64 * 1024 * 1024  # default max bytes of data stored
+    LOW_WATER = 0.9  # fraction of `maxsize` kept on eviction
+
+    def __init__(self, dbpath, maxsize=MAXSIZE):
+        """
+        dbpath: pathname of the database file
+        maxsize: max bytes of the stored data
+        """
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(dbpath, check_same_thread=False)
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS probe ('
+                              'path TEXT NOT NULL, '
+                              'variant TEXT NOT NULL, '
+                              'size INTEGER NOT NULL, '
+                              'mtime INTEGER NOT NULL, '
+                              'atime REAL NOT NULL, '
+                              'data TEXT NOT NULL, '
+                              'PRIMARY KEY (path, variant))'
+                              )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS probe_atime '
+                              'ON probe (atime)')
+        self.total = self.conn.execute('SELECT TOTAL(LENGTH(data)) '
+                                       'FROM probe').fetchone()[0]
+    # ------------------------------------------------------------------#
+
+    @staticmethod
+    def filekey(filename):
+        """
+        Returns a tuple (abspath, size, mtime) of the given
+        filename, None if the file does not exist.
+        """
+        path = os.path.abspath(filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return path, stat.st_size, stat.st_mtime_ns
+    # ------------------------------------------------------------------#
+
+    def get(self, filename, variant=''):
+        """
+        Returns the stored data of `filename` (dict object),
+        None if not found or if the file has been modified.
+        """
+        key = ProbeCache.filekey(filename)
+        if key is None:
+            return None
+
+        with self.lock:
+            row = self.conn.execute('SELECT data FROM probe WHERE path=? '
+                                    'AND variant=? AND size=? AND mtime=?',
+                                    (key[0], variant, key[1], key[2])
+                                    ).fetchone()
+            if row is None:
+                return None
+            with self.conn:
+                self.conn.execute('UPDATE probe SET atime=? WHERE path=? '
+                                  'AND variant=?',
+                                  (time.time(), key[0], variant))
+        return json.loads(row[0])
+    # ------------------------------------------------------------------#
+
+    def put(self, filename, variant, data):
+        """
+        Stores the `data` (dict object) of `filename`,
+        replacing any older record.
+        """
+        key = ProbeCache.filekey(filename)
+        if key is None:
+            return
+
+        text = json.dumps(data)
+        with self.lock, self.conn:
+            old = self.conn.execute('SELECT LENGTH(data) FROM probe '
+                                    'WHERE path=? AND variant=?',
+                                    (key[0], variant)).fetchone()
+            self.conn.execute('INSERT OR REPLACE INTO probe VALUES '
+                              '(?, ?, ?, ?, ?, ?)',
+                              (key[0], variant, key[1], key[2],
+                               time.time(), text)
+                              )
+            self.total += len(text) - (old[0] if old else 0)
+            if self.total > self.maxsize:
+                self.evict()
+    # ------------------------------------------------------------------#
+
+    def evict(self):
+        """
+        Deletes the least recently used records until the
+        stored data fits in LOW_WATER of `maxsize` bytes. Must
+        be called holding the lock.
+        """
+        target = self.maxsize * ProbeCache.LOW_WATER
+        while self.total > target:
+            rows = self.conn.execute('SELECT path, variant, LENGTH(data) '
+                                     'FROM probe ORDER BY atime LIMIT 64'
+                                     ).fetchall()
+            if not rows:
+                self.total = 0
+                break
+            for path, variant, length in rows:
+                if self.total <= target:
+                    break
+                self.conn.execute('DELETE FROM probe WHERE path=? '
+                                  'AND variant=?', (path, variant))
+                self.total -= length
+    # ------------------------------------------------------------------#
+
+    def clear(self):
+        """
+        Deletes all the records
+        """
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM probe')
+            self.total = 0
+        with self.lock:
+            self.conn.execute('VACUUM')
+    # ------------------------------------------------------------------#
+
+    def close(self):
+        """
+        Closes the database
+        """
+        with self.lock:
+            self.conn.close()
+    # ------------------------------------------------------------------#
+
+    def measurement(self, filename, kind, timeseq='', stream=''):
+        """
+        Returns the stored loudness measurements (dict object)
+        of `filename`, None if not found. See `measure_variant`
+        for the arguments.
+        """
+        return self.get(filename, measure_variant(kind, timeseq, stream))
+    # ------------------------------------------------------------------#
+
+    def put_measurement(self, filename, kind, timeseq, stream, data):
+        """
+        Stores the loudness measurements `data` (dict object)
+        of `filename`, see `measure_variant`.
+        """
+        self.put(filename, measure_variant(kind, timeseq, stream), data)
+    # ------------------------------------------------------------------#
+
+    def ffprobe(self, filename, cmd='ffprobe', **kwargs):
+        """
+        Like `ffprobe.ffprobe` but returns the stored data if
+        any, without running ffprobe. The results are stored
+        on success only.
+        """
+        variant = ' '.join(f'{k}={v}' for k, v in sorted(kwargs.items()))
+        data = self.get(filename, variant)
+        if data is not None:
+            return data, None
+
+        data, error = ffprobe(filename, cmd=cmd, **kwargs)
+        if not error:
+            self.put(filename, variant, data)
+        return data, error
+
+
+def get_cache(dbpath):
+    """
+    Returns the ProbeCache instance of `dbpath`, the same
+    instance is shared by all the callers.
+    Raises `sqlite3.Error` if the database can't be opened.
+    """
+    if dbpath not in CACHES:
+        CACHES[dbpath] = ProbeCache(dbpath)
+    return CACHES[dbpath]
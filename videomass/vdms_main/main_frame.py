@@ -26,7 +26,10 @@ This file is part of Videomass.
 """
 import os
 import sys
+import time
+import sqlite3
 import webbrowser
+from functools import partial
 import wx
 from pubsub import pub
 from videomass.vdms_utils.get_bmpfromsvg import get_bmp
@@ -52,6 +55,10 @@ from videomass.vdms_panels import sequence_to_video
 from videomass.vdms_panels.long_processing_task import LogOut
 from videomass.vdms_panels import presets_manager
 from videomass.vdms_io import io_tools
+from videomass.vdms_io.media_items import MediaList
+from videomass.vdms_io.job_journal import JOURNAL, get_journal
+from videomass.vdms_threads.trash_mover import TrashMover
+from videomass.vdms_threads.ffprobe import format_size
 from videomass.vdms_sys.msg_info import current_release
 from videomass.vdms_sys.settings_manager import ConfigManager
 from videomass.vdms_sys.argparser import info_this_platform
@@ -87,20 +94,18 @@ class MainFrame(wx.Frame):
         self.appdata = get.appset
         self.icons = get.iconset
         # -------------------------------#
-        self.data_files = []  # list of items in list control
+        self.data_files = MediaList()  # items in list control
         self.outputpath = self.appdata['outputfile']  # path destination
-        self.outputnames = []  # output file basenames (even renames)
-        self.file_src = []  # input full file names list
         self.same_destin = self.appdata['outputfile_samedir']  # True/False
         self.suffix = self.appdata['filesuffix']  # suffix to output names
         self.filedropselected = None  # int(index) or None filedrop selected
         self.time_seq = ""  # FFmpeg time seq.
-        self.duration = []  # empty if not file imported
         self.topicname = None  # shown panel name
         self.checktimestamp = True  # show timestamp during playback
         self.autoexit = False  # set autoexit during ffplay playback
         self.movetotrash = self.appdata['move_file_to_trash']
         self.emptylist = self.appdata['move_file_to_trash']
+        self.trash_mover = None  # see `trash_mover` below
         self.mediastreams = False
         self.showlogs = False
         self.helptopic = False
@@ -137,10 +142,7 @@ class MainFrame(wx.Frame):
                                                  )
         self.fileDnDTarget = filedrop.FileDnD(self,
                                               self.outputpath,
-                                              self.outputnames,
                                               self.data_files,
-                                              self.file_src,
-                                              self.duration,
                                               )
         self.ProcessPanel = LogOut(self)
         self.PrstsPanel = presets_manager.PrstPan(self,
@@ -203,14 +205,32 @@ class MainFrame(wx.Frame):
 
         pub.subscribe(self.check_modeless_window, "DESTROY_ORPHANED_WINDOWS")
         pub.subscribe(self.process_terminated, "PROCESS TERMINATED")
+        pub.subscribe(self.trash_progress, "TRASH_EVT")
         
         # EDIT: Set starting Panel to Presets Panel
         self.topicname = 'Presets Manager'
         self.switch_file_import(self)
+        wx.CallAfter(self.clean_temp_outputs)
+        wx.CallAfter(self.resume_batch)
         
 
 
 
+    @property
+    def file_src(self):
+        """input full file names list"""
+        return self.data_files.paths()
+
+    @property
+    def outputnames(self):
+        """output file basenames list (even renames)"""
+        return self.data_files.outputnames()
+
+    @property
+    def duration(self):
+        """durations list in milliseconds, empty if no file imported"""
+        return self.data_files.durations()
+
     # -------------------Status bar settings--------------------#
 
     def statusbar_msg(self, msg, bcolor, fcolor=None):
@@ -356,6 +376,16 @@ class MainFrame(wx.Frame):
                               _('Videomass'), wx.ICON_WARNING, self)
                 return
 
+        if self.trash_mover and self.trash_mover.pending():
+            if wx.MessageBox(_('Some files are still being moved to the '
+                               'trash folder, they will be left in place '
+                               'if you exit now.\n\nDo you want to exit '
+                               'anyway?'), _('Videomass'),
+                             wx.ICON_QUESTION | wx.YES_NO, self) != wx.YES:
+                return
+            self.trash_mover.stop()
+            self.trash_mover.join(timeout=5)
+
         if self.appdata['warnexiting']:
             if wx.MessageBox(_('Are you sure you want to exit '
                                'the application?'),
@@ -701,9 +731,7 @@ class MainFrame(wx.Frame):
 
             self.switch_file_import(self)
             paths = filedlg.GetPaths()
-            for path in paths:
-                self.fileDnDTarget.flCtrl.dropUpdate(path)
-            self.fileDnDTarget.flCtrl.rejected_files()
+            self.fileDnDTarget.flCtrl.add_files(paths)
     # -------------------------------------------------------------------#
 
     def openMyconversions(self, event):
@@ -1553,13 +1581,23 @@ class MainFrame(wx.Frame):
         self.Layout()
     # ------------------------------------------------------------------#
 
-    def switch_to_processing(self, *args):
+    def switch_to_processing(self, *args, resume=None, durations=None):
         """
         This method is called by start methods of any
         topic. It call `ProcessPanel.topic_thread`
         method assigning the corresponding thread.
-        """
-        if args[0] == 'Viewing last log':
+        `resume` is the unfinished batch to resume, see
+        `resume_batch`. `durations` are the durations of the
+        files to process when they are not those of the file
+        list (e.g. reordered files).
+        """
+        if durations is None:
+            durations = self.duration
+        if args[0] == 'onepass' and not resume and not self.replace_batch():
+            return
+        if resume:
+            dur, seq = resume['durations'], resume['timeseq']
+        elif args[0] == 'Viewing last log':
             self.statusbar_msg(_('Viewing last log'), None)
             dur, seq = self.duration, self.time_seq
         elif args[0] in ('concat_demuxer', 'sequence_to_video'):
@@ -1567,10 +1605,10 @@ class MainFrame(wx.Frame):
         elif self.time_seq:
             ms = get_milliseconds(self.time_seq.split()[3])  # -t duration
             seq = self.time_seq
-            dur = [ms for n in self.duration]
+            dur = [ms for n in durations]
             self.statusbar_msg(_('Processing...'), None)
         else:
-            dur, seq = self.duration, ''
+            dur, seq = durations, ''
 
         self.SetTitle(_('Videomass - FFmpeg message monitor'))
         self.fileDnDTarget.Hide()
@@ -1590,7 +1628,8 @@ class MainFrame(wx.Frame):
         # self.goto_logpan.Enable(False) # EDIT: Remove Goto Menu.
         [self.toolbar.EnableTool(x, False) for x in (4, 7, 9)]
 
-        self.ProcessPanel.topic_thread(self.topicname, dur, seq, *args)
+        self.ProcessPanel.topic_thread(self.topicname, dur, seq, *args,
+                                       resume=resume)
         self.Layout()
     # ------------------------------------------------------------------#
 
@@ -1616,6 +1655,117 @@ class MainFrame(wx.Frame):
             self.toSlideshow.on_start()
     # ------------------------------------------------------------------#
 
+    def move_to_trash(self):
+        """
+        Returns the `TrashMover` thread moving the processed
+        files to the trash folder in background, creating it
+        on first use. Large moves to another filesystem wait
+        until no process is running.
+        """
+        if self.trash_mover is None:
+            self.trash_mover = TrashMover(
+                idle=lambda: self.ProcessPanel.thread_type is None,
+                post=partial(wx.CallAfter, pub.sendMessage))
+        return self.trash_mover
+    # ------------------------------------------------------------------#
+
+    def trash_progress(self, name, copied, size, pending, end, error=None):
+        """
+        Reports the progress of the files moved to the trash
+        folder in background. This method is called using
+        pub/sub protocol (see `TrashMover`).
+        """
+        if end == 'error':
+            wx.MessageBox(_('Unable to move "{0}" to the trash '
+                            'folder:\n{1}').format(name, error),
+                          'Videomass', wx.ICON_ERROR, self)
+            return
+        if self.ProcessPanel.thread_type is not None:
+            return  # the status bar belongs to the running process
+        if end == 'Done' and not pending:
+            self.statusbar_msg(_('...Files moved to the trash folder'), None)
+        elif not end:
+            self.statusbar_msg(_('Moving to trash: {0} ({1} of {2}), '
+                                 '{3} files left').format(
+                                     os.path.basename(name),
+                                     format_size(copied), format_size(size),
+                                     pending), None)
+    # ------------------------------------------------------------------#
+
+    def clean_temp_outputs(self):
+        """
+        Called at startup, deletes the temporary output files
+        left by ffmpeg processes which were running when the
+        application crashed (see `JobJournal.clean_temps`) and
+        the stamps of the outputs deleted since.
+        """
+        try:
+            journal = get_journal(os.path.join(self.appdata['cachedir'],
+                                               JOURNAL))
+            removed = journal.clean_temps()
+            journal.prune_stamps()
+        except sqlite3.Error:
+            return
+        if removed:
+            self.statusbar_msg(_('Deleted {0} incomplete output files '
+                                 'of the previous session').format(
+                                     len(removed)), None)
+    # ------------------------------------------------------------------#
+
+    def resume_batch(self):
+        """
+        Called at startup, offers to resume the batch of files
+        left unfinished by a crash or by the user, processing
+        only the files not yet done (see `JobJournal`).
+        """
+        try:
+            journal = get_journal(os.path.join(self.appdata['cachedir'],
+                                               JOURNAL))
+            batch = journal.unfinished()
+        except sqlite3.Error:
+            return
+        if not batch or batch['topic'] != 'onepass':
+            return
+
+        started = time.strftime('%c', time.localtime(batch['created']))
+        msg = (_('A batch of {0} files started on {1} was not completed, '
+                 '{2} of them are done.\n\nDo you want to resume it? '
+                 'Only the unfinished files will be processed, "No" '
+                 'discards the batch.').format(len(batch['args'][1]),
+                                               started, batch['done']))
+        answer = wx.MessageBox(msg, _('Videomass - Resume'),
+                               wx.ICON_QUESTION | wx.CANCEL | wx.YES_NO,
+                               self)
+        if answer == wx.YES:
+            self.switch_to_processing(*batch['args'], resume=batch)
+        elif answer == wx.NO:
+            journal.finish(batch['id'])
+    # ------------------------------------------------------------------#
+
+    def replace_batch(self):
+        """
+        Asks whether to discard the unfinished batch which was
+        not resumed (see `resume_batch`), since a new batch
+        replaces it on the job journal. Returns True to go on.
+        """
+        try:
+            batch = get_journal(os.path.join(self.appdata['cachedir'],
+                                             JOURNAL)).unfinished()
+        except sqlite3.Error:
+            return True
+        if not batch or batch['topic'] != 'onepass':
+            return True
+
+        started = time.strftime('%c', time.localtime(batch['created']))
+        msg = _('The batch of {0} files started on {1} is not completed, '
+                '{2} of them are done.\n\nIf you go on it will be '
+                'discarded and can no longer be resumed. Do you want '
+                'to continue?')
+        msg = msg.format(len(batch['args'][1]), started, batch['done'])
+        return wx.MessageBox(msg, _('Videomass - Resume'),
+                             wx.ICON_WARNING | wx.YES_NO, self) == wx.YES
+    # ------------------------------------------------------------------#
+
     def click_stop(self, event):
         """
         Click stop toolbar event, set to abort True the current process
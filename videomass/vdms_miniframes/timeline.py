@@ -167,14 +167,12 @@ class Float_TL(wx.MiniFrame):
         """
         self.pix: scale pixels to milliseconds
         self.milliseconds: int(milliseconds)
-        self.duration: see parent attr.
         self.bar_w: pixel point val for END selection
         self.bar_x: pixel point val for START selection
         """
         get = wx.GetApp()
         self.appdata = get.appset
         self.parent = parent
-        self.duration = self.parent.duration
         self.overalltime = '23:59:59.999'
         self.milliseconds = 86399999  # 23:59:59:999
         self.clock_start = '00:00:00.000'  # seek position
@@ -312,10 +310,11 @@ class Float_TL(wx.MiniFrame):
         if msg is None:
             self.milliseconds = 86399999
         else:
-            if self.duration[msg] < 100:
+            duration = self.parent.data_files[msg].duration
+            if duration < 100:
                 self.milliseconds = 86399999
             else:
-                self.milliseconds = self.duration[msg]
+                self.milliseconds = duration
                 self.sourcedur = _('Source duration:')
 
         self.overalltime = milliseconds2clock(self.milliseconds)
@@ -1102,7 +1102,7 @@ class AV_Conv(wx.Panel):
             return None
 
         clicked = self.parent.filedropselected
-        return (clicked, self.parent.file_src.index(clicked))
+        return (clicked, self.parent.data_files.index(clicked))
     # ------------------------------------------------------------------#
 
     def get_audio_stream(self, fileselected):
@@ -1115,7 +1115,7 @@ class AV_Conv(wx.Panel):
         See `on_audio_preview()` method for usage.
 
         """
-        selected = self.parent.data_files[fileselected[1]].get('streams')
+        selected = self.parent.data_files[fileselected[1]].streams
         isaudio = [a for a in selected if 'audio' in a.get('codec_type')]
 
         if isaudio:
@@ -1147,13 +1147,13 @@ class AV_Conv(wx.Panel):
         if not fget:
             return None
 
-        index = self.parent.data_files[fget[1]]
+        item = self.parent.data_files[fget[1]]
 
-        if 'video' in index.get('streams')[0]['codec_type']:
-            width = int(index['streams'][0]['width'])
-            height = int(index['streams'][0]['height'])
-            filename = index['format']['filename']
-            duration = index['format'].get('time', '00:00:00.000')
+        if 'video' in item.codec_type:
+            width = int(item.width)
+            height = int(item.height)
+            filename = item.path
+            duration = item.time
             if not width or not height:
                 wx.MessageBox(_('Unsupported file:\n'
                                 'Missing decoder or library? '
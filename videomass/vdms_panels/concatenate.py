@@ -30,11 +30,12 @@ import wx.lib.agw.hyperlink as hpl
 from videomass.vdms_dialogs.widget_utils import NormalTransientPopup
 from videomass.vdms_io.checkup import check_files
 from videomass.vdms_dialogs.epilogue import Formula
+from videomass.vdms_threads.concat_demuxer import concat_list
 
 
 def compare_media_param(data):
     """
-    This function expects json data from FFprobe to checks
+    This function expects the MediaItem list of the files to checks
     that the indexed streams of each item in the list have
     the same codec, video size and audio sample rate in order
     to ensure correct file concatenation.
@@ -45,10 +46,10 @@ def compare_media_param(data):
         return _('At least two files are required to perform concatenation.')
     com = {}
 
-    for streams in data:
-        name = streams.get('format').get('filename')
+    for media in data:
+        name = media.path
         com[name] = {}
-        for items in streams.get('streams'):
+        for items in media.streams:
             if items.get('codec_type') == 'video':
                 com[name][items.get('index')] = [items.get('codec_name')]
                 size = f"{items.get('width')}x{items.get('height')}"
@@ -269,9 +270,7 @@ class Conc_Demuxer(wx.Panel):
         else:
             ext = os.path.splitext(self.parent.file_src[0])[1].split('.')[1]
             self.duration = sum(self.parent.duration)
-            for f in self.parent.file_src:
-                escaped = f.replace(r"'", r"'\''")  # need escaping some chars
-                textstr.append(f"file '{escaped}'")
+            textstr.append(concat_list(self.parent.file_src))
             self.args = (f'"{ftext}" -map 0:v? -map_chapters 0 '
                          f'-map 0:s? -map 0:a? -map_metadata 0 -c copy')
 
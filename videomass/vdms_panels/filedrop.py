@@ -27,11 +27,14 @@ This file is part of Videomass.
 from decimal import DivisionByZero
 import os
 import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 import wx
 from pubsub import pub
 from videomass.vdms_io.io_tools import stream_play
-from videomass.vdms_threads.ffprobe import ffprobe
-from videomass.vdms_utils.utils import get_milliseconds
+from videomass.vdms_threads.ffprobe import ffprobe, ffprobe_batch
+from videomass.vdms_io.probe_cache import get_cache, DBNAME
+from videomass.vdms_io.media_items import MediaItem
 from videomass.vdms_utils.utils import to_bytes
 from videomass.vdms_dialogs.renamer import Renamer
 from videomass.vdms_dialogs.list_warning import ListWarning
@@ -102,6 +105,9 @@ class MyListCtrl(wx.ListCtrl):
     This is the listControl widget.
     Note that this wideget has DnDPanel parented.
     """
+    LARGE_DROP = 64  # min number of files probed in chunks
+    CHUNK = 32  # number of files of each chunk
+
     def __init__(self, parent):
         """
         Constructor.
@@ -110,12 +116,20 @@ class MyListCtrl(wx.ListCtrl):
         """
         get = wx.GetApp()
         self.ffprobe_cmd = get.appset['ffprobe_cmd']
-        self.index = None
+        try:
+            self.probecache = get_cache(os.path.join(get.appset['cachedir'],
+                                                     DBNAME))
+        except sqlite3.Error:
+            self.probecache = None  # runs ffprobe every time
+        self.pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count()
+                                                       or 1))
+        self.pending = {}  # reorder buffer of the queued files
+        self.pending_paths = set()  # pathnames of the queued files
+        self.queued = 0  # sequence number of the next queued file
+        self.committed = 0  # sequence number of the next file to commit
+        self.batch = 0  # incremented to ignore results of canceled imports
         self.parent = parent  # parent is DnDPanel class
         self.data = self.parent.data
-        self.file_src = self.parent.file_src
-        self.duration = self.parent.duration
-        self.outputnames = self.parent.outputnames
         self.errors = {}
         wx.ListCtrl.__init__(self,
                              parent,
@@ -141,96 +155,198 @@ class MyListCtrl(wx.ListCtrl):
         self.InsertColumn(9, _('Output file name'), width=400)
     # ----------------------------------------------------------------------#
 
-    def dropUpdate(self, path, newname=None):
+    def add_files(self, paths, newnames=None):
         """
-        Update list-control during drag and drop.
-        Note that the optional 'newname' argument is given by
+        Imports the given files (list of pathnames). A placeholder
+        row is added at once for each accepted file, then the files
+        are probed concurrently by a pool of worker threads and the
+        rows are filled in as results come back, always keeping the
+        input order (see `probe_done`). Large drops are probed in
+        chunks of files (see `probe_files`). Rejected files are
+        collected in `self.errors` and shown at the end of the import.
+
+        Note that the optional 'newnames' argument is given by
         the 'on_col_click' method in the 'FileDnD' class to preserve
-        the related renames in column 5 of wx.ListCtrl.
+        the related renames in column 9 of wx.ListCtrl.
+        """
+        newnames = newnames or [None] * len(paths)
+        queued = []
+        for path, newname in zip(paths, newnames):
+            warn = fullpathname_sanitize(path)  # check for fullname sanitize
+            if warn:
+                self.errors[f'"{path}"'] = warn
+                continue
+
+            if path in self.pending_paths or path in self.data:
+                mess = _("Duplicate file, it has already been added to "
+                         "the list.")
+                self.errors[f'"{path}"'] = mess
+                continue
+
+            index = self.GetItemCount()
+            self.InsertItem(index, str(index + 1))
+            self.SetItem(index, 1, path)
+            self.SetItem(index, 2, _('Probing...'))
+            seq = self.queued
+            self.queued += 1
+            self.pending[seq] = [path, newname, None]
+            self.pending_paths.add(path)
+            queued.append(seq)
+
+        size = MyListCtrl.CHUNK if len(queued) >= MyListCtrl.LARGE_DROP else 1
+        for num in range(0, len(queued), size):
+            seqs = queued[num:num + size]
+            future = self.pool.submit(self.probe_files,
+                                      [self.pending[x][0] for x in seqs])
+            future.add_done_callback(lambda fut, seqs=seqs, batch=self.batch:
+                                     wx.CallAfter(self.probe_done,
+                                                  batch, seqs, fut))
+        if not self.pending:
+            self.import_done()
+    # ----------------------------------------------------------------------#
 
-        """
-        self.index = self.GetItemCount()
-        warn = fullpathname_sanitize(path)  # check for fullname sanitize
-        if warn:
-            self.errors[f'"{path}"'] = warn
-            return
+    def probe_done(self, batch, seqs, future):
+        """
+        Receives the probe results of the `seqs` queued files
+        on the main thread. Results are stored in a reorder buffer and the
+        rows are committed in input order only, so that
+        `self.data` always matches the list rows.
+        """
+        if batch != self.batch:
+            return  # the import was canceled
+        try:
+            results = future.result()
+        except Exception as err:  # unexpected error on worker thread
+            results = [(None, f'{err}')] * len(seqs)
+        for seq, result in zip(seqs, results):
+            self.pending[seq][2] = result
+
+        while self.pending.get(self.committed, (0, 0, None))[2]:
+            path, newname, (probe, error) = self.pending.pop(self.committed)
+            self.pending_paths.discard(path)
+            self.committed += 1
+            index = len(self.data)  # rows before are all committed
+            if error:
+                self.DeleteItem(index)
+                self.errors[f'"{path}"'] = error
+            else:
+                self.set_item(index, path, probe, newname)
 
-        if not [x for x in self.data if x['format']['filename'] == path]:
-            probe = ffprobe(path, self.ffprobe_cmd,
-                            hide_banner=None, pretty=None)
-            if probe[1]:
-                self.errors[f'"{path}"'] = probe[1]
-                return
+        if not self.pending:
+            self.import_done()
+    # ----------------------------------------------------------------------#
 
-            probe = probe[0]
-            self.InsertItem(self.index, str(self.index + 1))
-            self.SetItem(self.index, 1, path)
+    def import_done(self):
+        """
+        Called when all the queued files have been committed
+        """
+        for x in range(self.GetItemCount()):
+            self.SetItem(x, 0, str(x + 1))  # re-load counter
+        if self.data:
+            self.parent.changes_in_progress()
+        self.rejected_files()
+    # ----------------------------------------------------------------------#
 
-            if 'duration' not in probe['format'].keys():
-                self.SetItem(self.index, 2, 'N/A')
-                # NOTE these are my custom adds to probe data
-                probe['format']['time'] = '00:00:00.000'
-                probe['format']['duration'] = 0
+    def cancel_import(self):
+        """
+        Discards all the queued files not yet committed,
+        their results will be ignored.
+        """
+        self.batch += 1
+        self.pending.clear()
+        self.pending_paths.clear()
+        self.queued = self.committed = 0
+    # ----------------------------------------------------------------------#
 
-            else:
-                tdur = probe['format']['duration'].split(':')
-                sec, msec = tdur[2].split('.')[0], tdur[2].split('.')[1]
-                tdur = f'{tdur[0]}:{tdur[1]}:{sec}'
-                self.SetItem(self.index, 2, tdur)
-                probe['format']['time'] = probe.get('format').pop('duration')
-                time = get_milliseconds(probe.get('format')['time'])
-                probe['format']['duration'] = time
-
-            media = probe['streams'][0]['codec_type']
-            formatname = probe['streams'][0]['codec_name']
-            self.SetItem(self.index, 3, f'{formatname}')
-            
-            size = probe['format']['size'].split()
-            if (len(size) == 2):
-                size[0] = round(float(size[0]) * 1.04858,2)
-                size[1] = size[1].replace("ibyte","B")
-                self.SetItem(self.index, 4, f'{size[0]} {size[1]}')
-            else:
-                self.SetItem(self.index, 4, probe['format']['size'])
-            
-               # EDIT:
-            if ('width' in probe['streams'][0]):
-                width = probe['streams'][0]['width']
-                self.SetItem(self.index, 5, f'{width}')
-            if ('height' in probe['streams'][0]):
-                height = probe['streams'][0]['height']
-                self.SetItem(self.index, 6, f'{height}')
-            if ('avg_frame_rate' in probe['streams'][0]):
-                fps = probe['streams'][0]['avg_frame_rate'].split("/")
-                if (len(fps) == 2):
-                    try:
-                        fps[0] = round(float(fps[0])/float(fps[1]),2)
-                    except:
-                        fps[0] = round(float(fps[0]))
-                    self.SetItem(self.index, 7, f'{fps[0]} fps')
-                else:
-                    fps = probe['streams'][0]['avg_frame_rate']
-                    self.SetItem(self.index, 7, f'{fps} fps')
-            if ('pix_fmt' in probe['streams'][0]):
-                pixfmt = probe['streams'][0]['pix_fmt']
-                self.SetItem(self.index, 8, f'{pixfmt}')
-                
-            if newname:
-                self.SetItem(self.index, 9, newname) # EDIT:
-                self.outputnames.append(newname)
-            else:
-                fname = os.path.splitext(os.path.basename(path))[0]
-                self.SetItem(self.index, 9, fname) # EDIT:
-                self.outputnames.append(fname)
-            self.index += 1
-            self.data.append(probe)
-            self.file_src.append(path)
-            self.duration.append(probe['format']['duration'])
-            # self.parent.statusbar_msg('', None)
-            self.parent.changes_in_progress()
+    def busy(self):
+        """
+        Returns True while files are being imported
+        """
+        return bool(self.pending)
+    # ----------------------------------------------------------------------#
+
+    def set_item(self, index, path, probe, newname=None):
+        """
+        Fills the placeholder row at `index` with the ffprobe
+        data of `path` and appends a new MediaItem to the list data.
+        """
+        if not newname:
+            newname = os.path.splitext(os.path.basename(path))[0]
+        item = MediaItem.from_probe(path, probe, newname,
+                                    loader=self.full_probe)
+        if 'duration' not in probe['format'].keys():
+            self.SetItem(index, 2, 'N/A')
         else:
-            mess = _("Duplicate file, it has already been added to the list.")
-            self.errors[f'"{path}"'] = mess
+            tdur = item.time.split(':')
+            sec = tdur[2].split('.')[0]
+            tdur = f'{tdur[0]}:{tdur[1]}:{sec}'
+            self.SetItem(index, 2, tdur)
+
+        self.SetItem(index, 3, f'{item.codec_name}')
+
+        size = item.size.split()
+        if (len(size) == 2):
+            size[0] = round(float(size[0]) * 1.04858,2)
+            size[1] = size[1].replace("ibyte","B")
+            self.SetItem(index, 4, f'{size[0]} {size[1]}')
+        else:
+            self.SetItem(index, 4, item.size)
+
+        stream = item.streams[0] if item.streams else {}
+        if ('width' in stream):
+            self.SetItem(index, 5, f'{item.width}')
+        if ('height' in stream):
+            self.SetItem(index, 6, f'{item.height}')
+        if ('avg_frame_rate' in stream):
+            fps = stream['avg_frame_rate'].split("/")
+            if (len(fps) == 2):
+                try:
+                    fps[0] = round(float(fps[0])/float(fps[1]),2)
+                except:
+                    fps[0] = round(float(fps[0]))
+                self.SetItem(index, 7, f'{fps[0]} fps')
+            else:
+                fps = stream['avg_frame_rate']
+                self.SetItem(index, 7, f'{fps} fps')
+        if ('pix_fmt' in stream):
+            pixfmt = stream['pix_fmt']
+            self.SetItem(index, 8, f'{pixfmt}')
+
+        self.SetItem(index, 9, newname) # EDIT:
+        self.data.append(item)
+    # ----------------------------------------------------------------------#
+
+    def probe_files(self, paths):
+        """
+        Returns the list of the ffprobe data of `paths` as
+        (data, error) tuples, this runs on a worker thread.
+        Still images are read in-process (see `ffprobe_batch`).
+        """
+        return ffprobe_batch(paths, self.ffprobe_cmd, workers=1,
+                             probe=self.probe, profile='import',
+                             hide_banner=None, pretty=None)
+    # ----------------------------------------------------------------------#
+
+    def probe(self, path, cmd, **kwargs):
+        """
+        Returns the ffprobe data of `path` as (data, error),
+        from the persistent probe cache if possible.
+        """
+        if self.probecache:
+            try:
+                return self.probecache.ffprobe(path, cmd, **kwargs)
+            except sqlite3.Error:
+                self.probecache = None
+        return ffprobe(path, cmd, **kwargs)
+    # ----------------------------------------------------------------------#
+
+    def full_probe(self, path):
+        """
+        Returns the full ffprobe data of `path` (dict) or
+        None on error, used by MediaItem to load it lazily.
+        """
+        return self.probe(path, self.ffprobe_cmd, profile='full',
+                          hide_banner=None, pretty=None)[0]
     # ----------------------------------------------------------------------#
 
     def rejected_files(self):
@@ -268,9 +384,7 @@ class FileDrop(wx.FileDropTarget):
         When files are dropped, write where they were dropped and then
         the file paths themselves
         """
-        for filepath in filenames:
-            self.window.dropUpdate(filepath)  # update list control
-        self.window.rejected_files()  # call parent.rejected_files at end
+        self.window.add_files(filenames)  # update list control
 
         return True
     # ----------------------------------------------------------------------#
@@ -294,10 +408,7 @@ class FileDnD(wx.Panel):
         appdata = get.appset
         self.themecolor = appdata['icontheme'][1]
         self.parent = parent  # parent is the MainFrame
-        self.outputnames = args[1]
-        self.data = args[2]
-        self.file_src = args[3]
-        self.duration = args[4]
+        self.data = args[1]  # MediaList of the imported files
         self.sortingstate = None  # ascending or descending order
 
         wx.Panel.__init__(self, parent, -1)
@@ -377,7 +488,7 @@ class FileDnD(wx.Panel):
         (from ascending to descending and back to ascending).
         For this feature is required to delete all items from
         listctrl and data list before re-loading the same
-        items with the new sorted order using `dropUpdate` method.
+        items with the new sorted order using `add_files` method.
 
         if plane to use wx.EVT_LIST_COL_RIGHT_CLICK event:
             `if event.GetEventType() == wx.EVT_LIST_COL_RIGHT_CLICK.typeId:`
@@ -386,7 +497,7 @@ class FileDnD(wx.Panel):
         """
         count = self.flCtrl.GetItemCount()
         curritems = []
-        if count > 1:
+        if count > 1 and not self.flCtrl.busy():
             if event.GetColumn() in (0, -1):
                 return
 
@@ -396,6 +507,7 @@ class FileDnD(wx.Panel):
                                   self.flCtrl.GetItemText(x, col=3),
                                   self.flCtrl.GetItemText(x, col=4),
                                   self.flCtrl.GetItemText(x, col=5),
+                                  self.flCtrl.GetItemText(x, col=9),
                                   ))
             if event.GetColumn() == 1:
                 curritems.sort(key=lambda item: item[0])
@@ -421,8 +533,8 @@ class FileDnD(wx.Panel):
             if self.sortingstate == 'descending':
                 curritems.reverse()
 
-            for data in curritems:
-                self.flCtrl.dropUpdate(data[0], data[4])
+            self.flCtrl.add_files([data[0] for data in curritems],
+                                  [data[5] for data in curritems])
     # ----------------------------------------------------------------------
 
     def changes_in_progress(self, setfocus=True):
@@ -433,7 +545,7 @@ class FileDnD(wx.Panel):
         """
         self.parent.destroy_orphaned_window()
         self.parent.toolbar.EnableTool(9, True)
-        if len(self.outputnames) > 1:
+        if len(self.data) > 1:
             self.parent.rename_batch.Enable(True)
         else:
             self.parent.rename_batch.Enable(False)
@@ -467,7 +579,7 @@ class FileDnD(wx.Panel):
         """
         Delete a selected file or a bunch of selected files
         """
-        if self.flCtrl.GetFirstSelected() == -1:  # None
+        if self.flCtrl.GetFirstSelected() == -1 or self.flCtrl.busy():
             return
 
         item, indexes = -1, []
@@ -484,12 +596,9 @@ class FileDnD(wx.Panel):
             self.delete_all(self)
             return
 
+        self.data.remove(*indexes)  # remove selected items at once
         for num in sorted(indexes, reverse=True):
             self.flCtrl.DeleteItem(num)  # remove selected items
-            self.data.pop(num)  # remove selected items
-            self.outputnames.pop(num)  # remove selected items
-            self.file_src.pop(num)
-            self.duration.pop(num)
             self.flCtrl.Select(num - 1)  # select the previous one
         self.changes_in_progress(setfocus=False)  # reset timeline
         # self.on_deselect(self)  # deselect removed file
@@ -505,11 +614,9 @@ class FileDnD(wx.Panel):
         self.data list.
         """
         # self.flCtrl.ClearAll()
+        self.flCtrl.cancel_import()
         self.flCtrl.DeleteAllItems()
-        del self.data[:]
-        del self.outputnames[:]
-        del self.file_src[:]
-        del self.duration[:]
+        self.data.clear()
         if event:
             self.changes_in_progress(setfocus=False)
             self.parent.rename.Enable(False)
@@ -526,6 +633,8 @@ class FileDnD(wx.Panel):
         Selecting line with mouse or up/down keyboard buttons
         """
         index = self.flCtrl.GetFocusedItem()
+        if index >= len(self.data):
+            return  # file not imported yet
         item = self.flCtrl.GetItemText(index, 1)
         self.parent.filedropselected = item
         self.parent.rename.Enable(True)
@@ -558,7 +667,7 @@ class FileDnD(wx.Panel):
         same name as outputnames are rejected silently.
         """
         row_id = self.flCtrl.GetFocusedItem()  # Get the current row
-        oldname = self.flCtrl.GetItemText(row_id, 5)  # Get current name
+        oldname = self.data[row_id].outputname  # Get current name
         newname = ''
         title = _('File renaming...')
         msg = _('Rename the selected file to:')
@@ -578,13 +687,13 @@ class FileDnD(wx.Panel):
             self.parent.statusbar_msg(_('Add Files'), None)
             return
 
-        sanitize = filename_sanitize(newname, self.outputnames)
+        sanitize = filename_sanitize(newname, self.data.outputnames())
         if sanitize:
             self.parent.statusbar_msg(sanitize, FileDnD.YELLOW, FileDnD.BLACK)
             return
 
-        self.flCtrl.SetItem(row_id, 5, newname)
-        self.outputnames[row_id] = newname
+        self.flCtrl.SetItem(row_id, 9, newname)
+        self.data[row_id].outputname = newname
         self.parent.statusbar_msg(_('Add Files'), None)
 # -----------------------------------------------------------------------
 
@@ -593,12 +702,12 @@ class FileDnD(wx.Panel):
         This method is responsible for batch file renaming.
         """
         title = _('Rename items')
-        msg = _('Rename the {0} items to:').format(len(self.outputnames))
+        msg = _('Rename the {0} items to:').format(len(self.data))
         with Renamer(self,
                      nameprop=_('New Name #'),
                      caption=title,
                      message=msg,
-                     mode=len(self.outputnames)
+                     mode=len(self.data)
                      ) as dlg:
             if dlg.ShowModal() == wx.ID_OK:
                 newname = dlg.getvalue()
@@ -606,14 +715,14 @@ class FileDnD(wx.Panel):
                 return
 
         for name in newname:
-            sanitize = filename_sanitize(name, self.outputnames)
+            sanitize = filename_sanitize(name, self.data.outputnames())
             if sanitize:
                 self.parent.statusbar_msg(sanitize, FileDnD.YELLOW,
                                           FileDnD.BLACK)
                 return
 
         for num, name in enumerate(newname):
-            self.flCtrl.SetItem(num, 5, name)
-            self.outputnames[num] = name
+            self.flCtrl.SetItem(num, 9, name)
+            self.data[num].outputname = name
 
         self.parent.statusbar_msg(_('Add Files'), None)
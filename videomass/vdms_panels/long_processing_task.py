@@ -27,11 +27,11 @@ This file is part of Videomass.
 from __future__ import unicode_literals
 import time
 import os
-from shutil import move
 from pubsub import pub
 import wx
-from videomass.vdms_dialogs.widget_utils import notification_area
-from videomass.vdms_io.make_filelog import make_log_template
+from videomass.vdms_dialogs.widget_utils import notification_area, LogView
+from videomass.vdms_io.make_filelog import (make_log_template,
+                                            get_logwriter)
 from videomass.vdms_threads.one_pass import OnePass
 from videomass.vdms_threads.two_pass import TwoPass
 from videomass.vdms_threads.two_pass_ebu import Loudnorm
@@ -39,13 +39,16 @@ from videomass.vdms_threads.picture_exporting import PicturesFromVideo
 from videomass.vdms_threads.video_stabilization import VidStab
 from videomass.vdms_threads.concat_demuxer import ConcatDemuxer
 from videomass.vdms_threads.slideshow import SlideshowMaker
-from videomass.vdms_utils.utils import (get_milliseconds, milliseconds2clock)
+from videomass.vdms_threads.ffmpeg_output import (classify, INFO, ERROR,
+                                                  WARNING)
+from videomass.vdms_utils.utils import milliseconds2clock
 
 
-def delete_file_source(flist, trashdir):
+def delete_file_source(flist, trashdir, mover):
     """
     Move whole files list to Videomass Trash folder
-    after encoding process.
+    after encoding process. The files are moved in
+    background by the `mover` thread (see `TrashMover`).
     """
     filenotfounderror = None
     if not os.path.exists(trashdir):
@@ -58,40 +61,7 @@ def delete_file_source(flist, trashdir):
     if filenotfounderror is not None:
         wx.MessageBox(f"{filenotfounderror}", 'Videomass', wx.ICON_ERROR)
     else:
-        date = time.strftime('%H%M%S-%a_%d_%B_%Y')
-        for name in flist:
-            dest = os.path.join(trashdir, f'{date}_{os.path.basename(name)}')
-            move(name, dest)
-
-
-def pairwise(iterable):
-    """
-    Return a zip object from iterable.
-    This function is used by the update_display method.
-    ----
-    USE:
-
-    after splitting ffmpeg's progress strings such as:
-    output = "frame= 1178 fps=155 q=29.0 size=    2072kB time=00:00:39.02
-              bitrate= 435.0kbits/s speed=5.15x  "
-    in a list as:
-    iterable = ['frame', '1178', 'fps', '155', 'q', '29.0', 'size', '2072kB',
-                'time', '00:00:39.02', 'bitrate', '435.0kbits/s', speed',
-                '5.15x']
-    1)
-        for x, y in pairwise(iterable):
-            x, y
-    2)
-        dict(pairwise(iterable))
-
-    Return: a zip object pairs from list iterable object.
-
-    <https://stackoverflow.com/questions/5389507/iterating-over-every-
-    two-elements-in-a-list>
-    """
-    itobj = iter(iterable)  # list_iterator object
-    return zip(itobj, itobj)  # zip object pairs from list iterable object
-# ----------------------------------------------------------------------#
+        mover.move(flist, trashdir)
 
 
 class LogOut(wx.Panel):
@@ -115,6 +85,8 @@ class LogOut(wx.Panel):
     WHITE = '#fbf4f4'  # white for background status bar
     BLACK = '#060505'  # black for background status bar
     YELLOW = '#bd9f00'
+    # colours of the ffmpeg message classes, see `ffmpeg_output.py`
+    COLOURS = {INFO: 'INFO', ERROR: 'ERR0', WARNING: 'WARN'}
     # ------------------------------------------------------------------#
 
     def __init__(self, parent):
@@ -136,6 +108,11 @@ class LogOut(wx.Panel):
         self.logname = None  # log pathname, None otherwise
         self.result = []  # result of the final process
         self.count = 0  # keeps track of the counts (see `update_count`)
+        self.parallel = False  # True if the thread runs concurrent jobs
+        self.jobs = {}  # progress fraction of the running jobs
+        self.jobsdone = 0  # number of finished jobs
+        self.jobstotal = 0  # number of jobs of the whole process
+        self.starttime = None  # time the process has been started
         self.clr = self.appdata['icontheme'][1]
 
         wx.Panel.__init__(self, parent=parent)
@@ -144,18 +121,27 @@ class LogOut(wx.Panel):
         lbl = wx.StaticText(self, label=infolbl)
         if self.appdata['ostype'] != 'Darwin':
             lbl.SetLabelMarkup(f"<b>{infolbl}</b>")
-        self.txtout = wx.TextCtrl(self, wx.ID_ANY, "",
-                                  style=wx.TE_MULTILINE
-                                  | wx.TE_READONLY
-                                  | wx.TE_RICH2
-                                  )
+        self.btn_error = wx.Button(self, wx.ID_ANY, _("Go to first error"))
+        self.txtout = LogView(self, self.clr)
+        self.joblist = wx.ListCtrl(self, wx.ID_ANY, size=(-1, 120),
+                                   style=wx.LC_REPORT | wx.SUNKEN_BORDER,
+                                   )
+        self.joblist.InsertColumn(0, _('Job'), width=50)
+        self.joblist.InsertColumn(1, _('File'), width=400)
+        self.joblist.InsertColumn(2, _('Progress'), width=90)
+        self.joblist.InsertColumn(3, _('ETA'), width=120)
+        self.joblist.Hide()  # shown with concurrent jobs only
         self.barprog = wx.Gauge(self, wx.ID_ANY, range=0)
         self.labprog = wx.StaticText(self, label="")
         self.labffmpeg = wx.StaticText(self, label="")
         sizer = wx.BoxSizer(wx.VERTICAL)
         sizer.Add((0, 10))
-        sizer.Add(lbl, 0, wx.ALL, 5)
+        sizer_lbl = wx.BoxSizer(wx.HORIZONTAL)
+        sizer_lbl.Add(lbl, 1, wx.ALL | wx.ALIGN_CENTER_VERTICAL, 5)
+        sizer_lbl.Add(self.btn_error, 0, wx.ALL, 5)
+        sizer.Add(sizer_lbl, 0, wx.EXPAND)
         sizer.Add(self.txtout, 1, wx.EXPAND | wx.ALL, 5)
+        sizer.Add(self.joblist, 0, wx.EXPAND | wx.ALL, 5)
         sizer.Add(self.barprog, 0, wx.EXPAND | wx.ALL, 5)
         sizer.Add(self.labprog, 0, wx.ALL, 5)
         sizer.Add(self.labffmpeg, 0, wx.ALL, 5)
@@ -165,34 +151,41 @@ class LogOut(wx.Panel):
                              )
         sizer.Add(line, 0, wx.ALL | wx.EXPAND, 5)
         # set_properties:
-        self.txtout.SetBackgroundColour(self.clr['BACKGRD'])
+        self.btn_error.SetToolTip(_('Show the first error of the '
+                                    'process log'))
         self.SetSizerAndFit(sizer)
         # ------------------------------------------
+        self.Bind(wx.EVT_BUTTON, self.on_first_error, self.btn_error)
 
         pub.subscribe(self.update_display, "UPDATE_EVT")
+        pub.subscribe(self.update_log, "LOG_EVT")
+        pub.subscribe(self.update_progress, "PROGRESS_EVT")
         pub.subscribe(self.update_count, "COUNT_EVT")
         pub.subscribe(self.end_proc, "END_EVT")
+        pub.subscribe(self.update_job, "JOB_EVT")
     # ----------------------------------------------------------------------
 
-    def topic_thread(self, panel, durs, tseq, *args):
+    def topic_thread(self, panel, durs, tseq, *args, resume=None):
         """
         This method is resposible to create the Thread instance.
         *args: type tuple data object
         durs: list of file durations or partial if tseq is setted
+        resume: the unfinished batch to resume (see `JobJournal`)
         """
         self.previus = panel  # stores the panel from which it starts
 
         if args[0] == 'Viewing last log':
             return
 
-        self.txtout.Clear()
+        self.txtout.clear()
         self.labprog.SetLabel('')
         self.labffmpeg.SetLabel('')
 
         self.logname = make_log_template(args[8], self.appdata['logdir'])
 
         if args[0] == 'onepass':
-            self.thread_type = OnePass(self.logname, durs, tseq, *args)
+            self.thread_type = OnePass(self.logname, durs, tseq, *args,
+                                       resume=resume)
 
         elif args[0] == 'twopass':
             self.thread_type = TwoPass(self.logname, durs, tseq, *args)
@@ -214,13 +207,40 @@ class LogOut(wx.Panel):
         elif args[0] == 'concat_demuxer':
             self.with_eta = False
             self.thread_type = ConcatDemuxer(self.logname, durs, *args)
+
+        if (getattr(self.thread_type, 'maxjobs', 1) > 1
+                or getattr(self.thread_type, 'pipelined', False)):
+            self.parallel = True  # more processes at the same time
+            self.jobstotal = len(args[1])
+            self.starttime = time.time()
+            self.barprog.SetRange(1000)
+            self.barprog.SetValue(0)
+            self.joblist.Show()
+            self.Layout()
     # ----------------------------------------------------------------------
 
-    def update_display(self, output, duration, status):
+    def on_first_error(self, event):
+        """
+        Shows the first error line of the process log. The log
+        view keeps the last lines only, otherwise the log file
+        is shown.
+        """
+        found = self.txtout.goto_first_error()
+        if found is False:
+            self.parent.statusbar_msg(_('No errors found'), None)
+        elif found is None:
+            wx.MessageBox(_('The first error is no longer shown, please '
+                            'read the log file:\n"{}"').format(self.logname),
+                          'Videomass', wx.ICON_INFORMATION, self)
+    # ----------------------------------------------------------------------
+
+    def update_display(self, output, duration, status, jobid=None):
         """
         Receive message from thread by pubsub UPDATE_EVT protol.
-        The received 'output' is parsed for calculate the bar
-        progress value, percentage label and errors management.
+        The received 'output' is a line of the ffmpeg log which
+        is shown with the colour of its class (info, warning,
+        error) and appended to the log file, see `update_log`.
+        The progress is received separately, see `update_progress`.
         This method can be used even for non-loop threads.
 
         NOTE: During conversion the ffmpeg errors do not stop all
@@ -230,77 +250,167 @@ class LogOut(wx.Panel):
               'done' on `update_count` method. Since not all ffmpeg
               messages are errors, sometimes it happens to see more
               output marked with yellow color.
+
+              With concurrent jobs (`self.parallel`) the messages
+              are tagged with the `jobid` of the sender.
         """
+        prefix = f'[Job {jobid}] ' if self.parallel and jobid else ''
         if not status == 0:  # error, exit status of the p.wait
-            self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['ERR1']))
-            self.txtout.AppendText(f"{LogOut.MSG_failed}\n")
+            self.txtout.append(f"{prefix}{LogOut.MSG_failed}\n", 'ERR1')
             self.result.append('failed')
             return  # must be return here
 
-        if 'time=' in output:  # ...in processing
-            i = output.index('time=') + 5
-            pos = output[i:].split()[0]
-            msec = get_milliseconds(pos)
+        self.update_log([{'output': output, 'jobid': jobid}])
+    # ----------------------------------------------------------------------
 
-            if msec > duration:
-                self.barprog.SetValue(duration)
+    def update_log(self, lines):
+        """
+        Receive a batch of ffmpeg log lines from threads by pubsub
+        LOG_EVT protocol (see `ProgressDispatcher`), each one as
+        dict with the keyword arguments of UPDATE_EVT. Consecutive
+        lines of the same class are appended with a single style
+        change and the log file is written once per batch by the
+        background LogWriter.
+        """
+        runs = []  # [colour, [lines]]
+        for line in lines:
+            jobid = line.get('jobid')
+            prefix = f'[Job {jobid}] ' if self.parallel and jobid else ''
+            output = f"{prefix}{line['output']}"
+            colour = LogOut.COLOURS.get(classify(line['output']), 'TXT3')
+            if runs and runs[-1][0] == colour:
+                runs[-1][1].append(output)
             else:
-                self.barprog.SetValue(msec)
+                runs.append([colour, [output]])
 
-            percentage = round((msec / duration) * 100 if
-                               duration != 0 else 100)
-            out = [a for a in "=".join(output.split()).split('=') if a]
-            ffprog = []
-            for key, val in pairwise(out):
-                ffprog.append(f"{key}: {val}")
+        for colour, outputs in runs:
+            self.txtout.append(''.join(outputs), colour)
 
-            if self.with_eta:
-                if 'speed=' in output:
-                    speed = output.split('speed=')[-1].strip().split('x')[0]
-                    if speed in ('N/A', '0'):
-                        eta = "   ETA: N/A"
-                    else:  # is float
-                        rem = (duration - msec) / float(speed)
-                        remaining = milliseconds2clock(round(rem))
-                        eta = f"   ETA: {remaining}"
-                else:
-                    eta = "   ETA: N/A"
-            else:
-                eta = ""
-            self.labprog.SetLabel(f'Processing: {str(int(percentage))}% {eta}')
-            self.labffmpeg.SetLabel(' | '.join(ffprog))
+        get_logwriter(self.logname).write(''.join(
+            f"[FFMPEG]: {output}" for colour, outputs in runs
+            for output in outputs))
+    # ----------------------------------------------------------------------
 
-            del output, duration
+    def update_progress(self, progress, duration, jobid=None):
+        """
+        Receive the ffmpeg progress reports (`Progress` objects,
+        see `ffmpeg_progress.py`) from threads by pubsub PROGRESS_EVT
+        protocol, to set the bar progress value, the percentage
+        and the ETA label.
+
+        With concurrent jobs (`self.parallel`) the progress is
+        shown on the job row and the bar shows the overall
+        progress, see `update_job_progress`.
+        """
+        if self.parallel and jobid:
+            self.update_job_progress(progress, duration, jobid)
+            return
 
-        else:  # append all others lines on the textctrl and log file
-            if [x for x in ('info', 'Info') if x in output]:
-                self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['INFO']))
-                self.txtout.AppendText(f'{output}')
+        msec = progress.msec
+        self.barprog.SetValue(min(msec, duration))
+        percentage = round((msec / duration) * 100 if
+                           duration != 0 else 100)
+        if self.with_eta:
+            if progress.speed:
+                rem = max(duration - msec, 0) / progress.speed
+                eta = f"   ETA: {milliseconds2clock(round(rem))}"
+            else:
+                eta = "   ETA: N/A"
+        else:
+            eta = ""
+        self.labprog.SetLabel(f'Processing: {min(percentage, 100)}% {eta}')
+        self.labffmpeg.SetLabel(progress.summary())
+    # ----------------------------------------------------------------------
 
-            elif [x for x in ('Failed', 'failed', 'Error', 'error')
-                    if x in output]:
-                self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['ERR0']))
-                self.txtout.AppendText(f'{output}')
+    def update_job_progress(self, progress, duration, jobid):
+        """
+        Updates the row of the job `jobid` with the given ffmpeg
+        `progress` report, then updates the overall progress bar
+        and ETA. The overall ETA is extrapolated from the elapsed
+        time and the fraction of work done on all the files, since
+        the speed of each ffmpeg process is affected by the others.
+        """
+        msec = progress.msec
+        frac = min(msec / duration, 1.0) if duration else 1.0
+
+        eta = 'N/A'
+        if progress.speed:
+            rem = max(duration - msec, 0) / progress.speed
+            eta = milliseconds2clock(round(rem))
+
+        self.jobs[jobid] = frac
+        item = self.joblist.FindItem(-1, str(jobid))
+        if item != wx.NOT_FOUND:
+            self.joblist.SetItem(item, 2, f'{round(frac * 100)}%')
+            self.joblist.SetItem(item, 3, eta)
+        self.update_overall()
+    # ----------------------------------------------------------------------
 
-            elif [x for x in ('warning', 'Warning') if x in output]:
-                self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['WARN']))
-                self.txtout.AppendText(f'{output}')
+    def update_overall(self):
+        """
+        Sets the progress bar and the label with the overall
+        progress of concurrent jobs.
+        """
+        if not self.jobstotal:
+            return
+        done = (self.jobsdone + sum(self.jobs.values())) / self.jobstotal
+        done = min(done, 1.0)
+        self.barprog.SetValue(round(done * 1000))
+
+        elapsed = time.time() - self.starttime
+        if done > 0:
+            rem = elapsed * (1 - done) / done * 1000
+            eta = f"   ETA: {milliseconds2clock(round(rem))}"
+        else:
+            eta = "   ETA: N/A"
+        self.labprog.SetLabel(f'Processing: {round(done * 100)}% '
+                              f'({self.jobsdone}/{self.jobstotal} files, '
+                              f'{len(self.jobs)} running) {eta}')
+    # ----------------------------------------------------------------------
 
-            else:
-                self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['TXT3']))
-                self.txtout.AppendText(f'{output}')
+    def update_job(self, jobid, fname, state, total=None):
+        """
+        Receive messages from threads running concurrent jobs
+        by pubsub JOB_EVT protocol: adds the job row to the list
+        on 'start' state and removes it on 'end' state. `total`
+        is given when the number of jobs is not the number of
+        files (e.g. chunked encoding).
+        """
+        if not self.parallel:
+            return
 
-            with open(self.logname, "a", encoding='utf8') as logerr:
-                logerr.write(f"[FFMPEG]: {output}")
+        if total:
+            self.jobstotal = total
+
+        if state == 'start':
+            self.jobs[jobid] = 0.0
+            item = self.joblist.InsertItem(self.joblist.GetItemCount(),
+                                           str(jobid))
+            self.joblist.SetItem(item, 1, os.path.basename(fname))
+            self.joblist.SetItem(item, 2, '0%')
+            self.joblist.SetItem(item, 3, 'N/A')
+
+        elif state == 'end':
+            self.jobs.pop(jobid, None)
+            self.jobsdone += 1
+            item = self.joblist.FindItem(-1, str(jobid))
+            if item != wx.NOT_FOUND:
+                self.joblist.DeleteItem(item)
+        self.update_overall()
     # ----------------------------------------------------------------------
 
-    def update_count(self, count, fsource, destination, duration, end):
+    def update_count(self, count, fsource, destination, duration, end,
+                     jobid=None):
         """
         Receive messages from file count, loop or non-loop thread.
         """
         if end == 'Done':
-            self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['SUCCESS']))
-            self.txtout.AppendText(f"{LogOut.MSG_done}\n")
+            get_logwriter(self.logname).flush(wait=False)
+            if self.parallel and jobid:
+                self.txtout.append(f"[Job {jobid}] {LogOut.MSG_done}\n",
+                                   'SUCCESS')
+                return
+            self.txtout.append(f"{LogOut.MSG_done}\n", 'SUCCESS')
             # set end values for percentage and ETA
             if self.with_eta:
                 newlab = self.labprog.GetLabel().split()
@@ -315,19 +425,16 @@ class LogOut(wx.Panel):
 
         # if STATUS_ERROR == 1:
         if end == 'error':
-            self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['WARN']))
-            self.txtout.AppendText(f'\n{count}\n')
+            self.txtout.append(f'\n{count}\n', 'WARN')
             self.error = True
         else:
-            self.barprog.SetRange(duration)  # set overall duration range
-            self.barprog.SetValue(0)  # reset bar progress
-            self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['TXT0']))
-            self.txtout.AppendText(f'\n{count}\n')
-            self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['TXT1']))
-            self.txtout.AppendText(f'{fsource}\n')
+            if not self.parallel:
+                self.barprog.SetRange(duration)  # set duration range
+                self.barprog.SetValue(0)  # reset bar progress
+            self.txtout.append(f'\n{count}\n', 'TXT0')
+            self.txtout.append(f'{fsource}\n', 'TXT1')
             if destination:
-                self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['TXT1']))
-                self.txtout.AppendText(f'{destination}\n')
+                self.txtout.append(f'{destination}\n', 'TXT1')
 
         self.count += 1
     # ----------------------------------------------------------------------
@@ -336,18 +443,17 @@ class LogOut(wx.Panel):
         """
         At the end of the process
         """
+        get_logwriter(self.logname).flush(wait=False)
         if self.error:
-            self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['TXT0']))
-            self.txtout.AppendText(f"\n{LogOut.MSG_fatalerror}\n")
+            self.txtout.append(f"\n{LogOut.MSG_fatalerror}\n", 'TXT0')
             notification_area(_("Fatal Error !"), LogOut.MSG_fatalerror,
                               wx.ICON_ERROR)
         elif self.abort:
-            self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['ABORT']))
-            self.txtout.AppendText(f"\n{LogOut.MSG_interrupted}\n")
+            self.parent.statusbar_msg(_("...Interrupted"), None)
+            self.txtout.append(f"\n{LogOut.MSG_interrupted}\n", 'ABORT')
         else:
             if not self.result:
                 endmsg = LogOut.MSG_completed
-                self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['TXT0']))
                 notification_area(endmsg, _("Get your files at the "
                                             "destination you specified"),
                                   wx.ICON_INFORMATION,
@@ -355,42 +461,43 @@ class LogOut(wx.Panel):
             else:
                 if len(self.result) == self.count:
                     endmsg = LogOut.MSG_taskfailed
-                    self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['TXT0']))
                     notification_area(endmsg, _("Check the current output "
                                                 "or read the related log "
                                                 "file for more information."),
                                       wx.ICON_ERROR,)
                 else:
                     endmsg = LogOut.MSG_unfinished
-                    self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['TXT0']))
                     notification_area(endmsg, _("Check the current output "
                                                 "or read the related log "
                                                 "file for more information."),
                                       wx.ICON_WARNING, timeout=10)
 
             self.parent.statusbar_msg(_('...Finished'), None)
-            self.txtout.AppendText(f"\n{endmsg}\n")
+            self.txtout.append(f"\n{endmsg}\n", 'TXT0')
             self.barprog.SetValue(0)
 
             if msg:  # move processed files to Videomass trash folder
                 if self.parent.movetotrash:
                     trashdir = self.appdata['user_trashdir']
-                    delete_file_source(msg, trashdir)  # filelist, dir
+                    delete_file_source(msg, trashdir,
+                                       self.parent.move_to_trash())
 
-        self.txtout.AppendText('\n')
+        self.txtout.append('\n', 'TXT0')
         self.reset_all()
         pub.sendMessage("PROCESS TERMINATED", msg='Terminated')
     # ----------------------------------------------------------------------
 
     def on_stop(self):
         """
-        The user change idea and was stop process
+        The user change idea and was stop process.
+        The thread is not joined here to keep the GUI responsive
+        while ffmpeg finalises the outputs, it will send END_EVT
+        when done (see `end_proc`). A further stop kills the
+        processes at once.
         """
         self.thread_type.stop()
         self.parent.statusbar_msg(_("Please wait... interruption in progress"),
                                   LogOut.YELLOW, LogOut.BLACK)
-        self.thread_type.join()
-        self.parent.statusbar_msg(_("...Interrupted"), None)
         self.abort = True
         # event.Skip()
     # ----------------------------------------------------------------------
@@ -406,4 +513,13 @@ class LogOut(wx.Panel):
         self.result.clear()
         self.count = 0
         self.with_eta = True  # restoring time remaining display
+        if self.parallel:
+            self.parallel = False
+            self.jobs.clear()
+            self.jobsdone = 0
+            self.jobstotal = 0
+            self.starttime = None
+            self.joblist.DeleteAllItems()
+            self.joblist.Hide()
+            self.Layout()
     # ----------------------------------------------------------------------
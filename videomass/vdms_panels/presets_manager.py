@@ -40,7 +40,8 @@ from videomass.vdms_io.presets_manager_prop import write_new_profile
 from videomass.vdms_utils.utils import copy_restore
 from videomass.vdms_utils.utils import copy_on
 from videomass.vdms_utils.utils import copydir_recursively
-from videomass.vdms_io.checkup import check_files
+from videomass.vdms_io.checkup import check_files, check_free_space
+from videomass.vdms_io.preflight import preset_jobs
 from videomass.vdms_dialogs import presets_addnew
 from videomass.vdms_dialogs.epilogue import Formula
 
@@ -880,15 +881,30 @@ class PrstPan(wx.Panel):
             # not supported, missing files or user has changed his mind
             return
         fsrc, fdest = checking
+        pass1 = " ".join(self.txt_1cmd.GetValue().split())
+
+        try:  # pre-flight check of the free space
+            passes = json.loads(pass1)
+        except json.decoder.JSONDecodeError:
+            passes = None  # reported by the thread
+        items = [self.parent.data_files[name] for name in fsrc]
+        if passes:
+            order = check_free_space(preset_jobs(passes, fdest, items,
+                                                 self.parent.time_seq))
+            if order is None:
+                return
+            fsrc = [fsrc[n] for n in order]
+            fdest = [fdest[n] for n in order]
+            items = [items[n] for n in order]
 
-        self.one_Pass(fsrc, fdest, outext)
+        self.one_Pass(fsrc, fdest, outext, pass1,
+                      [item.duration for item in items])
     # ----------------------------------------------------------------#
 
-    def one_Pass(self, filesrc, filedest, outext):
+    def one_Pass(self, filesrc, filedest, outext, pass1, durations):
         """
         Build args string for one pass process
         """
-        pass1 = " ".join(self.txt_1cmd.GetValue().split())
         valupdate = self.update_dict(len(filesrc), 'One passes')
         ending = Formula(self, valupdate[0], valupdate[1], (600, 170),
                          self.parent.movetotrash, self.parent.emptylist,
@@ -905,6 +921,7 @@ class PrstPan(wx.Panel):
                                              '',
                                              'presets_manager.log',
                                              len(filesrc),
+                                             durations=durations,
                                              )
     # ------------------------------------------------------------------#
 
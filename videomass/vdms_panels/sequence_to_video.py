@@ -45,11 +45,9 @@ def check_images_size(flist):
     None otherwise.
     """
     sizes = []
-    for index in flist:
-        if 'video' in index.get('streams')[0]['codec_type']:
-            width = index['streams'][0]['width']
-            height = index['streams'][0]['height']
-            sizes.append(f'{width}x{height}')
+    for item in flist:
+        if 'video' in item.codec_type:
+            sizes.append(f'{item.width}x{item.height}')
 
     if len(set(sizes)) > 1:
         wx.MessageBox(_('Images need to be resized, '
@@ -323,7 +321,7 @@ class SequenceToVideo(wx.Panel):
             return None
 
         clicked = self.parent.filedropselected
-        return (clicked, self.parent.file_src.index(clicked))
+        return (clicked, self.parent.data_files.index(clicked))
     # ------------------------------------------------------------------#
 
     def get_video_stream(self):
@@ -337,13 +335,13 @@ class SequenceToVideo(wx.Panel):
         if not fget:
             return None
 
-        index = self.parent.data_files[fget[1]]
+        item = self.parent.data_files[fget[1]]
 
-        if 'video' in index.get('streams')[0]['codec_type']:
-            width = int(index['streams'][0]['width'])
-            height = int(index['streams'][0]['height'])
-            filename = index['format']['filename']
-            duration = index['format'].get('time', '00:00:00.000')
+        if 'video' in item.codec_type:
+            width = int(item.width)
+            height = int(item.height)
+            filename = item.path
+            duration = item.time
             return dict(zip(['width', 'height', 'filename', 'duration'],
                             [width, height, filename, duration]))
 
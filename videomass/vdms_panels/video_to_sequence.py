@@ -372,7 +372,7 @@ class VideoToSequence(wx.Panel):
             return None
 
         clicked = self.parent.filedropselected
-        return (clicked, self.parent.file_src.index(clicked))
+        return (clicked, self.parent.data_files.index(clicked))
     # ------------------------------------------------------------------#
 
     def get_video_stream(self):
@@ -386,13 +386,13 @@ class VideoToSequence(wx.Panel):
         if not fget:
             return None
 
-        index = self.parent.data_files[fget[1]]
+        item = self.parent.data_files[fget[1]]
 
-        if 'video' in index.get('streams')[0]['codec_type']:
-            width = int(index['streams'][0]['width'])
-            height = int(index['streams'][0]['height'])
-            filename = index['format']['filename']
-            duration = index['format'].get('time', '00:00:00.000')
+        if 'video' in item.codec_type:
+            width = int(item.width)
+            height = int(item.height)
+            filename = item.path
+            duration = item.time
             return dict(zip(['width', 'height', 'filename', 'duration'],
                             [width, height, filename, duration]))
 
@@ -76,6 +76,51 @@ class ConfigManager:
     ffthreads (str):
         Set the number of threads (from 0 to 32)
 
+    concurrent_jobs (int):
+        Max number of files processed at the same time by separate
+        ffmpeg processes, 0 (default) derives it from the number of
+        CPU cores divided by the `ffthreads` value.
+
+    chunked_encoding (bool):
+        with True, a single file is split into segments which are
+        encoded at the same time by separate ffmpeg processes and
+        joined at the end, default is False.
+
+    fused_multipass (bool):
+        with True, the passes of a preset are run by a single ffmpeg
+        process which decodes the input file once and writes all the
+        outputs (when the passes can be fused), default is True.
+        The fused outputs get the video and the first audio stream
+        of the input, no subtitles.
+
+    ffmpeg_niceness (int):
+        Priority decrease of the ffmpeg processes, from 0 (default,
+        normal priority) to 19 (lowest). On MS-Windows values above
+        0 set a below normal priority, from 10 the idle priority.
+
+    ffmpeg_affinity (str):
+        CPU cores where the ffmpeg processes run, e.g. "0-3,6",
+        an empty string (default) means all cores. Linux only.
+
+    partial_outputs (str):
+        What to do with the output files of interrupted or failed
+        ffmpeg processes, which are written to temporary names:
+        "delete" (default), "quarantine" (renamed as
+        `name.partial.ext`) or "keep" (renamed to the final name
+        although incomplete).
+
+    loudness_engine (str):
+        How the audio is measured for the PEAK, RMS and EBU R128
+        normalizations: "ffmpeg" (default, with the volumedetect
+        and loudnorm filters) or "numpy" (by the built-in meter on
+        the decoded samples, requires NumPy, otherwise ffmpeg is
+        used).
+
+    incremental_mode (bool):
+        with True, the ffmpeg commands whose outputs are newer than
+        the input file and were written by the same command are
+        skipped, like `make` does. Default is False.
+
     ffplayloglev (str):
         -loglevel one of `quiet`, `fatal`, `error`, `warning`, `info`
 
@@ -157,7 +202,7 @@ class ConfigManager:
         List should be passed using aria2c ["-j", "1", "-x", "1", "-s", "1"]
 
     """
-    VERSION = 6.2
+    VERSION = 6.9
     DEFAULT_OPTIONS = {"confversion": VERSION,
                        "outputfile": f"{os.path.expanduser('~')}",
                        "outputfile_samedir": False,
@@ -166,6 +211,14 @@ class ConfigManager:
                        "ffmpeg_islocal": False,
                        "ffmpegloglev": "-loglevel warning",
                        "ffthreads": "-threads 4",
+                       "concurrent_jobs": 0,
+                       "chunked_encoding": False,
+                       "fused_multipass": True,
+                       "ffmpeg_niceness": 0,
+                       "ffmpeg_affinity": "",
+                       "partial_outputs": "delete",
+                       "loudness_engine": "ffmpeg",
+                       "incremental_mode": False,
                        "ffplay_cmd": "",
                        "ffplay_islocal": False,
                        "ffplayloglev": "-loglevel error",
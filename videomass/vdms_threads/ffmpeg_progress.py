@@ -0,0 +1,232 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: ffmpeg_progress.py
+Porpose: Reads the ffmpeg -progress output of worker threads
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of Videomass.
+
+   Videomass is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   Videomass is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import subprocess
+import platform
+from threading import Thread
+
+
+def to_number(value, kind=int):
+    """
+    Converts a value of the ffmpeg progress output to
+    `kind` (int or float), returns None if it is not
+    available (e.g. 'N/A').
+    """
+    try:
+        return kind(value.strip().rstrip('x').replace('kbits/s', ''))
+    except (AttributeError, ValueError):
+        return None
+
+
+class Progress:
+    """
+    A progress report of ffmpeg, see `ProgressParser`.
+
+    Attributes:
+        frame: number of the frames processed
+        fps: frames per second
+        bitrate: bitrate in kbits/s
+        total_size: bytes written to the outputs
+        out_time_us: position of the outputs in microseconds
+        dup_frames: duplicated frames
+        drop_frames: dropped frames
+        speed: encoding speed relative to playback (e.g. 2.5)
+        end: True for the last report of the process
+
+    A value not available is None.
+    """
+    __slots__ = ('frame', 'fps', 'bitrate', 'total_size', 'out_time_us',
+                 'dup_frames', 'drop_frames', 'speed', 'end')
+
+    def __init__(self, block):
+        """
+        block: dict of the key=value pairs of a report
+        """
+        self.frame = to_number(block.get('frame'))
+        self.fps = to_number(block.get('fps'), float)
+        self.bitrate = to_number(block.get('bitrate'), float)
+        self.total_size = to_number(block.get('total_size'))
+        # out_time_ms is in microseconds too, kept by old ffmpeg
+        self.out_time_us = to_number(block.get('out_time_us',
+                                               block.get('out_time_ms')))
+        if self.out_time_us is not None and self.out_time_us < 0:
+            self.out_time_us = 0
+        self.dup_frames = to_number(block.get('dup_frames'))
+        self.drop_frames = to_number(block.get('drop_frames'))
+        self.speed = to_number(block.get('speed'), float)
+        self.end = block.get('progress') == 'end'
+
+    @property
+    def msec(self):
+        """position of the outputs in milliseconds, 0 if unknown"""
+        return (self.out_time_us or 0) // 1000
+
+    def summary(self):
+        """
+        Returns the report as a short string for the GUI,
+        e.g. 'frame: 250 | fps: 99.5 | ... | speed: 3.9x'
+        """
+        items = [('frame', self.frame), ('fps', self.fps),
+                 ('size', f'{self.total_size // 1024}KiB'
+                  if self.total_size is not None else None),
+                 ('bitrate', f'{self.bitrate}kbits/s'
+                  if self.bitrate is not None else None),
+                 ('dup', self.dup_frames), ('drop', self.drop_frames),
+                 ('speed', f'{self.speed}x'
+                  if self.speed is not None else None)]
+        return ' | '.join(f'{key}: {val}' for key, val in items
+                          if val is not None)
+
+
+class ProgressParser:
+    """
+    Parses the key=value lines printed by `ffmpeg -progress`.
+    Each report is a block of lines ended by the 'progress' key
+    ('continue' or 'end').
+
+    Usage:
+        >>> parser = ProgressParser()
+        >>> for line in lines:
+        ...     report = parser.feed(line)
+        ...     if report:
+        ...         print(report.msec)
+    """
+
+    def __init__(self):
+        self.block = {}
+
+    def feed(self, line):
+        """
+        Adds a line to the current report, returns a
+        Progress object when the report is complete,
+        None otherwise.
+        """
+        key, sep, val = line.strip().partition('=')
+        if not sep:
+            return None
+        self.block[key] = val
+        if key != 'progress':
+            return None
+        report = Progress(self.block)
+        self.block = {}
+        return report
+
+
+class ProgressPipe:
+    """
+    Runs a ffmpeg process with `-progress` on a dedicated pipe
+    read by a helper thread, so that stderr carries only the
+    human log (stats are disabled by `-nostats`). On MS-Windows,
+    where file descriptors can not be inherited, the progress is
+    written on stdout.
+
+    Usage:
+        >>> with ProgressPipe(callback) as progress, \\
+        ...      Popen(progress.command(cmd), stderr=subprocess.PIPE,
+        ...            **progress.popen_kwargs()) as proc:
+        ...     progress.start(proc)
+        ...     for line in proc.stderr:
+        ...         ...
+
+    `callback` is called on the reader thread with each
+    Progress object.
+    """
+    POSIX = platform.system() != 'Windows'
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.thread = None
+        if ProgressPipe.POSIX:
+            self.rfd, self.wfd = os.pipe()
+        else:
+            self.rfd = self.wfd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def command(self, cmd):
+        """
+        Returns the `cmd` argument list (which starts with the
+        ffmpeg executable) with the progress options placed after
+        the executable. Any `-stats` option (e.g. from the
+        "ffmpeg+params" setting) is removed since it would
+        override `-nostats`.
+        """
+        fd = self.wfd if ProgressPipe.POSIX else 1
+        args = ['-progress', f'pipe:{fd}', '-nostats']
+        return cmd[:1] + args + [x for x in cmd[1:] if x != '-stats']
+
+    def popen_kwargs(self):
+        """
+        Returns the keyword arguments to pass to Popen
+        """
+        if ProgressPipe.POSIX:
+            return {'pass_fds': (self.wfd,)}
+        return {'stdout': subprocess.PIPE}
+
+    def start(self, proc):
+        """
+        Starts reading the progress of `proc` process
+        """
+        if ProgressPipe.POSIX:
+            os.close(self.wfd)  # ffmpeg holds the write end now
+            self.wfd = None
+            stream = open(self.rfd, encoding='utf8', errors='replace')
+            self.rfd = None
+        else:
+            stream = proc.stdout
+        self.thread = Thread(target=self.read, args=(stream,), daemon=True)
+        self.thread.start()
+
+    def read(self, stream):
+        """
+        Reads the progress reports until the end of `stream`
+        """
+        parser = ProgressParser()
+        try:
+            with stream:
+                for line in stream:
+                    report = parser.feed(line)
+                    if report:
+                        self.callback(report)
+        except (OSError, ValueError):
+            pass  # closed by Popen on MS-Windows
+
+    def close(self):
+        """
+        Waits for the reader thread and closes the pipe
+        """
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        for fd in (self.rfd, self.wfd):
+            if fd is not None:
+                os.close(fd)
+        self.rfd = self.wfd = None
@@ -0,0 +1,526 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: ffmpeg_runner.py
+Porpose: Runs the ffmpeg processes of worker threads
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of Videomass.
+
+   Videomass is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   Videomass is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import re
+import time
+import shlex
+import platform
+import subprocess
+from threading import Lock, Thread
+from videomass.vdms_utils.utils import Popen
+from videomass.vdms_threads.ffmpeg_progress import ProgressPipe
+
+WINDOWS = platform.system() == 'Windows'
+TEMP_MARK = '.vdms-tmp'  # marks the temporary names of the outputs
+ALL_AUDIO = 'all'  # the audio `stream` key of all the audio streams
+
+
+def split_args(text):
+    """
+    Splits a string of ffmpeg options (e.g. the 'ffmpeg+params'
+    setting or the arguments of a preset) into a list of args.
+    On MS-Windows the backslashes are not escape chars, so that
+    the pathnames survive the splitting.
+    """
+    lexer = shlex.shlex(text, posix=True)
+    lexer.whitespace_split = True
+    if WINDOWS:
+        lexer.escape = ''
+    return list(lexer)
+
+
+def build_args(*parts):
+    """
+    Returns the argument list of a command given its `parts`:
+    strings are options split by `split_args`, lists and tuples
+    are taken as they are (e.g. ['-i', pathname]) and empty
+    parts are skipped.
+
+        >>> build_args(['ffmpeg'], '-ss 10 -t 5', ['-i', 'my file.mkv'])
+        ['ffmpeg', '-ss', '10', '-t', '5', '-i', 'my file.mkv']
+    """
+    args = []
+    for part in parts:
+        if isinstance(part, (list, tuple)):
+            args.extend(str(x) for x in part)
+        elif part:
+            args.extend(split_args(part))
+    return args
+
+
+def quote_arg(arg):
+    """
+    Quotes a single command line argument if it contains
+    blanks or quotes, so that it survives `split_args`.
+    """
+    if arg and not re.search(r'[\s"\']', arg):
+        return arg
+    escaped = arg.replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def join_args(args):
+    """
+    Returns the argument list as a command line string
+    for logging, see `quote_arg`.
+    """
+    return ' '.join(quote_arg(x) for x in args)
+
+
+def audio_map(stream=''):
+    """
+    Returns the -map options of the audio `stream` key: the
+    index of an audio stream, ALL_AUDIO or an empty string
+    for the stream chosen by ffmpeg (no options).
+    """
+    if stream == '':
+        return []
+    if stream == ALL_AUDIO:
+        return ['-map', '0:a?']
+    return ['-map', f'0:a:{stream}']
+
+
+def analysis_args(ffmpeg, infile, afilter, timeseq='', stream='',
+                  codec='pcm_f64le'):
+    """
+    Returns the argument list of a ffmpeg command which only
+    measures the audio of `infile` with the `afilter` filter
+    (e.g. volumedetect or loudnorm) on the `timeseq` segment
+    (the -ss/-t options). The video, subtitle and data streams
+    are discarded by the demuxer (input -vn -sn -dn), only the
+    audio `stream` is decoded (see `audio_map`) and the
+    filtered samples are encoded as raw
+    `codec` (the double samples of loudnorm need no conversion)
+    for the null muxer, which writes nothing.
+    """
+    args = build_args([ffmpeg, '-hide_banner', '-loglevel', 'info'],
+                      timeseq, ['-vn', '-sn', '-dn', '-i', infile],
+                      audio_map(stream))
+    return args + ['-af', afilter, '-c:a', codec, '-f', 'null', '-']
+
+
+def video_pass_args(args):
+    """
+    Returns the argument list of the `args` string of a first
+    pass which encodes the video and measures the audio (e.g.
+    the first pass of a two-pass video encoding with loudnorm)
+    without the audio: its filters are removed and the audio
+    is disabled (-an), so that only the video statistics are
+    written while the audio is measured by `analysis_args`.
+    """
+    result = []
+    items = iter(split_args(args))
+    for arg in items:
+        if arg == '-af' or arg.startswith('-filter:a'):
+            next(items, None)  # the filtergraph
+        else:
+            result.append(arg)
+    return result + ['-an']
+
+
+def pcm_args(ffmpeg, infile, timeseq='', stream=''):
+    """
+    Like `analysis_args` but the decoded audio is written
+    unfiltered on stdout as 32-bit float PCM samples in a WAV
+    container, whose header carries the sample rate and the
+    channel layout (see `loudness_meter.read_wav_header`).
+    Only the errors are printed on stderr. The WAV container
+    holds a single stream, so `stream` can't be ALL_AUDIO.
+    """
+    args = build_args([ffmpeg, '-hide_banner', '-nostats',
+                       '-loglevel', 'error'],
+                      timeseq, ['-vn', '-sn', '-dn', '-i', infile],
+                      audio_map(stream))
+    return args + ['-c:a', 'pcm_f32le', '-f', 'wav', 'pipe:1']
+
+
+def discard_outputs(outputs, mode, since=None):
+    """
+    Handles the (probably truncated) output files of an
+    interrupted or failed process according to `mode`:
+    'delete' removes them, 'quarantine' renames them as
+    `name.partial.ext`, 'keep' leaves them as they are.
+    Only the regular files modified from `since` (a timestamp,
+    any time if None) are handled, so that a file left as is
+    by a process which failed on start-up is never lost.
+
+    Returns a list of (pathname, new pathname or None) tuples
+    of the files handled.
+    """
+    done = []
+    if mode not in ('delete', 'quarantine'):
+        return done
+    for path in outputs:
+        try:
+            if not os.path.isfile(path):
+                continue
+            if since is not None and os.path.getmtime(path) < since:
+                continue
+            if mode == 'delete':
+                os.remove(path)
+                done.append((path, None))
+            else:
+                os.replace(path, partial_name(path))
+                done.append((path, partial_name(path)))
+        except OSError:
+            continue  # in use or no permission, leave it
+    return done
+
+
+def partial_name(path):
+    """
+    Returns the name of a quarantined output, i.e.
+    `name.partial.ext`
+    """
+    name, ext = os.path.splitext(path)
+    return f'{name}.partial{ext}'
+
+
+def temp_output(path):
+    """
+    Returns the temporary name used to write the output
+    `path`: a hidden sibling file, so that the final rename is
+    atomic, with the same extension, so that ffmpeg guesses
+    the same format.
+    """
+    head, tail = os.path.split(path)
+    name, ext = os.path.splitext(tail)
+    return os.path.join(head, f'.{name}{TEMP_MARK}{ext}')
+
+
+def atomic_outputs(args, outputs):
+    """
+    Replaces the `outputs` pathnames on the `args` list of a
+    command with their temporary names (see `temp_output`),
+    to be renamed by `commit_outputs` on success. The outputs
+    which are not plain files (e.g. the null device, image
+    sequence patterns, URLs or directories) and the args
+    which are inputs (following `-i`) are left as they are.
+
+    Returns a tuple (new args, {output: temporary name}).
+    """
+    temps = {}
+    for path in outputs:
+        if (path in (os.devnull, 'NUL') or '%' in path
+                or re.match(r'[a-zA-Z][a-zA-Z0-9+.-]+:', path)
+                or os.path.isdir(path)):
+            continue
+        temps[path] = temp_output(path)
+
+    newargs, used = list(args), {}
+    for idx, arg in enumerate(newargs):
+        if arg in temps and (idx == 0 or newargs[idx - 1] != '-i'):
+            newargs[idx] = used[arg] = temps[arg]
+    return newargs, used
+
+
+def commit_outputs(temps):
+    """
+    Renames the temporary outputs to their final names, see
+    `atomic_outputs`. Existing files are replaced atomically.
+    Raises `OSError` if a file can't be renamed.
+    """
+    for path, temp in temps.items():
+        os.replace(temp, path)
+
+
+def abandon_outputs(temps, mode):
+    """
+    Handles the temporary outputs of an interrupted or failed
+    process (see `atomic_outputs`) according to `mode`:
+    'delete' removes them, 'quarantine' renames them as
+    `name.partial.ext`, 'keep' renames them to the final name
+    (as if they were written in place).
+
+    Returns a list of (pathname, new pathname or None) tuples
+    of the files handled.
+    """
+    done = []
+    for path, temp in temps.items():
+        try:
+            if not os.path.isfile(temp):
+                continue
+            if mode == 'keep':
+                os.replace(temp, path)
+            elif mode == 'quarantine':
+                os.replace(temp, partial_name(path))
+                done.append((path, partial_name(path)))
+            else:
+                os.remove(temp)
+                done.append((path, None))
+        except OSError:
+            continue  # in use or no permission, leave it
+    return done
+
+
+def parse_cpus(text):
+    """
+    Parses a list of CPU cores such as '0-3,6' and returns
+    a set of int, None if empty or invalid (i.e. all cores).
+    """
+    cpus = set()
+    try:
+        for item in (text or '').replace(' ', '').split(','):
+            if not item:
+                continue
+            first, sep, last = item.partition('-')
+            cpus.update(range(int(first), int(last if sep else first) + 1))
+    except ValueError:
+        return None
+    return cpus or None
+
+
+class ProcessRunner:
+    """
+    Runs the ffmpeg processes of a worker thread, one or more
+    at the same time (see `JobScheduler`), streaming their
+    stderr lines and their progress reports (see `ProgressPipe`)
+    to the given callbacks.
+
+    Usage:
+        >>> runner = ProcessRunner(niceness=10, affinity={0, 1})
+        >>> status, elapsed = runner.run(args, on_line, on_progress)
+
+    `runner.cancel()` (from any thread) stops all the running
+    processes and prevents new ones from starting, without
+    waiting for ffmpeg to print a line and without blocking
+    the caller: ffmpeg is first asked to quit by sending 'q'
+    on its stdin, so that it finalises the output containers,
+    then it is terminated after QUIT_TIMEOUT seconds and
+    killed after further TERM_TIMEOUT seconds. A second
+    `cancel()` terminates the processes at once.
+
+    Attributes:
+        niceness: priority decrease of the processes (0-19), on
+                  MS-Windows above 0 means below normal priority
+                  and from 10 idle priority.
+        affinity: set of the CPU cores where the processes run,
+                  None for all (not supported on macOS and
+                  MS-Windows).
+        elapsed: total running time of the processes in seconds
+        count: number of the processes run
+    """
+    QUIT_TIMEOUT = 5.0
+    TERM_TIMEOUT = 5.0
+
+    def __init__(self, niceness=0, affinity=None):
+        """
+        See the class docstring
+        """
+        self.niceness = max(0, min(19, int(niceness or 0)))
+        self.affinity = affinity
+        self.cancelled = False
+        self.elapsed = 0.0
+        self.count = 0
+        self.procs = set()
+        self.interrupted = set()  # procs stopped by `cancel`
+        self.lock = Lock()
+
+    def popen_kwargs(self):
+        """
+        Returns the keyword arguments to pass to Popen
+        to set the process priority on MS-Windows.
+        """
+        if not WINDOWS or not self.niceness:
+            return {}
+        if self.niceness >= 10:
+            return {'creationflags': subprocess.IDLE_PRIORITY_CLASS}
+        return {'creationflags': subprocess.BELOW_NORMAL_PRIORITY_CLASS}
+
+    def started(self, proc):
+        """
+        Applies priority and CPU affinity to a new process and
+        registers it for cancellation. Returns False if the
+        runner has been cancelled in the meantime.
+        """
+        try:
+            if self.niceness and not WINDOWS:
+                os.setpriority(os.PRIO_PROCESS, proc.pid, self.niceness)
+            if self.affinity and hasattr(os, 'sched_setaffinity'):
+                os.sched_setaffinity(proc.pid, self.affinity)
+        except OSError:
+            pass  # process already ended or cores not available
+        with self.lock:
+            self.procs.add(proc)
+            if self.cancelled:
+                self.interrupted.add(proc)
+            return not self.cancelled
+
+    def run(self, args, on_line, on_progress, cwd=None):
+        """
+        Runs the `args` command list in `cwd` (the current working
+        dir if None) and waits for it. `on_line` is called with
+        each stderr line, `on_progress` with each `Progress` report
+        (on a separate thread).
+
+        Returns a tuple (exit status, elapsed seconds), where the
+        exit status is 'stop' if the process has been stopped by
+        `cancel` (ffmpeg exits with 0 on 'q'). Raises OSError if
+        the executable can not be run.
+        """
+        if self.cancelled:
+            return 'stop', 0.0
+        start = time.perf_counter()
+        progress = ProgressPipe(on_progress)
+        args = [x for x in args if x != '-nostdin']  # see `cancel`
+        with progress, Popen(progress.command(args),
+                             cwd=cwd,
+                             stdin=subprocess.PIPE,
+                             stderr=subprocess.PIPE,
+                             bufsize=1,
+                             universal_newlines=True,
+                             encoding='utf8',
+                             errors='replace',
+                             **progress.popen_kwargs(),
+                             **self.popen_kwargs(),
+                             ) as proc:
+            try:
+                if not self.started(proc):
+                    proc.terminate()
+                progress.start(proc)
+                for line in proc.stderr:
+                    on_line(line)
+                status = proc.wait()
+            finally:
+                interrupted = self.ended(proc)
+
+        return 'stop' if interrupted else status, self.account(start)
+
+    def stream(self, args, reader, on_line):
+        """
+        Runs the `args` command list, which writes its output on
+        stdout (e.g. raw audio samples, see `pcm_args`), and calls
+        `reader` with the binary stdout stream; `on_line` is called
+        with each stderr line on a separate thread. There are no
+        progress reports. Returns a tuple (exit status, elapsed
+        seconds) like `run`. If `reader` raises an exception the
+        process is killed.
+        """
+        if self.cancelled:
+            return 'stop', 0.0
+        start = time.perf_counter()
+        args = [x for x in args if x != '-nostdin']  # see `cancel`
+        with Popen(args,
+                   stdin=subprocess.PIPE,
+                   stdout=subprocess.PIPE,
+                   stderr=subprocess.PIPE,
+                   universal_newlines=True,
+                   encoding='utf8',
+                   errors='replace',
+                   **self.popen_kwargs(),
+                   ) as proc:
+            try:
+                if not self.started(proc):
+                    proc.terminate()
+
+                def read_errors():
+                    for line in proc.stderr:
+                        on_line(line)
+
+                errors = Thread(target=read_errors, daemon=True)
+                errors.start()
+                try:
+                    reader(proc.stdout.buffer)
+                except BaseException:
+                    self.signal(proc.kill)
+                    raise
+                finally:
+                    proc.stdout.close()  # unblocks ffmpeg if not read
+                status = proc.wait()
+                errors.join()
+            finally:
+                interrupted = self.ended(proc)
+
+        return 'stop' if interrupted else status, self.account(start)
+
+    def ended(self, proc):
+        """
+        Unregisters the ended process `proc`, returns True
+        if it has been interrupted by `cancel`.
+        """
+        with self.lock:
+            self.procs.discard(proc)
+            if proc in self.interrupted:
+                self.interrupted.discard(proc)
+                return True
+        return False
+
+    def account(self, start):
+        """
+        Adds the running time of a process started at `start`
+        (`time.perf_counter`) to the totals, returns it.
+        """
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.elapsed += elapsed
+            self.count += 1
+        return elapsed
+
+    def cancel(self):
+        """
+        Stops the running processes, the next ones will not
+        be started. Returns immediately, see the class docstring.
+        """
+        with self.lock:
+            again = self.cancelled
+            self.cancelled = True
+            procs = list(self.procs)
+            self.interrupted.update(procs)
+        for proc in procs:
+            if again:
+                self.signal(proc.terminate)
+                continue
+            try:
+                proc.stdin.write('q')
+                proc.stdin.flush()
+            except (OSError, ValueError):
+                pass  # already ended or stdin closed
+            Thread(target=self.escalate, args=(proc,), daemon=True).start()
+
+    def escalate(self, proc):
+        """
+        Terminates, then kills, the process `proc` if it does
+        not end within the deadlines.
+        """
+        for timeout, action in ((self.QUIT_TIMEOUT, proc.terminate),
+                                (self.TERM_TIMEOUT, proc.kill)):
+            try:
+                proc.wait(timeout=timeout)
+                return
+            except subprocess.TimeoutExpired:
+                self.signal(action)
+
+    @staticmethod
+    def signal(action):
+        """
+        Calls `action` (e.g. `proc.terminate`) ignoring
+        the errors of processes already ended.
+        """
+        try:
+            action()
+        except OSError:
+            pass
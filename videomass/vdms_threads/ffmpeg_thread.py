@@ -0,0 +1,330 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: ffmpeg_thread.py
+Porpose: Base class of the threads running ffmpeg processes
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of Videomass.
+
+   Videomass is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   Videomass is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import time
+import sqlite3
+from threading import Thread
+from functools import partial
+import wx
+from pubsub import pub
+from videomass.vdms_io.make_filelog import logwrite
+from videomass.vdms_io.job_journal import JOURNAL, get_journal, fingerprint
+from videomass.vdms_threads.ffmpeg_runner import (ProcessRunner,
+                                                  build_args,
+                                                  atomic_outputs,
+                                                  commit_outputs,
+                                                  abandon_outputs,
+                                                  discard_outputs,
+                                                  join_args,
+                                                  parse_cpus,
+                                                  TEMP_MARK)
+from videomass.vdms_threads.progress_dispatcher import ProgressDispatcher
+
+
+class FFmpegThread(Thread):
+    """
+    Base class of the threads which run ffmpeg processes and
+    redirect their output to the log panel by pubsub protocol
+    (see `long_processing_task.LogOut`), i.e. `OnePass`,
+    `TwoPass`, `Loudnorm`, `VidStab`, `PicturesFromVideo`,
+    `ConcatDemuxer` and `SlideshowMaker`.
+
+    The processes are run by a `ProcessRunner` with the
+    priority and the CPU affinity of the user settings, and
+    are stopped by `stop` without blocking the caller. The
+    outputs are written to temporary names renamed on success,
+    so that incomplete files never appear with the final name,
+    those of interrupted or failed processes are handled
+    according to the `partial_outputs` setting. Subclasses build
+    their commands as argument lists with `ffmpeg_args` and run
+    them with `execute`, the threads which process more files at
+    the same time set `maxjobs` (see `JobScheduler`).
+
+    The outputs of the successful commands are stamped on the
+    job journal, with the `incremental_mode` setting the commands
+    whose outputs are up to date are skipped (see `JobJournal`).
+    """
+    get = wx.GetApp()  # get videomass wx.App attribute
+    appdata = get.appset
+    OS = appdata['ostype']
+    NOT_EXIST_MSG = _("Is 'ffmpeg' installed on your system?")
+    maxjobs = 1  # ffmpeg processes at the same time
+    # ---------------------------------------------------------------
+
+    def __init__(self, logname):
+        """
+        logname: the name of the log file of the process
+        """
+        self.stop_work_thread = False  # process terminate
+        self.fatal = False  # ffmpeg can't be executed
+        self.logname = logname  # title name of file log
+        self.nul = 'NUL' if FFmpegThread.OS == 'Windows' else '/dev/null'
+        self.runner = ProcessRunner(
+            FFmpegThread.appdata['ffmpeg_niceness'],
+            parse_cpus(FFmpegThread.appdata['ffmpeg_affinity']))
+        self.events = ProgressDispatcher(partial(wx.CallAfter,
+                                                 pub.sendMessage))
+        try:
+            self.journal = get_journal(os.path.join(
+                FFmpegThread.appdata['cachedir'], JOURNAL))
+        except sqlite3.Error:
+            self.journal = None  # no resuming, no incremental mode
+        Thread.__init__(self)
+    # --------------------------------------------------------------------#
+
+    def ffmpeg_args(self, *parts):
+        """
+        Returns the argument list of a ffmpeg command with
+        the log level and the additional parameters of the
+        user settings followed by the given `parts` (see
+        `build_args`).
+        """
+        return build_args([FFmpegThread.appdata['ffmpeg_cmd']],
+                          FFmpegThread.appdata['ffmpegloglev'],
+                          FFmpegThread.appdata['ffmpeg+params'],
+                          *parts)
+    # --------------------------------------------------------------------#
+
+    def stopped(self):
+        """
+        Returns True if the remaining jobs must not be started
+        """
+        return self.stop_work_thread or self.fatal
+    # --------------------------------------------------------------------#
+
+    def execute(self, jobid, count, infile, outputs, cmd, duration,
+                workdir=None, on_line=None, reader=None):
+        """
+        Runs the `cmd` argument list in `workdir` (the current
+        working dir if None) and redirects its output and its
+        progress to the log panel. `outputs` is the output
+        pathname or a list of pathnames, `on_line` an optional
+        callable which receives each output line as well.
+        With a `reader` the command writes on stdout and is run
+        by `ProcessRunner.stream`, its progress is up to the
+        reader.
+
+        Returns the exit status of the process, 'error' if
+        ffmpeg could not be executed, 'stop' if it was
+        interrupted by `stop`. Returns 0 without running
+        the process if its outputs are up to date.
+        """
+        if not isinstance(outputs, (list, tuple)):
+            outputs = [outputs]
+        digest = fingerprint(cmd)
+        if self.up_to_date(infile, outputs, digest):
+            self.skip(jobid, count, infile, outputs, duration,
+                      'Up to date, skipped')
+            return 0
+
+        dest = '", "'.join(outputs)
+        self.events.send("COUNT_EVT",
+                         count=count,
+                         fsource=f'Source:  "{infile}"',
+                         destination=f'Destination:  "{dest}"',
+                         duration=duration,
+                         end='',
+                         jobid=jobid,
+                         )
+        cmd, temps = atomic_outputs(cmd, outputs)
+        self.journal_temps('add_temps', temps.values())
+        logwrite(f'{count}\nSource: "{infile}"\nDestination: "{dest}"'
+                 f'\n\n[COMMAND]:\n{join_args(cmd)}', '', self.logname)
+
+        def output(line):
+            self.events.send("UPDATE_EVT",
+                             output=line,
+                             duration=duration,
+                             status=0,
+                             jobid=jobid,
+                             )
+            if on_line:
+                on_line(line)
+
+        since = time.time() - 1  # mtime resolution of some filesystems
+        try:
+            if reader:
+                status, elapsed = self.runner.stream(cmd, reader, output)
+            else:
+                status, elapsed = self.runner.run(
+                    cmd, output, lambda report: self.events.send(
+                        "PROGRESS_EVT", progress=report,
+                        duration=duration, jobid=jobid), cwd=workdir)
+
+        except (OSError, FileNotFoundError) as err:
+            excepterr = f"{err}\n  {FFmpegThread.NOT_EXIST_MSG}"
+            self.events.send("COUNT_EVT",
+                             count=excepterr,
+                             fsource='',
+                             destination='',
+                             duration=0,
+                             end='error',
+                             jobid=jobid,
+                             )
+            self.fatal = True
+            self.discard(outputs, since, temps)
+            return 'error'
+
+        if status == 'stop':
+            logwrite('', "Interrupted by the user", self.logname)
+            self.discard(outputs, since, temps)
+            return status
+
+        if not status:
+            try:
+                commit_outputs(temps)
+                self.journal_temps('remove_temps', temps.values())
+            except OSError as err:
+                logwrite(f'Cannot rename the output: {err}', '',
+                         self.logname)
+                status = 1
+
+        if status:  # will add '..failed' to txtctrl
+            self.events.send("UPDATE_EVT",
+                             output='',
+                             duration=duration,
+                             status=status,
+                             jobid=jobid,
+                             )
+            logwrite('',
+                     f"Exit status: {status}",
+                     self.logname,
+                     )  # append exit error number
+            self.discard(outputs, since, temps)
+        else:  # will add '..terminated' to txtctrl
+            self.events.send("COUNT_EVT",
+                             count='',
+                             fsource='',
+                             destination='',
+                             duration=duration,
+                             end='Done',
+                             jobid=jobid,
+                             )
+            self.stamp(outputs, digest)
+        logwrite(f'Elapsed time: {elapsed:.2f} sec', '', self.logname)
+        return status
+    # --------------------------------------------------------------------#
+
+    def up_to_date(self, infile, outputs, digest):
+        """
+        With the incremental mode, returns True if the `outputs`
+        of the command with the fingerprint `digest` are up to
+        date with `infile`, see `JobJournal.up_to_date`.
+        """
+        if not FFmpegThread.appdata['incremental_mode'] or not self.journal:
+            return False
+        try:
+            return self.journal.up_to_date(infile, outputs, digest)
+        except sqlite3.Error:
+            return False
+    # --------------------------------------------------------------------#
+
+    def stamp(self, outputs, digest):
+        """
+        Stamps the `outputs` written by the command with the
+        fingerprint `digest`, see `JobJournal.stamp`. The
+        temporary files (e.g. the segments of a chunked encoding)
+        are not stamped.
+        """
+        tmpdir = os.path.join(os.path.abspath(
+            FFmpegThread.appdata['cachedir']), 'tmp', '')
+        outputs = [name for name in outputs if TEMP_MARK not in name
+                   and not os.path.abspath(name).startswith(tmpdir)]
+        if self.journal and outputs:
+            try:
+                self.journal.stamp(outputs, digest)
+            except sqlite3.Error as err:
+                logwrite(f'Job journal not available: {err}', '',
+                         self.logname)
+    # --------------------------------------------------------------------#
+
+    def skip(self, jobid, count, infile, outputs, duration, note):
+        """
+        Reports a job which is not run, e.g. with outputs
+        already up to date, `note` tells why.
+        """
+        dest = '", "'.join(outputs)
+        self.events.send("COUNT_EVT",
+                         count=f'{count} - {note}',
+                         fsource=f'Source:  "{infile}"',
+                         destination=f'Destination:  "{dest}"',
+                         duration=duration,
+                         end='',
+                         jobid=jobid,
+                         )
+        self.events.send("COUNT_EVT",
+                         count='',
+                         fsource='',
+                         destination='',
+                         duration=duration,
+                         end='Done',
+                         jobid=jobid,
+                         )
+        logwrite(f'{count} - {note}\nSource: "{infile}"\n'
+                 f'Destination: "{dest}"', '', self.logname)
+    # --------------------------------------------------------------------#
+
+    def journal_temps(self, method, temps):
+        """
+        Adds or removes (`method`) the temporary outputs
+        `temps` on the job journal, see `JobJournal.clean_temps`.
+        """
+        if self.journal and temps:
+            try:
+                getattr(self.journal, method)(temps)
+            except sqlite3.Error:
+                pass  # they will not be cleaned after a crash
+    # --------------------------------------------------------------------#
+
+    def discard(self, outputs, since, temps):
+        """
+        Deletes or quarantines the outputs of an interrupted
+        or failed process: the temporary outputs `temps` (see
+        `abandon_outputs`) and the outputs written in place
+        since `since` (see `discard_outputs`).
+        """
+        mode = FFmpegThread.appdata['partial_outputs']
+        done = abandon_outputs(temps, mode)
+        self.journal_temps('remove_temps', temps.values())
+        inplace = [path for path in outputs if path not in temps]
+        done += discard_outputs(inplace, mode, since)
+        for path, newpath in done:
+            if newpath:
+                msg = f'Partial output moved to: "{newpath}"'
+            else:
+                msg = f'Partial output deleted: "{path}"'
+            logwrite(msg, '', self.logname)
+    # --------------------------------------------------------------------#
+
+    def stop(self):
+        """
+        Sets the stop work thread and asks the running
+        processes to quit, without waiting for them (see
+        `ProcessRunner.cancel`).
+        """
+        self.stop_work_thread = True
+        self.runner.cancel()
@@ -31,7 +31,8 @@ import subprocess
 import platform
 import wx
 from pubsub import pub
-from videomass.vdms_io.make_filelog import make_log_template
+from videomass.vdms_io.make_filelog import (make_log_template,
+                                            get_logwriter)
 if not platform.system() == 'Windows':
     import shlex
 
@@ -146,14 +147,12 @@ class FilePlay(Thread):
         """
         write ffplay command log
         """
-        with open(self.logf, "a", encoding='utf8') as log:
-            log.write(f"{cmd}\n")
+        get_logwriter(self.logf).write(f"{cmd}\n")
     # ----------------------------------------------------------------#
 
     def logerror(self, error):
         """
         write ffplay errors
         """
-        with open(self.logf, "a", encoding='utf8') as logerr:
-            logerr.write(f"\n[FFMPEG] FFplay "
-                         f"OUTPUT:\n{error}\n")
+        get_logwriter(self.logf).write(f"\n[FFMPEG] FFplay "
+                                       f"OUTPUT:\n{error}\n")
@@ -25,12 +25,28 @@ This file is part of FFcuesplitter.
    You should have received a copy of the GNU General Public License
    along with FFcuesplitter.  If not, see <http://www.gnu.org/licenses/>.
 """
+import os
+import re
+import struct
 import subprocess
 import shlex
 import platform
 import json
+from concurrent.futures import ThreadPoolExecutor
 from videomass.vdms_utils.utils import Popen
 
+# ffprobe options of each profile (see `ffprobe` function):
+# `full` dumps all the format and streams data (e.g. for mediainfo),
+# `import` queries only the entries used by the file list panels,
+# `check` only the duration, to validate outputs (see `job_journal`).
+PROFILES = {'full': '-show_format -show_streams -of json',
+            'import': ('-show_entries format=filename,duration,size:'
+                       'stream=index,codec_type,codec_name,width,height,'
+                       'avg_frame_rate,pix_fmt,sample_rate '
+                       '-of json=compact=1'),
+            'check': '-show_entries format=duration -of json=compact=1',
+            }
+
 
 def from_kwargs_to_args(kwargs):
     """
@@ -46,12 +62,15 @@ def from_kwargs_to_args(kwargs):
     return args
 
 
-def ffprobe(filename, cmd='ffprobe', **kwargs):
+def ffprobe(filename, cmd='ffprobe', profile='full', **kwargs):
     """
     Run ffprobe subprocess on the specified file.
     This function always returns a tuple of two items (data, error),
     where `data` is the data representation given from the subprocess
     output, and `error` is the current status error.
+    The `profile` arg is one of the `PROFILES` keys, `import`
+    makes ffprobe print only the entries used by the file list,
+    with the same JSON layout of `full`.
 
     Raises:
         `OSError` or `FileNotFoundError` occurs if the ffprobe
@@ -74,7 +93,7 @@ def ffprobe(filename, cmd='ffprobe', **kwargs):
         >>> else:
         >>>     probe[0]
     """
-    args = (f'"{cmd}" -show_format -show_streams -of json '
+    args = (f'"{cmd}" {PROFILES[profile]} '
             f'{" ".join(from_kwargs_to_args(kwargs))} '
             f'"{filename}"'
             )
@@ -95,3 +114,209 @@ def ffprobe(filename, cmd='ffprobe', **kwargs):
         return (None, excepterr)
 
     return json.loads(output), None
+
+
+def keyframes(filename, cmd='ffprobe'):
+    """
+    Returns a tuple (times, error) where `times` is the sorted
+    list of the keyframe times (in seconds, relative to the first
+    keyframe) of the first video stream of `filename`.
+    Packets are only demuxed, not decoded, so this is fast even
+    on long files. On failure returns (None, str(error)).
+    """
+    args = (f'"{cmd}" -v error -select_streams v:0 '
+            f'-show_entries packet=pts_time,flags -of csv=p=0 '
+            f'"{filename}"'
+            )
+    args = shlex.split(args) if platform.system() != 'Windows' else args
+    try:
+        with Popen(args,
+                   stdout=subprocess.PIPE,
+                   stderr=subprocess.PIPE,
+                   universal_newlines=True,
+                   encoding='utf8',
+                   ) as proc:
+            output, error = proc.communicate()
+
+            if proc.returncode != 0:
+                return (None, f'ffprobe: {error}')
+
+    except (OSError, FileNotFoundError) as excepterr:
+        return (None, excepterr)
+
+    times = []
+    for line in output.splitlines():
+        pts, flags = (line.split(',', 1) + [''])[:2]
+        if 'K' in flags and pts not in ('', 'N/A'):
+            times.append(float(pts))
+    if not times:
+        return (None, 'ffprobe: no keyframes found')
+    times.sort()
+    return [round(t - times[0], 6) for t in times], None
+
+
+def format_size(size):
+    """
+    Formats the `size` bytes as ffprobe does with
+    the `-pretty` option, e.g. '1.364 Mibyte'.
+    """
+    for prefix in ('', 'Ki', 'Mi', 'Gi'):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        prefix = 'Ti'
+    return f'{size} byte' if not prefix else f'{size:.3f} {prefix}byte'
+
+
+def parse_value(text):
+    """
+    Parses a numeric value given by ffprobe with or without
+    the `-pretty` option, e.g. '1.363754 Mibyte', '48 KHz',
+    '48000 Hz' or '1430000', and returns it as float object
+    in the base unit (bytes, Hz, bit/s), None if not valid.
+    """
+    match = re.fullmatch(r'\s*([0-9.]+)\s*(?:([KMGTP])(i?))?[a-zA-Z/]*\s*',
+                         str(text))
+    if not match:
+        return None
+    try:
+        value = float(match.group(1))
+    except ValueError:
+        return None
+    if match.group(2):
+        power = 'KMGTP'.index(match.group(2)) + 1
+        value *= (1024 if match.group(3) else 1000) ** power
+    return value
+
+
+def read_image_header(fobj):
+    """
+    Reads the header of a still image from the `fobj` binary
+    file object. Returns a tuple (codec_name, width, height,
+    pix_fmt) for PNG, JPEG and BMP images, None for any other
+    format. GIF files are left to ffprobe since they may be
+    animated, with a duration and a frame rate. The pix_fmt
+    is None when it can't be told from the header.
+    """
+    head = fobj.read(32)
+
+    if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+        width, height, depth, color = struct.unpack('>IIBB', head[16:26])
+        pixfmts = {(8, 0): 'gray', (8, 2): 'rgb24', (8, 3): 'pal8',
+                   (8, 4): 'ya8', (8, 6): 'rgba', (16, 0): 'gray16be',
+                   (16, 2): 'rgb48be', (16, 6): 'rgba64be'}
+        return 'png', width, height, pixfmts.get((depth, color))
+
+    if head[:2] == b'BM' and len(head) >= 30:
+        width, height, _planes, bpp = struct.unpack('<iiHH', head[18:30])
+        pixfmts = {8: 'pal8', 16: 'rgb555le', 24: 'bgr24', 32: 'bgra'}
+        return 'bmp', width, abs(height), pixfmts.get(bpp)
+
+    if head[:2] == b'\xff\xd8':  # JPEG, find the SOF marker
+        fobj.seek(2)
+        while True:
+            marker = fobj.read(4)
+            if len(marker) < 4 or marker[0] != 0xff:
+                return None
+            code, length = marker[1], struct.unpack('>H', marker[2:])[0]
+            if (0xc0 <= code <= 0xcf) and code not in (0xc4, 0xc8, 0xcc):
+                sof = fobj.read(6)
+                if len(sof) < 6:
+                    return None
+                height, width, comps = struct.unpack('>HHB', sof[1:6])
+                pixfmt = 'gray' if comps == 1 else None
+                if comps == 3:
+                    pixfmt = jpeg_pixfmt(fobj.read(9))
+                return 'mjpeg', width, height, pixfmt
+            fobj.seek(length - 2, 1)
+
+    return None
+
+
+def jpeg_pixfmt(components):
+    """
+    Returns the pix_fmt of a YCbCr JPEG image given the
+    `components` specification of its SOF marker (3 bytes
+    for each component: id, sampling factors, quantization
+    table), None if the chroma subsampling is not known.
+    """
+    if len(components) < 9:
+        return None
+    luma, cb, cr = components[1], components[4], components[7]
+    if cb != cr or not cb & 0xf0 or not cb & 0x0f:
+        return None
+    horiz, hrest = divmod(luma >> 4, cb >> 4)
+    vert, vrest = divmod(luma & 0x0f, cb & 0x0f)
+    if hrest or vrest:
+        return None
+    return {(1, 1): 'yuvj444p', (2, 1): 'yuvj422p', (2, 2): 'yuvj420p',
+            (1, 2): 'yuvj440p', (4, 1): 'yuvj411p'}.get((horiz, vert))
+
+
+def probe_image(filename, pretty=False):
+    """
+    Reads in-process the header of a PNG, JPEG or BMP image
+    file, which is much faster than spawning ffprobe. The
+    duration is the one reported by ffprobe for a still
+    image, a frame at the 25 fps of the image2 demuxer.
+    Returns the data with the same layout given by `ffprobe`
+    with the `import` profile, None if `filename` is not one
+    of the above formats or can't be read.
+    """
+    try:
+        with open(filename, 'rb') as fobj:
+            header = read_image_header(fobj)
+        size = os.path.getsize(filename)
+    except (OSError, struct.error):
+        return None
+    if not header:
+        return None
+
+    codec, width, height, pixfmt = header
+    stream = {'index': 0, 'codec_name': codec, 'codec_type': 'video',
+              'width': width, 'height': height}
+    if pixfmt:
+        stream['pix_fmt'] = pixfmt
+    return {'format': {'filename': filename,
+                       'duration': '0:00:00.040000' if pretty else '0.040000',
+                       'size': format_size(size) if pretty else str(size)},
+            'streams': [stream]}
+
+
+def ffprobe_batch(filenames, cmd='ffprobe', workers=4, probe=None, **kwargs):
+    """
+    Probes many files at once, amortising the cost of the
+    ffprobe process startup: still images (see `probe_image`)
+    are read in-process, the other files are probed by
+    `workers` concurrent ffprobe processes.
+
+    `probe` is the function used to run ffprobe, with the
+    same signature of `ffprobe` (default), e.g. the `ffprobe`
+    method of a `ProbeCache` instance.
+
+    Returns the list of (data, error) tuples as returned by
+    `ffprobe` in the same order of `filenames`.
+    """
+    probe = probe or ffprobe
+    pretty = 'pretty' in kwargs
+    results = [None] * len(filenames)
+    todo = []
+    for idx, name in enumerate(filenames):
+        data = probe_image(name, pretty)
+        if data:
+            results[idx] = (data, None)
+        else:
+            todo.append(idx)
+
+    if workers > 1 and len(todo) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            probed = pool.map(lambda idx: probe(filenames[idx], cmd,
+                                                **kwargs), todo)
+            for idx, res in zip(todo, probed):
+                results[idx] = res
+    else:
+        for idx in todo:
+            results[idx] = probe(filenames[idx], cmd, **kwargs)
+
+    return results
@@ -30,6 +30,7 @@ import subprocess
 import wx
 from pubsub import pub
 from videomass.vdms_utils.utils import Popen
+from videomass.vdms_io.make_filelog import get_logwriter
 if not platform.system() == 'Windows':
     import shlex
 
@@ -119,14 +120,12 @@ class FFmpegGenericTask(Thread):
         """
         write ffmpeg command log
         """
-        with open(self.logfile, "a", encoding='utf8') as log:
-            log.write(f"{cmd}\n")
+        get_logwriter(self.logfile).write(f"{cmd}\n")
     # ----------------------------------------------------------------#
 
     def logerror(self):
         """
         write ffmpeg volumedected errors
         """
-        with open(self.logfile, "a", encoding='utf8') as logerr:
-            logerr.write(f"\n[FFMPEG] generic_task "
-                         f"ERRORS:\n{self.status}\n")
+        get_logwriter(self.logfile).write(f"\n[FFMPEG] generic_task "
+                                          f"ERRORS:\n{self.status}\n")
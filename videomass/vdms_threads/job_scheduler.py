@@ -0,0 +1,140 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: job_scheduler.py
+Porpose: Runs batches of ffmpeg jobs concurrently
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of Videomass.
+
+   Videomass is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   Videomass is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import bisect
+from concurrent.futures import ThreadPoolExecutor
+
+
+def ffmpeg_threads(ffthreads):
+    """
+    Given the `ffthreads` setting string (e.g. '-threads 4')
+    returns the number of threads as int object. Returns 0
+    (ffmpeg auto-detection) if the value is missing or invalid.
+    """
+    try:
+        return int(ffthreads.split()[-1])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+def concurrent_jobs(maxjobs, ffthreads, cpus=None):
+    """
+    Returns the number of ffmpeg processes to run concurrently.
+    If `maxjobs` is a positive integer it is returned as is,
+    otherwise (0 means auto) it is derived from the number of
+    CPU cores and the threads used by each ffmpeg process, so
+    that the cores are not over-subscribed. When ffmpeg threads
+    are auto-detected (0) one process already uses all the cores.
+    """
+    if maxjobs and maxjobs > 0:
+        return int(maxjobs)
+
+    cpus = cpus or os.cpu_count() or 1
+    threads = ffmpeg_threads(ffthreads)
+    if threads <= 0:
+        return 1
+    return max(1, cpus // threads)
+
+
+def split_timeline(keyframes, duration, chunks, minimum=30.0):
+    """
+    Splits a timeline of `duration` seconds into `chunks`
+    segments of about the same length which start on the given
+    `keyframes` (a sorted list of keyframe times in seconds,
+    relative to the start of the file), so that each segment
+    can be encoded separately and the resulting files can be
+    joined without seams. Segments shorter than `minimum`
+    seconds are merged with the previous one.
+
+    Returns a list of (start, length) tuples in seconds, where
+    the length of the last segment is None (up to the end).
+    """
+    cuts = [0.0]
+    for num in range(1, chunks):
+        idx = bisect.bisect_left(keyframes, duration * num / chunks)
+        if idx == len(keyframes):
+            break
+        cut = keyframes[idx]
+        if cut - cuts[-1] >= minimum and duration - cut >= minimum:
+            cuts.append(cut)
+
+    segments = [(start, round(end - start, 6)) for start, end
+                in zip(cuts, cuts[1:])]
+    segments.append((cuts[-1], None))
+    return segments
+
+
+class JobScheduler:
+    """
+    Runs a batch of jobs on a bounded pool of worker threads,
+    each job usually spawning and waiting for a ffmpeg process.
+    The results are returned in the same order as the given
+    jobs, regardless of their completion order.
+
+    Usage:
+        >>> scheduler = JobScheduler(4, stop=lambda: thread.stopped)
+        >>> results = scheduler.map(thread.process_file, items)
+
+    Each item of `items` is a tuple of arguments; the job
+    function is called as `func(jobid, *item)` where `jobid`
+    is the 1-based position of the item in the batch. Jobs not
+    yet started when `stop()` returns True are skipped and their
+    result is None.
+    """
+
+    def __init__(self, maxjobs=1, stop=None):
+        """
+        maxjobs: max number of jobs running at the same time
+        stop: a callable object returning True to skip pending jobs
+        """
+        self.maxjobs = max(1, int(maxjobs))
+        self.stop = stop if stop else lambda: False
+
+    def _job(self, func, jobid, item):
+        """
+        Runs a single job unless the scheduler has been stopped
+        """
+        if self.stop():
+            return None
+        return func(jobid, *item)
+
+    def map(self, func, items):
+        """
+        Runs `func` on each item and returns the list of results.
+        With `maxjobs` equal to 1 the jobs run sequentially in the
+        calling thread.
+        """
+        items = list(items)
+        if self.maxjobs == 1 or len(items) < 2:
+            return [self._job(func, jobid, item) for jobid, item
+                    in enumerate(items, start=1)]
+
+        workers = min(self.maxjobs, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._job, func, jobid, item)
+                       for jobid, item in enumerate(items, start=1)]
+            return [fut.result() for fut in futures]
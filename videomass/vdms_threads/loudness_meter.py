@@ -0,0 +1,543 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: loudness_meter.py
+Porpose: ITU-R BS.1770 loudness meter of decoded PCM audio
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of Videomass.
+
+   Videomass is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   Videomass is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import math
+import struct
+import functools
+from collections import deque
+from videomass.vdms_threads.ffmpeg_runner import pcm_args
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None  # the meter is not available, see `available`
+
+HOP = 0.1  # seconds of the sub-blocks, gating blocks overlap by 75%
+BLOCK = 4  # sub-blocks of a gating block (400 ms)
+SHORT_TERM = 30  # sub-blocks of the short-term loudness (3 s)
+ABSOLUTE_GATE = -70.0  # LUFS
+RELATIVE_GATE = -10.0  # LU, integrated loudness
+LRA_GATE = -20.0  # LU, loudness range
+SEGMENT = 10.0  # default seconds of the segment statistics
+IR_SECONDS = 0.1  # length of the K-weighting impulse response
+READ_SECONDS = 2.0  # audio read from the pipe at a time
+TAIL = 100  # error lines reported
+METER = 'meter'  # kind of the measurements stored on the probe cache
+LFE = 0x8  # WAVE_FORMAT_EXTENSIBLE channel mask bits
+SURROUND = 0x10 | 0x20 | 0x200 | 0x400  # back and side left/right
+
+
+def available():
+    """
+    Returns True if NumPy is installed and the meter can be used
+    """
+    return numpy is not None
+
+
+def decibels(value, power=True):
+    """
+    Returns `value` in decibels, of a power (mean square) or
+    of an amplitude (peak) if `power` is False; -inf for 0.
+    """
+    if value <= 0:
+        return -math.inf
+    return (10 if power else 20) * math.log10(value)
+
+
+def channel_weights(channels, mask=0):
+    """
+    Returns the BS.1770 weights of the channels given the
+    WAVE_FORMAT_EXTENSIBLE channel `mask`: 1.41 for the
+    surround channels, 0 for LFE and 1 for the other ones.
+    """
+    weights = []
+    bit = 1
+    while len(weights) < channels and bit < 1 << 18:
+        if mask & bit:
+            weights.append(0.0 if bit == LFE else
+                           1.41 if bit & SURROUND else 1.0)
+        bit <<= 1
+    return weights + [1.0] * (channels - len(weights))
+
+
+def read_chunk(stream, size):
+    """
+    Reads exactly `size` bytes of a WAV header
+    """
+    data = stream.read(size)
+    if len(data) < size:
+        raise ValueError('Truncated WAV header')
+    return data
+
+
+def read_wav_header(stream):
+    """
+    Reads the header of a WAV stream of 32-bit float samples
+    (see `ffmpeg_runner.pcm_args`) up to the first sample.
+    Returns a tuple (sample rate, channels, BS.1770 weights of
+    the channels), None if the stream is empty. Raises
+    ValueError if the stream is not as expected.
+    """
+    head = stream.read(12)
+    if not head:
+        return None
+    riff, _size, wave = struct.unpack('<4sI4s', head + read_chunk(
+        stream, 12 - len(head)) if len(head) < 12 else head)
+    if riff not in (b'RIFF', b'RF64') or wave != b'WAVE':
+        raise ValueError('Not a WAV stream')
+    fmt = None
+    while True:
+        ckid, cksize = struct.unpack('<4sI', read_chunk(stream, 8))
+        if ckid == b'data':
+            break
+        body = read_chunk(stream, cksize + (cksize & 1))
+        if ckid == b'fmt ':
+            fmt = body
+    if fmt is None or len(fmt) < 16:
+        raise ValueError('Missing WAV format')
+    tag, channels, rate = struct.unpack('<HHI', fmt[:8])
+    bits = struct.unpack('<H', fmt[14:16])[0]
+    mask = 0
+    if tag == 0xFFFE and len(fmt) >= 26:  # WAVE_FORMAT_EXTENSIBLE
+        mask, tag = struct.unpack('<IH', fmt[20:26])
+    if tag != 3 or bits != 32 or not channels or not rate:
+        raise ValueError('Not a stream of 32-bit float samples')
+    return rate, channels, channel_weights(channels, mask)
+
+
+@functools.lru_cache()
+def k_weighting(rate):
+    """
+    Returns the (b, a) coefficients of the K-weighting filter
+    (high shelf pre-filter and RLB high pass) at the sample
+    `rate`, derived as libebur128 does: at 48 kHz they are
+    those of ITU-R BS.1770.
+    """
+    freq, gain, qual = 1681.974450955533, 3.999843853973347, \
+        0.7071752369554196
+    k = math.tan(math.pi * freq / rate)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / qual + k * k
+    shelf_b = [(vh + vb * k / qual + k * k) / a0, 2 * (k * k - vh) / a0,
+               (vh - vb * k / qual + k * k) / a0]
+    shelf_a = [1.0, 2 * (k * k - 1) / a0, (1 - k / qual + k * k) / a0]
+
+    freq, qual = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * freq / rate)
+    a0 = 1 + k / qual + k * k
+    pass_b = [1.0, -2.0, 1.0]
+    pass_a = [1.0, 2 * (k * k - 1) / a0, (1 - k / qual + k * k) / a0]
+    return numpy.convolve(shelf_b, pass_b), numpy.convolve(shelf_a, pass_a)
+
+
+@functools.lru_cache()
+def k_impulse(rate):
+    """
+    Returns the impulse response of the K-weighting filter at
+    the sample `rate`, truncated to IR_SECONDS where it has
+    decayed far below the float precision.
+    """
+    coef_b, coef_a = (x.tolist() for x in k_weighting(rate))
+    out = [0.0] * 4
+    response = []
+    for num in range(int(rate * IR_SECONDS)):
+        value = coef_b[num] if num < len(coef_b) else 0.0
+        value -= (coef_a[1] * out[-1] + coef_a[2] * out[-2]
+                  + coef_a[3] * out[-3] + coef_a[4] * out[-4])
+        out = out[1:] + [value]
+        response.append(value)
+    return numpy.array(response)
+
+
+@functools.lru_cache()
+def oversampling(factor, taps=12):
+    """
+    Returns the polyphase interpolation filter used to find
+    the true peak: an array of `factor` phases of `taps`
+    coefficients (a Kaiser windowed sinc) with unity gain.
+    """
+    length = factor * taps
+    times = (numpy.arange(length) - (length - 1) / 2) / factor
+    coefs = numpy.sinc(times) * numpy.kaiser(length, 5.0)
+    phases = coefs.reshape(taps, factor).T[:, ::-1]
+    return phases / phases.sum(axis=1, keepdims=True)
+
+
+class Convolver:
+    """
+    Filters a stream of multichannel blocks with a FIR by the
+    overlap-add FFT method, the tail of each block is added to
+    the next one.
+    """
+
+    def __init__(self, response, channels):
+        """
+        response: the FIR coefficients (1-D array)
+        channels: number of channels of the blocks
+        """
+        self.response = response
+        self.tail = numpy.zeros((channels, len(response) - 1))
+        self.spectra = {}  # FIR spectrum by FFT size
+
+    def __call__(self, block):
+        """
+        Returns the filtered `block` (channels, frames)
+        """
+        frames, length = block.shape[1], len(self.response)
+        size = 1 << (frames + length - 2).bit_length()
+        if size not in self.spectra:
+            self.spectra[size] = numpy.fft.rfft(self.response, size)
+        out = numpy.fft.irfft(numpy.fft.rfft(block, size)
+                              * self.spectra[size], size)
+        out = out[:, :frames + length - 1]
+        out[:, :length - 1] += self.tail
+        self.tail = out[:, frames:].copy()
+        return out[:, :frames]
+
+
+def gated_loudness(energies, gate=RELATIVE_GATE):
+    """
+    Returns a tuple (loudness, relative threshold) in LUFS of
+    the mean square `energies` of the gating blocks (already
+    weighted and summed over the channels), with the absolute
+    gate and the relative one `gate` LU below the loudness
+    of the blocks above the absolute gate.
+    """
+    energies = energies[energies > 10 ** ((ABSOLUTE_GATE + 0.691) / 10)]
+    if not energies.size:
+        return -math.inf, -math.inf
+    threshold = -0.691 + decibels(energies.mean()) + gate
+    gated = energies[energies > 10 ** ((threshold + 0.691) / 10)]
+    if not gated.size:
+        return -math.inf, threshold
+    return -0.691 + decibels(gated.mean()), threshold
+
+
+def loudness_range(energies):
+    """
+    Returns the loudness range (EBU Tech 3342) in LU of the
+    short-term `energies`: the spread between the 10th and the
+    95th percentile of the gated short-term loudness.
+    """
+    energies = energies[energies > 10 ** ((ABSOLUTE_GATE + 0.691) / 10)]
+    if not energies.size:
+        return 0.0
+    threshold = -0.691 + decibels(energies.mean()) + LRA_GATE
+    gated = energies[energies > 10 ** ((threshold + 0.691) / 10)]
+    if not gated.size:
+        return 0.0
+    loudness = -0.691 + 10 * numpy.log10(gated)
+    low, high = numpy.percentile(loudness, [10, 95])
+    return max(0.0, float(high - low))
+
+
+def moving_mean(values, width):
+    """
+    Returns the means of the `width` consecutive `values`
+    (a 1-D array) at each position.
+    """
+    if len(values) < width:
+        return numpy.empty(0)
+    sums = numpy.cumsum(numpy.concatenate(([0.0], values)))
+    return (sums[width:] - sums[:-width]) / width
+
+
+class LoudnessMeter:
+    """
+    ITU-R BS.1770 loudness meter of a stream of float samples,
+    which are processed in blocks as they come with vectorised
+    NumPy operations: integrated loudness (gated), loudness range
+    (EBU Tech 3342), true peak (4x oversampled below 96 kHz),
+    sample peak and RMS level, for the whole signal, for each
+    channel and for each segment of `segment` seconds.
+
+    Usage:
+        >>> meter = LoudnessMeter(48000, 2)
+        >>> for block in blocks:  # e.g. numpy.frombuffer(data, '<f4')
+        ...     meter.feed(block)
+        >>> meter.result()['integrated']
+
+    Only the mean square of each 100 ms sub-block is kept, so
+    the memory used is small even with long files.
+    """
+
+    def __init__(self, rate, channels, weights=None, segment=SEGMENT):
+        """
+        rate: sample rate in Hz
+        channels: number of channels
+        weights: BS.1770 weights of the channels, see
+                 `channel_weights` (all 1 if None)
+        segment: seconds of the segment statistics
+        """
+        self.rate = rate
+        self.channels = channels
+        self.weights = numpy.array(weights or [1.0] * channels)
+        self.segment = max(1, round(segment / HOP))  # sub-blocks
+        self.hop = max(1, round(rate * HOP))  # frames of a sub-block
+        self.kfilter = Convolver(k_impulse(rate), channels)
+        factor = 4 if rate < 96000 else 2 if rate < 192000 else 1
+        self.phases = oversampling(factor) if factor > 1 else None
+        taps = self.phases.shape[1] if factor > 1 else 1
+        self.history = numpy.zeros((channels, taps - 1))
+        self.pending = numpy.empty((channels, 0))  # K-weighted squares
+        self.pending_peaks = numpy.empty(0)
+        self.powers = []  # mean squares of the sub-blocks by channel
+        self.peaks = []  # sample peaks of the sub-blocks
+        self.frames = 0
+        self.sumsq = numpy.zeros(channels)
+        self.peak = numpy.zeros(channels)
+        self.true_peak = numpy.zeros(channels)
+    # ----------------------------------------------------------------#
+
+    @property
+    def duration(self):
+        """seconds of audio measured so far"""
+        return self.frames / self.rate
+    # ----------------------------------------------------------------#
+
+    def feed(self, samples):
+        """
+        Measures the `samples`, an array of interleaved samples
+        or of shape (frames, channels).
+        """
+        # one row for each channel, the reductions are along rows
+        block = numpy.asarray(samples, dtype=numpy.float64).reshape(
+            -1, self.channels).T.copy()
+        if not block.size:
+            return
+        self.frames += block.shape[1]
+        self.sumsq += numpy.einsum('ij,ij->i', block, block)
+        magnitude = numpy.abs(block)
+        self.peak = numpy.maximum(self.peak, magnitude.max(axis=1))
+        self.true_peak = numpy.maximum(self.true_peak,
+                                       self.interpolated_peak(block))
+
+        weighted = self.kfilter(block)
+        self.pending = numpy.concatenate((self.pending,
+                                          weighted * weighted), axis=1)
+        self.pending_peaks = numpy.concatenate((self.pending_peaks,
+                                                magnitude.max(axis=0)))
+        full = self.pending.shape[1] // self.hop * self.hop
+        if full:
+            self.powers.append(self.pending[:, :full].reshape(
+                self.channels, -1, self.hop).mean(axis=2).T)
+            self.peaks.append(self.pending_peaks[:full].reshape(
+                -1, self.hop).max(axis=1))
+            self.pending = self.pending[:, full:]
+            self.pending_peaks = self.pending_peaks[full:]
+    # ----------------------------------------------------------------#
+
+    def interpolated_peak(self, block):
+        """
+        Returns the true peak of each channel of `block`
+        (channels, frames)
+        """
+        if self.phases is None:
+            return numpy.abs(block).max(axis=1)
+        # single precision is more than enough and twice as fast
+        signal = numpy.concatenate((self.history, block),
+                                   axis=1).astype(numpy.float32)
+        taps = self.phases.shape[1]
+        frames = block.shape[1]
+        peak = numpy.zeros(self.channels)
+        out = numpy.empty_like(signal[:, :frames])
+        term = numpy.empty_like(out)
+        for phase in self.phases:
+            numpy.multiply(signal[:, :frames], numpy.float32(phase[0]),
+                           out=out)
+            for tap in range(1, taps):
+                numpy.multiply(signal[:, tap:tap + frames],
+                               numpy.float32(phase[tap]), out=term)
+                out += term
+            peak = numpy.maximum(peak, numpy.maximum(out.max(axis=1),
+                                                     -out.min(axis=1)))
+        self.history = signal[:, frames:]
+        return peak
+    # ----------------------------------------------------------------#
+
+    def result(self):
+        """
+        Returns the measurements as dict (levels in dB):
+
+            integrated, threshold (relative gate), lra, true_peak,
+            peak, rms: of the whole signal
+            channels: list of dicts of each channel with the
+                      integrated, true_peak, peak and rms keys
+            segments: list of dicts of each segment with the
+                      start (seconds), integrated and peak keys
+            rate, duration (seconds)
+        """
+        powers = (numpy.concatenate(self.powers) if self.powers
+                  else numpy.empty((0, self.channels)))
+        peaks = (numpy.concatenate(self.peaks) if self.peaks
+                 else numpy.empty(0))
+        weighted = powers @ self.weights
+        blocks = moving_mean(weighted, BLOCK)
+        integrated, threshold = gated_loudness(blocks)
+        frames = max(self.frames, 1)
+        channels = [{'integrated': gated_loudness(moving_mean(power,
+                                                              BLOCK))[0],
+                     'true_peak': decibels(self.true_peak[num], False),
+                     'peak': decibels(self.peak[num], False),
+                     'rms': decibels(self.sumsq[num] / frames)}
+                    for num, power in enumerate(powers.T)]
+        segments = []
+        for start in range(0, len(weighted), self.segment):
+            segments.append({'start': round(start * HOP, 3),
+                             'integrated': gated_loudness(
+                                 blocks[start:start + self.segment])[0],
+                             'peak': decibels(peaks[start:start
+                                                    + self.segment].max(),
+                                              False)})
+        return {'integrated': integrated,
+                'threshold': threshold,
+                'lra': loudness_range(moving_mean(weighted, SHORT_TERM)),
+                'true_peak': decibels(self.true_peak.max(initial=0), False),
+                'peak': decibels(self.peak.max(initial=0), False),
+                'rms': decibels(self.sumsq.sum() / frames / self.channels),
+                'channels': channels,
+                'segments': segments,
+                'rate': self.rate,
+                'duration': self.duration,
+                }
+
+
+class MeterReader:
+    """
+    Reads the WAV stream written by ffmpeg to its stdout (see
+    `ffmpeg_runner.pcm_args`) and measures it while it is
+    read, to be passed as reader to `ProcessRunner.stream`.
+    On return, `meter` is the `LoudnessMeter` used (None if
+    no audio was read) and `error` the reason of a failure.
+    """
+
+    def __init__(self, segment=SEGMENT, progress=None):
+        """
+        segment: seconds of the segment statistics
+        progress: callable object called with the seconds of
+                  audio measured so far after each block read
+        """
+        self.segment = segment
+        self.progress = progress
+        self.meter = None
+        self.error = None
+
+    def __call__(self, stdout):
+        """
+        Measures the `stdout` binary stream up to its end
+        """
+        try:
+            header = read_wav_header(stdout)
+        except (ValueError, struct.error) as err:
+            self.error = str(err)
+            return
+        if header is None:
+            return
+        rate, channels, weights = header
+        self.meter = LoudnessMeter(rate, channels, weights, self.segment)
+        framesize = channels * 4
+        size = max(1, round(rate * READ_SECONDS)) * framesize
+        rest = b''
+        while True:
+            data = stdout.read(size)
+            if not data:
+                break
+            data = rest + data
+            usable = len(data) - len(data) % framesize
+            rest = data[usable:]
+            self.meter.feed(numpy.frombuffer(data[:usable], dtype='<f4'))
+            if self.progress:
+                self.progress(self.meter.duration)
+
+
+def measure_file(runner, ffmpeg, infile, timeseq='', stream='',
+                 segment=SEGMENT, progress=None):
+    """
+    Decodes the audio of `infile` with a ffmpeg process run by
+    `runner` (a `ProcessRunner`) and measures the samples
+    while they are decoded. `timeseq` and `stream` are those of
+    `ffmpeg_runner.pcm_args`, `segment` and `progress` those of
+    `MeterReader`.
+
+    Returns a tuple (status, result, error) where `result` is
+    the dict of `LoudnessMeter.result()` or None on failure
+    and `error` the last error lines of ffmpeg.
+    """
+    reader = MeterReader(segment, progress)
+    errors = deque(maxlen=TAIL)
+    status = runner.stream(pcm_args(ffmpeg, infile, timeseq, stream),
+                           reader, errors.append)[0]
+    if status == 0 and reader.meter is None:
+        errors.append(f'{reader.error or "No audio stream to measure"}\n')
+        status = 1
+    elif reader.error:
+        errors.append(f'{reader.error}\n')
+    if status != 0:
+        return status, None, ''.join(errors)
+    return status, reader.meter.result(), ''
+
+
+def volumedetect_stats(result):
+    """
+    Returns the meter `result` as the statistics of the
+    ffmpeg volumedetect filter
+    """
+    return {'max_volume': f"{max(result['peak'], -99.0):.1f}",
+            'mean_volume': f"{max(result['rms'], -99.0):.1f}"}
+
+
+def loudnorm_stats(result):
+    """
+    Returns the meter `result` as the input measurements
+    printed by the ffmpeg loudnorm filter, limited to the
+    ranges of the measured_* options of the filter.
+    """
+    return {'Input Integrated': f"{max(result['integrated'], -99.0):.2f}",
+            'Input True Peak': f"{max(result['true_peak'], -99.0):.2f}",
+            'Input LRA': f"{min(result['lra'], 99.0):.2f}",
+            'Input Threshold': f"{max(result['threshold'], -99.0):.2f}"}
+
+
+def report(result):
+    """
+    Returns the meter `result` as text lines for the log
+    """
+    lines = [f"Integrated: {result['integrated']:.1f} LUFS, "
+             f"Threshold: {result['threshold']:.1f} LUFS, "
+             f"LRA: {result['lra']:.1f} LU, "
+             f"True peak: {result['true_peak']:.1f} dBTP, "
+             f"Peak: {result['peak']:.1f} dBFS, "
+             f"RMS: {result['rms']:.1f} dBFS"]
+    for num, chan in enumerate(result['channels'], start=1):
+        lines.append(f"Channel {num}: {chan['integrated']:.1f} LUFS, "
+                     f"true peak {chan['true_peak']:.1f} dBTP, "
+                     f"peak {chan['peak']:.1f} dBFS, "
+                     f"RMS {chan['rms']:.1f} dBFS")
+    for seg in result['segments']:
+        lines.append(f"Segment {seg['start']:.1f}s: "
+                     f"{seg['integrated']:.1f} LUFS, "
+                     f"peak {seg['peak']:.1f} dBFS")
+    return lines
@@ -6,7 +6,7 @@ Compatibility: Python3, wxPython4 Phoenix
 Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
 Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
 license: GPL3
-Rev: Dec.02.2022
+Rev: Oct.18.2026
 Code checker: flake8, pylint
 
 This file is part of Videomass.
@@ -24,21 +24,97 @@ This file is part of Videomass.
    You should have received a copy of the GNU General Public License
    along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
 """
-from threading import Thread
+import os
 import time
 import json
 import itertools
-import subprocess
-import platform
+import sqlite3
 import wx
-from pubsub import pub
-from videomass.vdms_utils.utils import Popen
 from videomass.vdms_io.make_filelog import logwrite
-if not platform.system() == 'Windows':
-    import shlex
+from videomass.vdms_threads.ffmpeg_thread import FFmpegThread
+from videomass.vdms_threads.ffmpeg_runner import (split_args, build_args,
+                                                  temp_output)
+from videomass.vdms_threads.job_scheduler import (JobScheduler,
+                                                  concurrent_jobs,
+                                                  split_timeline)
+from videomass.vdms_threads.ffprobe import keyframes
+from videomass.vdms_io.probe_cache import get_cache, DBNAME
+from videomass.vdms_threads.concat_demuxer import concat_list
+from videomass.vdms_io.job_journal import valid_output
 
+# pass options that cannot be shared by outputs fed from the same decoder
+UNFUSABLE_OPTS = ('-ss', '-sseof', '-t', '-to', '-itsoffset', '-i',
+                  '-map', '-filter_complex', '-lavfi', '-vn',
+                  )
+VIDEO_FILTER_OPTS = ('-vf', '-filter:v', '-filter:v:0')
+# a video stream coming from a filtergraph can't be stream copied
+VIDEO_CODEC_OPTS = ('-c', '-codec', '-c:v', '-codec:v', '-vcodec',
+                    '-c:v:0', '-codec:v:0')
 
-class OnePass(Thread):
+
+def fuse_passes(passes):
+    """
+    Compiles the `Passes` of a preset (a list of
+    [ffmpeg args, suffix] items) into a single ffmpeg
+    invocation with one input and N outputs, using a `split`
+    based filtergraph, so that the source is demuxed and
+    decoded only once.
+
+    Each pass video filter (-vf, -filter:v) is moved into the
+    filtergraph, the first audio stream (if any) is mapped on
+    each output. Unlike the default stream selection of ffmpeg,
+    subtitles are not mapped and the audio stream is the first
+    one rather than the one with most channels: presets which
+    need other streams set their own -map, which is not fused.
+
+    Returns a tuple (graph, [output args, ...]) where `graph`
+    is the `-filter_complex` argument and output args are
+    the argument lists of each pass. Returns None if the
+    passes can't be fused (e.g. a single pass, pass options
+    such as seeking which are input-wide or a video stream
+    copy). The source must have a video stream, see
+    `OnePass.has_video`.
+    """
+    if len(passes) < 2:
+        return None
+
+    filters, outargs = [], []
+    for item in passes:
+        try:
+            args = split_args(item[0])
+        except ValueError:  # unbalanced quotes
+            return None
+        if [x for x in args if x in UNFUSABLE_OPTS]:
+            return None
+        if [x for x, value in zip(args, args[1:])
+                if x in VIDEO_CODEC_OPTS and value == 'copy']:
+            return None
+        vfilter = None
+        for opt in VIDEO_FILTER_OPTS:
+            while opt in args:
+                idx = args.index(opt)
+                if vfilter is not None or idx + 1 == len(args):
+                    return None  # more than one chain or missing value
+                vfilter = args[idx + 1]
+                del args[idx:idx + 2]
+        filters.append(vfilter)
+        outargs.append(args)
+
+    labels = ''.join(f'[s{n}]' for n in range(len(passes)))
+    graph = [f'[0:v:0]split={len(passes)}{labels}']
+    maps = []
+    for num, vfilter in enumerate(filters):
+        if vfilter:
+            graph.append(f'[s{num}]{vfilter}[v{num}]')
+            maps.append(['-map', f'[v{num}]', '-map', '0:a:0?'])
+        else:
+            maps.append(['-map', f'[s{num}]', '-map', '0:a:0?'])
+
+    return (';'.join(graph),
+            [mapping + args for mapping, args in zip(maps, outargs)])
+
+
+class OnePass(FFmpegThread):
     """
     This class represents a separate thread for running processes,
     which need to read the stdout/stderr in real time.
@@ -47,29 +123,31 @@ class OnePass(Thread):
     https://stackoverflow.com/questions/1388753/how-to-get-output-
     from-subprocess-popen-proc-stdout-readline-blocks-no-dat?rq=1
     """
-    get = wx.GetApp()  # get videomass wx.App attributes
-    appdata = get.appset
-    NOT_EXIST_MSG = _("Is 'ffmpeg' installed on your system?")
+    CHUNK_MIN = 30.0  # min length of the segments in seconds
     # ---------------------------------------------------------------
 
-    def __init__(self, logname, duration, timeseq, *args):
+    def __init__(self, logname, duration, timeseq, *args, resume=None):
         """
         Called from `long_processing_task.topic_thread`.
         Also see `main_frame.switch_to_processing`.
+        `resume` is the unfinished batch to resume, as returned
+        by `JobJournal.unfinished`.
         """
-        self.stop_work_thread = False  # process terminate
+        FFmpegThread.__init__(self, logname)
+        self.args = args  # recorded on the job journal
         self.input_flist = args[1]  # list of infile (items)
         self.command = args[4]  # comand set on single pass
         self.output_flist = args[3]  # output path
         self.duration = duration  # duration list
         self.volume = args[7]  # (lista norm.)se non richiesto rimane None
-        self.count = 0  # count first for loop
         self.countmax = len(args[1])  # length file list
-        self.logname = logname  # title name of file log
         self.time_seq = timeseq  # a time segment
         self.out_extension = args[2]
-
-        Thread.__init__(self)
+        self.fused = None  # fused passes, see `fuse_passes`
+        self.resume = resume
+        self.batch = None  # batch id on the journal, see `begin_journal`
+        self.maxjobs = concurrent_jobs(OnePass.appdata['concurrent_jobs'],
+                                       OnePass.appdata['ffthreads'])
 
         self.start()  # start the thread
 
@@ -79,123 +157,304 @@ class OnePass(Thread):
         """
         try:
             self.command = json.loads(self.command)
-            
+
         except json.decoder.JSONDecodeError as err:
             msg = _('You dun goofed with that there preset you got there. '
                     'Make sure it is formatted as:\n'
                     '[["ffmpeg command", "Suffix"],\n'
                     '["ffmpeg command", "Suffix"],\n'
                     '...]\nYou sent this:\n')
-            wx.MessageBox('\nERROR: {0}\n{1}\n{2}'.format(err, msg,self.command),
-                      ("Videomass"), wx.ICON_ERROR | wx.OK, None)
-
-            return 'error'
-        
-        self.countmax *= len(self.command)
-
-        filedone = []
-        for (infile,
-             outfile,
-             volume,
-             duration) in itertools.zip_longest(self.input_flist,
-                                                self.output_flist,
-                                                self.volume,
+            wx.CallAfter(wx.MessageBox,
+                         f'\nERROR: {err}\n{msg}\n{self.command}',
+                         "Videomass", wx.ICON_ERROR | wx.OK, None)
+            self.events.send("END_EVT", msg=[])
+            return
+
+        if OnePass.appdata['fused_multipass']:
+            self.fused = fuse_passes(self.command)
+
+        items = list(itertools.zip_longest(self.input_flist,
+                                           self.output_flist,
+                                           self.volume,
+                                           self.duration,
+                                           fillvalue='',
+                                           ))
+        filedone = None
+        if (OnePass.appdata['chunked_encoding'] and self.maxjobs > 1
+                and len(items) == 1 and not self.time_seq
+                and not self.resume):
+            filedone = self.process_chunks(*items[0])
+
+        if filedone is None:
+            self.begin_journal()
+            scheduler = JobScheduler(self.maxjobs, stop=self.stopped)
+            filedone = [infile for infile in
+                        scheduler.map(self.process_file, items) if infile]
+            if self.journal and not self.stopped():
+                self.journal.finish(self.batch)
+
+        time.sleep(.5)
+        self.events.send("END_EVT", msg=filedone)
+    # --------------------------------------------------------------------#
+
+    def process_file(self, jobid, infile, outfile, volume, duration,
+                     timeseq=None, total=None):
+        """
+        Runs all the preset passes on the given `infile`,
+        this is a single job of the scheduler. `timeseq` and
+        `total` are given for the segments of a chunked
+        encoding only, see `process_chunks`.
+        Returns `infile` if all the passes were successful,
+        None otherwise.
+        """
+        tseq = self.time_seq if timeseq is None else timeseq
+        passes = [self.pass_job(infile, outfile, volume, command, tseq)
+                  for command in self.command]
+        jobs = passes
+        if self.fused and (total or self.has_video(infile)):
+            jobs = [self.fused_job(infile, outfile, volume, self.fused,
+                                   tseq)]
+
+        if self.resume and not total and self.already_done(jobs, duration):
+            return self.skip_file(jobid, infile, jobs, duration)
+
+        self.events.send("JOB_EVT",
+                         jobid=jobid,
+                         fname=infile,
+                         state='start',
+                         total=total,
+                         )
+        done = self.run_jobs(jobid, infile, jobs, duration, total)
+        if not done and jobs is not passes and not self.stopped():
+            logwrite('The fused passes failed, running them one by one',
+                     '', self.logname)
+            done = self.run_jobs(jobid, infile, passes, duration, total)
+
+        self.events.send("JOB_EVT",
+                         jobid=jobid,
+                         fname=infile,
+                         state='end',
+                         )
+        return infile if done else None
+    # --------------------------------------------------------------------#
+
+    def run_jobs(self, jobid, infile, jobs, duration, total=None):
+        """
+        Runs the ffmpeg `jobs` of `infile` (a list of tuples
+        ([output names], argument list)) one after the other.
+        Returns True if all of them were successful.
+        """
+        done = True
+        for num, (outputs, cmd) in enumerate(jobs, start=1):
+            if total:
+                count = f'Segment {jobid}/{total - 1}'
+            else:
+                count = f'File {jobid}/{self.countmax}'
+            if len(jobs) > 1:
+                count = f'{count} - Pass {num}/{len(jobs)}'
+            status = self.execute(jobid, count, infile,
+                                  outputs, cmd, duration)
+            if self.journal and not total:
+                self.journal.record(self.batch, jobid, num, outputs, status)
+            if status != 0:
+                done = False
+            if self.stopped():
+                return False
+        return done
+    # --------------------------------------------------------------------#
+
+    def has_video(self, infile):
+        """
+        Returns False if `infile` has no video stream, so that
+        its passes can't be fused. The data are those of the
+        file list, stored on the probe cache. Returns True when
+        the file can't be probed: if the fused command fails,
+        the passes are run one by one anyway.
+        """
+        try:
+            cache = get_cache(os.path.join(OnePass.appdata['cachedir'],
+                                           DBNAME))
+            data = cache.ffprobe(infile, OnePass.appdata['ffprobe_cmd'],
+                                 profile='import', hide_banner=None,
+                                 pretty=None)[0]
+        except (sqlite3.Error, OSError):
+            return True
+        if not data:
+            return True
+        return any(stream.get('codec_type') == 'video'
+                   for stream in data.get('streams', ()))
+    # --------------------------------------------------------------------#
+
+    def begin_journal(self):
+        """
+        Records the batch on the job journal, so that it can
+        be resumed if it is not completed, or continues to
+        record the resumed batch.
+        """
+        if not self.journal:
+            return
+        try:
+            if self.resume:
+                self.batch = self.resume['id']
+            else:
+                self.batch = self.journal.begin('onepass', self.args,
                                                 self.duration,
-                                                fillvalue='',
-                                                ):
-
-            for command in self.command:
-                ffmpegCommand = command[0]
-                suffix = command[1]
-                #subfolder = command[2]
-                
-                outputName = outfile.replace(f'.{self.out_extension}',f'{suffix}.{self.out_extension}')
-
-                cmd = (f'"{OnePass.appdata["ffmpeg_cmd"]}" {self.time_seq} '
-                       f'{OnePass.appdata["ffmpegloglev"]} '
-                       f'{OnePass.appdata["ffmpeg+params"]} -i '
-                       f'"{infile}" {ffmpegCommand} {volume} '
-                       f'{OnePass.appdata["ffthreads"]} -y "{outputName}"')
-
-                self.count += 1
-                count = f'File {self.count}/{self.countmax}'
-                com = (f'{count}\nSource: "{infile}"\nDestination: "{outputName}"'
-                       f'\n\n[COMMAND]:\n{cmd}')
-
-                wx.CallAfter(pub.sendMessage,
-                             "COUNT_EVT",
-                             count=count,
-                             fsource=f'Source:  "{infile}"',
-                             destination=f'Destination:  "{outputName}"',
-                             duration=duration,
-                             end='',
+                                                self.time_seq)
+        except sqlite3.Error as err:
+            self.journal = None  # the batch will not be resumable
+            logwrite(f'Job journal not available: {err}', '', self.logname)
+    # --------------------------------------------------------------------#
+
+    def already_done(self, jobs, duration):
+        """
+        Returns True if all the outputs of the `jobs` of a file
+        were recorded as done on the journal and have not been
+        changed since, or look complete by a cheap probe.
+        """
+        for name in [name for job in jobs for name in job[0]]:
+            if self.journal and self.journal.is_done(self.batch, name):
+                continue
+            if not valid_output(name, duration,
+                                OnePass.appdata['ffprobe_cmd']):
+                return False
+        return True
+    # --------------------------------------------------------------------#
+
+    def skip_file(self, jobid, infile, jobs, duration):
+        """
+        Reports a file of a resumed batch which was already
+        processed. Returns `infile`.
+        """
+        self.events.send("JOB_EVT", jobid=jobid, fname=infile, state='start')
+        self.skip(jobid, f'File {jobid}/{self.countmax}', infile,
+                  [name for job in jobs for name in job[0]], duration,
+                  'Already done, skipped')
+        self.events.send("JOB_EVT", jobid=jobid, fname=infile, state='end')
+        return infile
+    # --------------------------------------------------------------------#
+
+    def process_chunks(self, infile, outfile, volume, duration):
+        """
+        Chunked encoding of a single long file: the timeline of
+        `infile` is split into keyframe-aligned segments which
+        are encoded concurrently by separate ffmpeg processes,
+        then the encoded segments of each output are joined
+        with the concat demuxer without re-encoding. This is
+        seamless with intra-only codecs (e.g. HAP, ProRes).
+
+        Returns the list of the processed files, None if the
+        file can't be split (too short, no keyframes found),
+        in which case it will be encoded as a whole.
+        """
+        kframes = keyframes(infile, cmd=OnePass.appdata['ffprobe_cmd'])[0]
+        if not kframes or not duration:
+            return None
+        segments = split_timeline(kframes, duration / 1000,
+                                  self.maxjobs, OnePass.CHUNK_MIN)
+        if len(segments) < 2:
+            return None
+
+        total = len(segments) + 1  # the last job joins the segments
+        name, ext = os.path.splitext(outfile)
+        suffixes = [cmd[1] for cmd in self.command] if self.command else ['']
+
+        items = []
+        for num, (start, length) in enumerate(segments, start=1):
+            tseq = f'-ss {start}' if length is None else (f'-ss {start} '
+                                                          f'-t {length}')
+            seglen = (duration - start * 1000 if length is None
+                      else length * 1000)
+            items.append((infile, temp_output(f'{name}-{num:03d}{ext}'),
+                          volume, round(seglen), tseq, total))
+        # the segments are written next to the output (so that they
+        # are on the disk checked by the preflight) with temporary
+        # names, which are deleted after a crash as well
+        lists = [temp_output(f'{name}-concat{num}.txt')
+                 for num in range(1, len(suffixes) + 1)]
+        temps = [self.output_name(item[1], suffix)
+                 for suffix in suffixes for item in items] + lists
+        self.journal_temps('add_temps', temps)
+
+        scheduler = JobScheduler(self.maxjobs, stop=self.stopped)
+        encoded = scheduler.map(self.process_file, items)
+
+        done = None
+        if all(encoded) and not self.stopped():
+            done = infile
+            self.events.send("JOB_EVT",
+                             jobid=total,
+                             fname=outfile,
+                             state='start',
+                             total=total,
                              )
-                logwrite(com, '', self.logname)  # write n/n + command only
-
-                if not platform.system() == 'Windows':
-                    cmd = shlex.split(cmd)
-
-                try:
-                    with Popen(cmd,
-                               stderr=subprocess.PIPE,
-                               bufsize=1,
-                               universal_newlines=True,
-                               encoding='utf8',
-                               ) as proc:
-                        for line in proc.stderr:
-                            wx.CallAfter(pub.sendMessage,
-                                         "UPDATE_EVT",
-                                         output=line,
-                                         duration=duration,
-                                         status=0,
-                                         )
-                            if self.stop_work_thread:
-                                proc.terminate()
-                                break  # break second 'for' loop
-
-                        if proc.wait():  # error
-                            wx.CallAfter(pub.sendMessage,
-                                         "UPDATE_EVT",
-                                         output='',
-                                         duration=duration,
-                                         status=proc.wait(),
-                                         )
-                            logwrite('',
-                                     f"Exit status: {proc.wait()}",
-                                     self.logname,
-                                     )  # append exit error number
-                        else:  # ok
-                            filedone.append(infile)
-                            wx.CallAfter(pub.sendMessage,
-                                         "COUNT_EVT",
-                                         count='',
-                                         fsource='',
-                                         destination='',
-                                         duration=duration,
-                                         end='Done'
-                                         )
-                except (OSError, FileNotFoundError) as err:
-                    excepterr = f"{err}\n  {OnePass.NOT_EXIST_MSG}"
-                    wx.CallAfter(pub.sendMessage,
-                                 "COUNT_EVT",
-                                 count=excepterr,
-                                 fsource='',
-                                 destination='',
-                                 duration=0,
-                                 end='error',
-                                 )
+            for num, (suffix, listfile) in enumerate(zip(suffixes, lists),
+                                                     start=1):
+                seglist = [self.output_name(item[1], suffix)
+                           for item in items]
+                with open(listfile, 'w', encoding='utf8') as txt:
+                    txt.write(concat_list(seglist))
+                outputname = self.output_name(outfile, suffix)
+                cmd = self.ffmpeg_args(['-f', 'concat', '-safe', '0',
+                                        '-i', listfile],
+                                       '-map 0:v? -map 0:a? -map 0:s? '
+                                       '-c copy',
+                                       OnePass.appdata['ffthreads'],
+                                       ['-y', outputname])
+                count = f'Join segments - Output {num}/{len(suffixes)}'
+                status = self.execute(total, count, listfile,
+                                      [outputname], cmd, duration)
+                if status != 0 or self.stopped():
+                    done = None
                     break
+            self.events.send("JOB_EVT",
+                             jobid=total,
+                             fname=outfile,
+                             state='end',
+                             )
+        for path in temps:
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # not written or already discarded
+        self.journal_temps('remove_temps', temps)
 
-                if self.stop_work_thread:
-                    proc.terminate()
-                    break  # break second 'for' loop
+        return [done] if done else []
+    # --------------------------------------------------------------------#
 
-        time.sleep(.5)
-        wx.CallAfter(pub.sendMessage, "END_EVT", msg=filedone)
+    def output_name(self, outfile, suffix):
+        """
+        Returns the output pathname of a preset pass
+        adding the pass `suffix` to `outfile`.
+        """
+        name, ext = os.path.splitext(outfile)
+        return f'{name}{suffix}{ext}'
+    # --------------------------------------------------------------------#
+
+    def pass_job(self, infile, outfile, volume, command, tseq):
+        """
+        Builds the ffmpeg command for a single preset pass.
+        Returns a tuple ([output name], argument list).
+        """
+        outputname = self.output_name(outfile, command[1])
+        cmd = self.ffmpeg_args(tseq, ['-i', infile], command[0], volume,
+                               OnePass.appdata['ffthreads'],
+                               ['-y', outputname])
+        return [outputname], cmd
     # --------------------------------------------------------------------#
 
-    def stop(self):
+    def fused_job(self, infile, outfile, volume, fused, tseq):
         """
-        Sets the stop work thread to terminate the process
+        Builds a single ffmpeg command which produces the outputs
+        of all the preset passes by decoding `infile` once (see
+        `fuse_passes`). Returns a tuple ([output names], argument
+        list).
         """
-        self.stop_work_thread = True
+        graph, outargs = fused
+        outputs = []
+        cmd = self.ffmpeg_args(tseq, ['-i', infile, '-filter_complex', graph])
+        for command, args in zip(self.command, outargs):
+            outputname = self.output_name(outfile, command[1])
+            outputs.append(outputname)
+            cmd += build_args(args, volume, OnePass.appdata['ffthreads'],
+                              ['-y', outputname])
+        return outputs, cmd
@@ -24,19 +24,11 @@ This file is part of Videomass.
    You should have received a copy of the GNU General Public License
    along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
 """
-from threading import Thread
 import time
-import subprocess
-import platform
-import wx
-from pubsub import pub
-from videomass.vdms_utils.utils import Popen
-from videomass.vdms_io.make_filelog import logwrite
-if not platform.system() == 'Windows':
-    import shlex
+from videomass.vdms_threads.ffmpeg_thread import FFmpegThread
 
 
-class PicturesFromVideo(Thread):
+class PicturesFromVideo(FFmpegThread):
     """
     This class represents a separate thread for running simple
     single processes to save video sequences as pictures.
@@ -46,27 +38,20 @@ class PicturesFromVideo(Thread):
     https://stackoverflow.com/questions/1388753/how-to-get-output-
     from-subprocess-popen-proc-stdout-readline-blocks-no-dat?rq=1
     """
-    get = wx.GetApp()  # get videomass wx.App attribute
-    appdata = get.appset
-    NOT_EXIST_MSG = _("Is 'ffmpeg' installed on your system?")
-    # ------------------------------------------------------
 
     def __init__(self, logname, duration, timeseq, *args):
         """
         Called from `long_processing_task.topic_thread`.
         Also see `main_frame.switch_to_processing`.
         """
-        self.stop_work_thread = False  # process terminate
+        FFmpegThread.__init__(self, logname)
         self.outputdir = args[3]  # output directory
         self.cmd = args[4]  # comand set on single pass
         self.duration = duration[0]  # duration list
         self.time_seq = timeseq  # a time segment
         self.count = 0  # count first for loop
-        self.logname = logname  # title name of file log
         self.fname = args[1]  # file name
         self.preargs = args[2]
-
-        Thread.__init__(self)
         self.start()  # self.run()
 
     def run(self):
@@ -74,83 +59,12 @@ class PicturesFromVideo(Thread):
         Subprocess initialize thread.
         """
         filedone = []
-        cmd = (f'"{PicturesFromVideo.appdata["ffmpeg_cmd"]}" '
-               f'{self.time_seq} {PicturesFromVideo.appdata["ffmpegloglev"]} '
-               f'{PicturesFromVideo.appdata["ffmpeg+params"]} {self.preargs} '
-               f'-i "{self.fname}" {self.cmd}'
-               )
-        count = 'File 1/1'
-        com = (f'{count}\nSource: "{self.fname}"\n'
-               f'Destination: "{self.outputdir}"\n\n[COMMAND]:\n{cmd}')
-
-        wx.CallAfter(pub.sendMessage,
-                     "COUNT_EVT",
-                     count=count,
-                     fsource=f'Source:  "{self.fname}"',
-                     destination=f'Destination:  "{self.outputdir}"',
-                     duration=self.duration,
-                     end='',
-                     )
-        logwrite(com, '', self.logname)  # write n/n + command only
-
-        if not PicturesFromVideo.appdata['ostype'] == 'Windows':
-            cmd = shlex.split(cmd)
-        try:
-            with Popen(cmd,
-                       stderr=subprocess.PIPE,
-                       bufsize=1,
-                       universal_newlines=True,
-                       encoding='utf8',
-                       ) as proc:
-                for line in proc.stderr:
-                    wx.CallAfter(pub.sendMessage,
-                                 "UPDATE_EVT",
-                                 output=line,
-                                 duration=self.duration,
-                                 status=0,
-                                 )
-                    if self.stop_work_thread:  # break second 'for' loop
-                        proc.terminate()
-                        break
-
-                if proc.wait():  # error
-                    wx.CallAfter(pub.sendMessage,
-                                 "UPDATE_EVT",
-                                 output='',
-                                 duration=self.duration,
-                                 status=proc.wait(),
-                                 )
-                    logwrite('',
-                             f"Exit status: {proc.wait()}",
-                             self.logname,
-                             )  # append exit error number
+        cmd = self.ffmpeg_args(self.time_seq, self.preargs,
+                               ['-i', self.fname], self.cmd)
+        status = self.execute(None, 'File 1/1', self.fname,
+                              self.outputdir, cmd, self.duration)
+        if status == 0:
+            filedone.append(self.fname)
 
-                else:  # status ok
-                    filedone.append(self.fname)
-                    wx.CallAfter(pub.sendMessage,
-                                 "COUNT_EVT",
-                                 count='',
-                                 fsource='',
-                                 destination='',
-                                 duration='',
-                                 end='Done'
-                                 )
-        except (OSError, FileNotFoundError) as err:
-            excepterr = f"{err}\n  {PicturesFromVideo.NOT_EXIST_MSG}"
-            wx.CallAfter(pub.sendMessage,
-                         "COUNT_EVT",
-                         count=excepterr,
-                         fsource='',
-                         destination='',
-                         duration=0,
-                         end='error',
-                         )
         time.sleep(.5)
-        wx.CallAfter(pub.sendMessage, "END_EVT", msg=filedone)
-    # --------------------------------------------------------------------#
-
-    def stop(self):
-        """
-        Sets the stop work thread to terminate the process
-        """
-        self.stop_work_thread = True
+        self.events.send("END_EVT", msg=filedone)
@@ -0,0 +1,109 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: progress_dispatcher.py
+Porpose: Coalesces the messages of worker threads for the GUI
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of Videomass.
+
+   Videomass is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   Videomass is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+from threading import Lock, Timer
+
+
+class ProgressDispatcher:
+    """
+    Sits between a worker thread and the GUI to limit the rate
+    of the messages sent with pubsub. The progress reports
+    (PROGRESS_EVT) are coalesced, keeping only the last one of
+    each job, and the ffmpeg log lines (UPDATE_EVT with status 0)
+    are batched in a single LOG_EVT message; both are delivered
+    at most `RATE` times per second. Any other message (e.g.
+    COUNT_EVT, JOB_EVT, END_EVT or a failed exit status) is
+    delivered at once, after the pending ones to keep the order.
+
+    Usage:
+        >>> events = ProgressDispatcher(partial(wx.CallAfter,
+        ...                                     pub.sendMessage))
+        >>> events.send("UPDATE_EVT", output=line, duration=duration,
+        ...             status=0)
+
+    This class is thread safe, so that the same object can be
+    shared by concurrent jobs.
+    """
+    RATE = 10  # max number of deliveries per second
+
+    def __init__(self, post, rate=RATE):
+        """
+        post: a callable accepting the topic name and the message
+              keyword arguments, which delivers the message to
+              the GUI, e.g. `partial(wx.CallAfter, pub.sendMessage)`
+        rate: max number of deliveries per second
+        """
+        self.post = post
+        self.interval = 1 / rate
+        self.lock = Lock()
+        self.lines = []  # pending UPDATE_EVT messages
+        self.progress = {}  # last PROGRESS_EVT message by jobid
+        self.timer = None
+
+    def send(self, topic, **kwargs):
+        """
+        Sends a pubsub message `topic` with the `kwargs` data
+        """
+        with self.lock:
+            if topic == 'PROGRESS_EVT':
+                self.progress[kwargs.get('jobid')] = kwargs
+                self.schedule()
+            elif topic == 'UPDATE_EVT' and kwargs.get('status') == 0:
+                self.lines.append(kwargs)
+                self.schedule()
+            else:
+                self.deliver()
+                self.post(topic, **kwargs)
+
+    def schedule(self):
+        """
+        Starts the timer of the next delivery if not running
+        """
+        if self.timer is None:
+            self.timer = Timer(self.interval, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """
+        Delivers all pending messages
+        """
+        with self.lock:
+            self.deliver()
+
+    def deliver(self):
+        """
+        Delivers the pending messages, the lock must be held
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.lines:
+            self.post('LOG_EVT', lines=self.lines)
+            self.lines = []
+        for kwargs in self.progress.values():
+            self.post('PROGRESS_EVT', **kwargs)
+        self.progress.clear()
@@ -26,16 +26,14 @@ This file is part of Videomass.
 """
 import os
 import tempfile
-from threading import Thread
 import time
 import subprocess
-import platform
 import wx
 from pubsub import pub
 from videomass.vdms_utils.utils import Popen
 from videomass.vdms_io.make_filelog import logwrite
-if not platform.system() == 'Windows':
-    import shlex
+from videomass.vdms_threads.ffmpeg_thread import FFmpegThread
+from videomass.vdms_threads.ffmpeg_runner import build_args, join_args
 
 
 def convert_images(*varargs):
@@ -45,7 +43,6 @@ def convert_images(*varargs):
     """
     get = wx.GetApp()  # get videomass wx.App attribute
     appdata = get.appset
-    opsystem = appdata['ostype']
     not_exist_msg = _("Is 'ffmpeg' installed on your system?")
     flist = varargs[0]
     tmpdir = varargs[1]
@@ -61,19 +58,16 @@ def convert_images(*varargs):
                  end='',
                  )
     prognum = 0
-    args = (f'"{appdata["ffmpeg_cmd"]}" '
-            f'{appdata["ffmpegloglev"]} '
-            f'{appdata["ffmpeg+params"]} ')
+    args = build_args([appdata['ffmpeg_cmd']],
+                      appdata['ffmpegloglev'],
+                      appdata['ffmpeg+params'])
     logwrite(f'Preparing temporary files...\n'
-             f'\n[COMMAND:]\n{args}', '', logname)
+             f'\n[COMMAND:]\n{join_args(args)}', '', logname)
 
     for files in flist:
         prognum += 1
         tmpf = os.path.join(tmpdir, f'{imagenames}{prognum}.bmp')
-        cmd_1 = f'{args} -i "{files}" "{tmpf}"'
-
-        if not opsystem == 'Windows':
-            cmd_1 = shlex.split(cmd_1)
+        cmd_1 = args + ['-i', files, tmpf]
         try:
             with Popen(cmd_1,
                        stderr=subprocess.PIPE,
@@ -136,7 +130,6 @@ def resizing_process(*varargs):
     """
     get = wx.GetApp()  # get videomass wx.App attribute
     appdata = get.appset
-    opsystem = appdata['ostype']
     not_exist_msg = _("Is 'ffmpeg' installed on your system?")
     flist = varargs[0]
     tmpdir = varargs[1]
@@ -154,15 +147,12 @@ def resizing_process(*varargs):
 
     tmpf = os.path.join(tmpdir, 'TMP_%d.bmp')
     tmpfout = os.path.join(tmpdir, 'IMAGE_%d.bmp')
-    cmd_1 = (f'"{appdata["ffmpeg_cmd"]}" '
-             f'{appdata["ffmpegloglev"]} '
-             f'{appdata["ffmpeg+params"]} '
-             f'-i "{tmpf}" {cmdargs} "{tmpfout}"'
-             )
-    logwrite(f'\nFile resizing...\n\n[COMMAND]:\n{cmd_1}', '', logname)
-
-    if not opsystem == 'Windows':
-        cmd_1 = shlex.split(cmd_1)
+    cmd_1 = build_args([appdata['ffmpeg_cmd']],
+                       appdata['ffmpegloglev'],
+                       appdata['ffmpeg+params'],
+                       ['-i', tmpf], cmdargs, [tmpfout])
+    logwrite(f'\nFile resizing...\n\n[COMMAND]:\n{join_args(cmd_1)}',
+             '', logname)
     try:
         with Popen(cmd_1,
                    stderr=subprocess.PIPE,
@@ -217,24 +207,20 @@ def resizing_process(*varargs):
     return None
 
 
-class SlideshowMaker(Thread):
+class SlideshowMaker(FFmpegThread):
     """
     Represents the ffmpeg subprocess to produce a video in
     mkv format from a sequence of images already converted
     and resized in a temporary context.
     """
-    get = wx.GetApp()  # get videomass wx.App attribute
-    appdata = get.appset
-    OS = appdata['ostype']
-    SUFFIX = appdata['filesuffix']
-    NOT_EXIST_MSG = _("Is 'ffmpeg' installed on your system?")
+    SUFFIX = FFmpegThread.appdata['filesuffix']
 
     def __init__(self, logname, duration, *args):
         """
         Called from `long_processing_task.topic_thread`.
         Also see `main_frame.switch_to_processing`.
         """
-        Thread.__init__(self)
+        FFmpegThread.__init__(self, logname)
 
         self.filelist = args[1]  # input file list (items)
         # self.destdir = varargs[2]  # destination dir
@@ -245,8 +231,6 @@ class SlideshowMaker(Thread):
         self.duration = duration  # duration
         self.countmax = args[9]  # length file list
         self.count = 0  # count first for loop
-        self.logname = logname  # log name
-        self.stop_work_thread = False  # process terminate
 
         self.start()  # start the thread (va in self.run())
 
@@ -286,82 +270,16 @@ class SlideshowMaker(Thread):
 
             # ------------------------------- make video
             tmpgroup = os.path.join(tempdir, 'IMAGE_%d.bmp')
-            cmd_2 = (f'"{SlideshowMaker.appdata["ffmpeg_cmd"]}" '
-                     f'{SlideshowMaker.appdata["ffmpegloglev"]} '
-                     f'{SlideshowMaker.appdata["ffmpeg+params"]} '
-                     f'{self.preinput_1} -i "{tmpgroup}" {self.args_1} '
-                     f'"{self.filedest}"'
-                     )
-            count = '\nVideo production...'
-            log = (f'{count}\nSource: "{tempdir}"\n'
-                   f'Destination: "{self.filedest}"\n\n[COMMAND]:\n{cmd_2}')
-
-            wx.CallAfter(pub.sendMessage,
-                         "COUNT_EVT",
-                         count=count,
-                         fsource=f'Source:  "{tempdir}"',
-                         destination=f'Destination:  "{self.filedest}"',
-                         duration=self.duration,
-                         end='',
-                         )
-
-            logwrite(log, '', self.logname)
+            cmd_2 = self.ffmpeg_args(self.preinput_1, ['-i', tmpgroup],
+                                     self.args_1, [self.filedest])
             time.sleep(1)
+            status = self.execute(None, '\nVideo production...', tempdir,
+                                  self.filedest, cmd_2, self.duration)
+            if status == 0:
+                filedone = self.filelist
+            elif status != 'error':
+                time.sleep(1)
 
-            if not SlideshowMaker.OS == 'Windows':
-                cmd_2 = shlex.split(cmd_2)
-
-            try:
-                with Popen(cmd_2,
-                           stderr=subprocess.PIPE,
-                           bufsize=1,
-                           universal_newlines=True,
-                           encoding='utf8',
-                           ) as proc2:
-                    for line in proc2.stderr:
-                        wx.CallAfter(pub.sendMessage,
-                                     "UPDATE_EVT",
-                                     output=line,
-                                     duration=self.duration,
-                                     status=0,
-                                     )
-                        if self.stop_work_thread:  # break second 'for' loop
-                            proc2.terminate()
-                            break
-
-                    if proc2.wait():  # error
-                        wx.CallAfter(pub.sendMessage,
-                                     "UPDATE_EVT",
-                                     output='',
-                                     duration=self.duration,
-                                     status=proc2.wait(),
-                                     )
-                        logwrite('',
-                                 f"Exit status: {proc2.wait()}",
-                                 self.logname,
-                                 )  # append exit error number
-                        time.sleep(1)
-
-                    else:  # status ok
-                        filedone = self.filelist
-                        wx.CallAfter(pub.sendMessage,
-                                     "COUNT_EVT",
-                                     count='',
-                                     fsource='',
-                                     destination='',
-                                     duration=self.duration,
-                                     end='Done'
-                                     )
-            except (OSError, FileNotFoundError) as err:
-                excepterr = f"{err}\n  {SlideshowMaker.NOT_EXIST_MSG}"
-                wx.CallAfter(pub.sendMessage,
-                             "COUNT_EVT",
-                             count=excepterr,
-                             fsource='',
-                             destination='',
-                             duration=0,
-                             end='error',
-                             )
         self.end_process(filedone)
 
     def end_process(self, filedone):
@@ -369,10 +287,4 @@ class SlideshowMaker(Thread):
         The process is finished
         """
         time.sleep(.5)
-        wx.CallAfter(pub.sendMessage, "END_EVT", msg=filedone)
-
-    def stop(self):
-        """
-        Sets the stop work thread to terminate the process
-        """
-        self.stop_work_thread = True
+        self.events.send("END_EVT", msg=filedone)
@@ -0,0 +1,242 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: trash_mover.py
+Porpose: Moves the processed files to the trash folder in background
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of Videomass.
+
+   Videomass is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   Videomass is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import time
+import shutil
+from threading import Thread, Condition
+from videomass.vdms_threads.ffmpeg_runner import temp_output
+
+LARGE = 256 * 1024 ** 2  # cross-device moves deferred while encoding
+CHUNK = 8 * 1024 ** 2  # size of the blocks of a streamed copy
+POLL = 1.0  # seconds between the checks of the idle state
+RATE = 0.25  # min seconds between two progress messages
+
+
+def trash_names(flist, trashdir, date=None):
+    """
+    Returns the list of (source, destination) pathnames of the
+    files of `flist` once moved to `trashdir`, each destination
+    is prefixed by `date` to avoid name clashes.
+    """
+    date = date or time.strftime('%H%M%S-%a_%d_%B_%Y')
+    return [(name, os.path.join(trashdir,
+                                f'{date}_{os.path.basename(name)}'))
+            for name in flist]
+
+
+def same_device(path, directory):
+    """
+    Returns True if `path` can be renamed into `directory`,
+    i.e. both are on the same filesystem.
+    """
+    try:
+        return os.stat(path).st_dev == os.stat(directory).st_dev
+    except OSError:
+        return False
+
+
+def stream_copy(src, dst, progress=None, stop=None, chunk=CHUNK):
+    """
+    Copies the `src` file to `dst` block by block, calling
+    `progress(copied_bytes)` after each block. The copy is
+    written to a temporary name renamed to `dst` when complete,
+    so that an interrupted copy (`stop()` returning True) never
+    leaves a truncated file at `dst`.
+
+    Returns True if completed, False if stopped.
+    """
+    temp = temp_output(dst)
+    copied = 0
+    try:
+        with open(src, 'rb') as fsrc, open(temp, 'wb') as fdst:
+            while True:
+                if stop and stop():
+                    break
+                buf = fsrc.read(chunk)
+                if not buf:
+                    fdst.flush()
+                    os.fsync(fdst.fileno())
+                    shutil.copystat(src, temp)
+                    os.replace(temp, dst)
+                    return True
+                fdst.write(buf)
+                copied += len(buf)
+                if progress:
+                    progress(copied)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    os.remove(temp)
+    return False
+
+
+class TrashMover(Thread):
+    """
+    Moves the source files to the trash folder in background,
+    so that large files on another filesystem do not freeze
+    the GUI. Files on the same filesystem of the trash folder
+    are renamed, the other ones are copied block by block and
+    removed after the copy is complete. Cross-device moves of
+    `large` files or more are deferred until `idle()` returns
+    True, not to compete with ffmpeg for the disks.
+
+    Usage:
+        >>> mover = TrashMover(idle=lambda: not busy,
+        ...                    post=partial(wx.CallAfter,
+        ...                                 pub.sendMessage))
+        >>> mover.move(['/path/file.mp4'], '/path/Trash')
+
+    The progress is reported by `post` with the TRASH_EVT topic
+    and the following data: name (the source file), copied and
+    size (bytes), pending (files still to move), end ('' while
+    moving, 'Done' when moved, 'error' with a `error` message).
+    """
+
+    def __init__(self, idle=None, post=None, large=LARGE):
+        """
+        idle: a callable returning True when no encoding is running
+        post: a callable accepting the topic name and the message
+              keyword arguments, e.g. `partial(wx.CallAfter,
+              pub.sendMessage)`
+        large: min size in bytes of the deferred cross-device moves
+        """
+        Thread.__init__(self, daemon=True)
+        self.idle = idle if idle else lambda: True
+        self.post = post if post else lambda topic, **kwargs: None
+        self.large = large
+        self.queue = []  # list of (source, destination) to move
+        self.current = None  # the file being moved
+        self.cond = Condition()
+        self.cancel = False
+    # ----------------------------------------------------------------#
+
+    def move(self, flist, trashdir):
+        """
+        Queues the files of `flist` to be moved to `trashdir`
+        and starts the thread if not running.
+        """
+        with self.cond:
+            self.queue.extend(trash_names(flist, trashdir))
+            self.cond.notify()
+        if not self.is_alive() and not self.cancel:
+            self.start()
+    # ----------------------------------------------------------------#
+
+    def pending(self):
+        """
+        Returns the number of files not yet moved
+        """
+        with self.cond:
+            return len(self.queue) + (1 if self.current else 0)
+    # ----------------------------------------------------------------#
+
+    def deferred(self, src, dst):
+        """
+        Returns True if moving `src` to `dst` must wait
+        for the end of the encoding processes.
+        """
+        if same_device(src, os.path.dirname(dst)):
+            return False
+        try:
+            return os.path.getsize(src) >= self.large
+        except OSError:
+            return False
+    # ----------------------------------------------------------------#
+
+    def next_file(self):
+        """
+        Waits for and returns the first queued file which can be
+        moved now, or None if the thread has been stopped.
+        """
+        with self.cond:
+            while not self.cancel:
+                idle = self.idle()
+                for idx, (src, dst) in enumerate(self.queue):
+                    if idle or not self.deferred(src, dst):
+                        self.current = self.queue.pop(idx)
+                        return self.current
+                self.cond.wait(POLL if self.queue else None)
+        return None
+    # ----------------------------------------------------------------#
+
+    def run(self):
+        """
+        Moves the queued files until stopped
+        """
+        while True:
+            item = self.next_file()
+            if item is None:
+                break
+            try:
+                self.move_file(*item)
+            finally:
+                with self.cond:
+                    self.current = None
+    # ----------------------------------------------------------------#
+
+    def move_file(self, src, dst):
+        """
+        Moves a single file, reporting its progress
+        """
+        try:
+            size = os.path.getsize(src)
+            if same_device(src, os.path.dirname(dst)):
+                os.rename(src, dst)
+            else:
+                last = [0.0]
+
+                def progress(copied):
+                    now = time.monotonic()
+                    if now - last[0] >= RATE:
+                        last[0] = now
+                        self.post("TRASH_EVT", name=src, copied=copied,
+                                  size=size, pending=self.pending(),
+                                  end='')
+
+                if not stream_copy(src, dst, progress,
+                                   lambda: self.cancel):
+                    return
+                os.remove(src)
+        except OSError as err:
+            self.post("TRASH_EVT", name=src, copied=0, size=0,
+                      pending=self.pending() - 1, end='error',
+                      error=str(err))
+            return
+
+        self.post("TRASH_EVT", name=src, copied=size, size=size,
+                  pending=self.pending() - 1, end='Done')
+    # ----------------------------------------------------------------#
+
+    def stop(self):
+        """
+        Stops the thread, a copy in progress is abandoned
+        leaving its source file in place.
+        """
+        with self.cond:
+            self.cancel = True
+            self.cond.notify()
@@ -24,20 +24,17 @@ This file is part of Videomass.
    You should have received a copy of the GNU General Public License
    along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
 """
-from threading import Thread
+import os
 import time
+import shutil
 import itertools
-import subprocess
-import platform
-import wx
-from pubsub import pub
-from videomass.vdms_utils.utils import Popen
-from videomass.vdms_io.make_filelog import logwrite
-if not platform.system() == 'Windows':
-    import shlex
+from videomass.vdms_io.job_journal import fingerprint
+from videomass.vdms_threads.ffmpeg_thread import FFmpegThread
+from videomass.vdms_threads.job_scheduler import (JobScheduler,
+                                                  concurrent_jobs)
 
 
-class TwoPass(Thread):
+class TwoPass(FFmpegThread):
     """
     This class represents a separate thread which need to read the
     stdout/stderr in real time mode. The subprocess module is instantiated
@@ -50,200 +47,97 @@ class TwoPass(Thread):
     from-subprocess-popen-proc-stdout-readline-blocks-no-dat?rq=1
 
     """
-    get = wx.GetApp()  # get videomass wx.App attribute
-    appdata = get.appset
-    OS = appdata['ostype']
-    NOT_EXIST_MSG = _("Is 'ffmpeg' installed on your system?")
 
     def __init__(self, logname, duration, timeseq, *args):
         """
         Called from `long_processing_task.topic_thread`.
         Also see `main_frame.switch_to_processing`.
         """
-        self.stop_work_thread = False  # process terminate
+        FFmpegThread.__init__(self, logname)
         self.input_flist = args[1]  # list of infile (elements)
         self.passlist = args[5]  # comand list set for double-pass
         self.output_flist = args[3]  # output path
         self.duration = duration  # duration list
         self.time_seq = timeseq  # a time segment list
         self.volume = args[7]  # volume compensation data
-        self.count = 0  # count first for loop
         self.countmax = len(args[1])  # length file list
-        self.logname = logname  # title name of file log
-        self.nul = 'NUL' if TwoPass.OS == 'Windows' else '/dev/null'
-
-        Thread.__init__(self)
+        self.maxjobs = concurrent_jobs(TwoPass.appdata['concurrent_jobs'],
+                                       TwoPass.appdata['ffthreads'])
         self.start()  # start the thread (va in self.run())
 
     def run(self):
         """
         Thread started.
         """
-        filedone = []
-        for (infile,
-             outfile,
-             volume,
-             duration) in itertools.zip_longest(self.input_flist,
-                                                self.output_flist,
-                                                self.volume,
-                                                self.duration,
-                                                fillvalue='',
-                                                ):
-            # --------------- first pass
-            pass1 = (f'"{TwoPass.appdata["ffmpeg_cmd"]}" '
-                     f'{TwoPass.appdata["ffmpegloglev"]} '
-                     f'{TwoPass.appdata["ffmpeg+params"]} {self.time_seq} '
-                     f'-i "{infile}" {self.passlist[0]} '
-                     f'{TwoPass.appdata["ffthreads"]} -y {self.nul}'
-                     )
-            self.count += 1
-            count = f'File {self.count}/{self.countmax} - Pass One'
-            cmd = (f'{count}\nSource: "{infile}"\nDestination: "{self.nul}"'
-                   f'\n\n[COMMAND]:\n{pass1}'
-                   )
-            wx.CallAfter(pub.sendMessage,
-                         "COUNT_EVT",
-                         count=count,
-                         fsource=f'Source:  "{infile}"',
-                         destination=f'Destination:  "{self.nul}"',
-                         duration=duration,
-                         end='',
-                         )
-            logwrite(cmd, '', self.logname)  # write n/n + command only
-
-            if not TwoPass.OS == 'Windows':
-                pass1 = shlex.split(pass1)
-            try:
-                with Popen(pass1,
-                           stderr=subprocess.PIPE,
-                           bufsize=1,
-                           universal_newlines=True,
-                           encoding='utf8',
-                           ) as proc1:
-
-                    for line in proc1.stderr:
-                        wx.CallAfter(pub.sendMessage,
-                                     "UPDATE_EVT",
-                                     output=line,
-                                     duration=duration,
-                                     status=0
-                                     )
-                        if self.stop_work_thread:  # break second 'for' loop
-                            proc1.terminate()
-                            break
-
-                    if proc1.wait():  # will add '..failed' to txtctrl
-                        wx.CallAfter(pub.sendMessage,
-                                     "UPDATE_EVT",
-                                     output='',
-                                     duration=duration,
-                                     status=proc1.wait(),
-                                     )
-                        logwrite('',
-                                 f"Exit status: {proc1.wait()}",
-                                 self.logname,
-                                 )  # append exit error number
-
-            except (OSError, FileNotFoundError) as err:
-                excepterr = f"{err}\n  {TwoPass.NOT_EXIST_MSG}"
-                wx.CallAfter(pub.sendMessage,
-                             "COUNT_EVT",
-                             count=excepterr,
-                             fsource='',
-                             destination='',
-                             duration=0,
-                             end='error',
-                             )
-                break
-
-            if self.stop_work_thread:  # break first 'for' loop
-                proc1.terminate()
-                break  # fermo il ciclo for, altrimenti passa avanti
-
-            if proc1.wait() == 0:  # will add '..terminated' to txtctrl
-                wx.CallAfter(pub.sendMessage,
-                             "COUNT_EVT",
-                             count='',
-                             fsource='',
-                             destination='',
-                             duration=duration,
-                             end='Done'
-                             )
-            # --------------- second pass ----------------#
-            pass2 = (f'"{TwoPass.appdata["ffmpeg_cmd"]}" '
-                     f'{TwoPass.appdata["ffmpegloglev"]} '
-                     f'{TwoPass.appdata["ffmpeg+params"]} {self.time_seq} '
-                     f'-i "{infile}" {self.passlist[1]} '
-                     f'{volume} {TwoPass.appdata["ffthreads"]} -y "{outfile}"'
-                     )
-            count = f'File {self.count}/{self.countmax} - Pass Two'
-            cmd = (f'{count}\nSource: "{infile}"\nDestination: "{outfile}"'
-                   f'\n\n[COMMAND]:\n{pass2}'
-                   )
-
-            wx.CallAfter(pub.sendMessage,
-                         "COUNT_EVT",
-                         count=count,
-                         fsource=f'Source:  "{infile}"',
-                         destination=f'Destination:  "{outfile}"',
-                         duration=duration,
-                         end='',
-                         )
-            logwrite(cmd, '', self.logname)
-
-            if not TwoPass.OS == 'Windows':
-                pass2 = shlex.split(pass2)
-
-            with Popen(pass2,
-                       stderr=subprocess.PIPE,
-                       bufsize=1,
-                       universal_newlines=True,
-                       encoding='utf8',
-                       ) as proc2:
-
-                for line2 in proc2.stderr:
-                    wx.CallAfter(pub.sendMessage,
-                                 "UPDATE_EVT",
-                                 output=line2,
-                                 duration=duration,
-                                 status=0,
-                                 )
-                    if self.stop_work_thread:
-                        proc2.terminate()
-                        break
-
-                if proc2.wait():  # will add '..failed' to txtctrl
-                    wx.CallAfter(pub.sendMessage,
-                                 "UPDATE_EVT",
-                                 output='',
-                                 duration=duration,
-                                 status=proc2.wait(),
-                                 )
-                    logwrite('',
-                             f"Exit status: {proc2.wait()}",
-                             self.logname,
-                             )  # append exit error number
-
-            if self.stop_work_thread:  # break first 'for' loop
-                proc2.terminate()
-                break  # fermo il ciclo for, altrimenti passa avanti
-
-            if proc2.wait() == 0:  # will add '..terminated' to txtctrl
-                filedone.append(infile)
-                wx.CallAfter(pub.sendMessage,
-                             "COUNT_EVT",
-                             count='',
-                             fsource='',
-                             destination='',
-                             duration=duration,
-                             end='Done'
-                             )
+        items = itertools.zip_longest(self.input_flist,
+                                      self.output_flist,
+                                      self.volume,
+                                      self.duration,
+                                      fillvalue='',
+                                      )
+        scheduler = JobScheduler(self.maxjobs, stop=self.stopped)
+        filedone = [infile for infile in
+                    scheduler.map(self.process_file, items) if infile]
+
         time.sleep(.5)
-        wx.CallAfter(pub.sendMessage, "END_EVT", msg=filedone)
+        self.events.send("END_EVT", msg=filedone)
     # --------------------------------------------------------------------#
 
-    def stop(self):
+    def process_file(self, jobid, infile, outfile, volume, duration):
         """
-        Sets the stop work thread to terminate the process
+        Runs both passes on the given `infile`, this is a single
+        job of the scheduler. Returns `infile` on success, None
+        otherwise. With the incremental mode none of the passes
+        is run if the output of the second one is up to date.
         """
-        self.stop_work_thread = True
+        pass2 = self.ffmpeg_args(self.time_seq, ['-i', infile],
+                                 self.passlist[1], volume,
+                                 TwoPass.appdata['ffthreads'],
+                                 ['-y', outfile])
+        if self.up_to_date(infile, [outfile], fingerprint(pass2)):
+            self.events.send("JOB_EVT", jobid=jobid, fname=infile,
+                             state='start')
+            self.skip(jobid, f'File {jobid}/{self.countmax}', infile,
+                      [outfile], duration, 'Up to date, skipped')
+            self.events.send("JOB_EVT", jobid=jobid, fname=infile,
+                             state='end')
+            return infile
+
+        if self.maxjobs > 1:
+            # encoders write the pass stats file in the working dir
+            workdir = os.path.join(TwoPass.appdata['cachedir'], 'tmp',
+                                   'TwoPass', str(jobid))
+            os.makedirs(workdir, exist_ok=True)
+        else:
+            workdir = None
+
+        self.events.send("JOB_EVT",
+                         jobid=jobid,
+                         fname=infile,
+                         state='start',
+                         )
+        # --------------- first pass
+        pass1 = self.ffmpeg_args(self.time_seq, ['-i', infile],
+                                 self.passlist[0],
+                                 TwoPass.appdata['ffthreads'],
+                                 ['-y', self.nul])
+        count = f'File {jobid}/{self.countmax} - Pass One'
+        status = self.execute(jobid, count, infile, self.nul,
+                              pass1, duration, workdir)
+
+        if status == 0 and not self.stopped():
+            # --------------- second pass ----------------#
+            count = f'File {jobid}/{self.countmax} - Pass Two'
+            status = self.execute(jobid, count, infile, outfile,
+                                  pass2, duration, workdir)
+        else:
+            status = status or 'stop'
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        self.events.send("JOB_EVT",
+                         jobid=jobid,
+                         fname=infile,
+                         state='end',
+                         )
+        return infile if status == 0 else None
@@ -24,20 +24,31 @@ This file is part of Videomass.
    You should have received a copy of the GNU General Public License
    along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
 """
-from threading import Thread
+import os
 import time
+import shutil
+import sqlite3
 import itertools
-import subprocess
-import platform
-import wx
-from pubsub import pub
-from videomass.vdms_utils.utils import Popen
+from threading import Semaphore
+from concurrent.futures import ThreadPoolExecutor
+from videomass.vdms_threads.ffmpeg_thread import FFmpegThread
+from videomass.vdms_threads.ffmpeg_runner import (build_args, split_args,
+                                                  analysis_args, pcm_args,
+                                                  video_pass_args, ALL_AUDIO)
+from videomass.vdms_threads.ffmpeg_progress import Progress
+from videomass.vdms_threads.ffprobe import ffprobe
+from videomass.vdms_threads import loudness_meter
 from videomass.vdms_io.make_filelog import logwrite
-if not platform.system() == 'Windows':
-    import shlex
+from videomass.vdms_threads.ffmpeg_output import (parse_line, LOUDNORM,
+                                                  LOUDNORM_KEYS)
+from videomass.vdms_threads.job_scheduler import (JobScheduler,
+                                                  concurrent_jobs)
+from videomass.vdms_io.probe_cache import get_cache, DBNAME, audio_stream
 
+MEASURED = LOUDNORM_KEYS[:4]  # the input statistics of the first pass
 
-class Loudnorm(Thread):
+
+class Loudnorm(FFmpegThread):
     """
     Like `TwoPass_Thread` but execute -loudnorm parsing from first
     pass and has definitions to apply on second pass.
@@ -47,223 +58,355 @@ class Loudnorm(Thread):
     https://stackoverflow.com/questions/1388753/how-to-get-output-
     from-subprocess-popen-proc-stdout-readline-blocks-no-dat?rq=1
 
+    The first pass is built by `analysis_args`, which decodes
+    the mapped audio streams only (see `probe_cache.audio_stream`).
+    When the preset first pass encodes the video as well (e.g.
+    the first pass of a two-pass video encoding) its video is
+    encoded without the audio just before the second pass (see
+    `ffmpeg_runner.video_pass_args`). The input statistics are
+    stored on the probe cache (see `ProbeCache.measurement`)
+    and the files already measured skip the first pass
+    analysis. The target offset depends
+    on the loudnorm targets, it is stored for each of them and
+    is taken as 0 for new targets: on second pass loudnorm
+    replaces it anyway when the linear normalization is possible.
+
+    The first passes are pipelined: a measuring stage runs up to
+    AHEAD files ahead of the encoding jobs (the video first pass,
+    if any, and the second pass), so that the encoders do not
+    wait for the analysis.
+
+    With the 'numpy' loudness engine the first pass of a single
+    stream is measured by the `loudness_meter`
+    module on the decoded samples; its statistics are shared
+    with the PEAK and RMS normalizations on the probe cache and
+    the target offset is always 0.
     """
-    get = wx.GetApp()  # get videomass wx.App attribute
-    appdata = get.appset
-    OS = appdata['ostype']
-    NOT_EXIST_MSG = _("Is 'ffmpeg' installed on your system?")
+    AHEAD = 2  # files measured ahead of the encoding jobs
 
     def __init__(self, logname, duration, timeseq, *args):
         """
         Called from `long_processing_task.topic_thread`.
         Also see `main_frame.switch_to_processing`.
         """
-        self.stop_work_thread = False  # process terminate
+        FFmpegThread.__init__(self, logname)
         self.input_flist = args[1]  # list of infile (elements)
         self.passlist = args[5]  # comand list
         self.audio_outmap = args[6]  # map output list
         self.output_flist = args[3]  # output path
         self.duration = duration  # durations list
         self.time_seq = timeseq  # time segments list
-        self.count = 0  # count first for loop
         self.countmax = len(args[1])  # length file list
-        self.logname = logname  # title name of file log
-        self.nul = 'NUL' if Loudnorm.OS == 'Windows' else '/dev/null'
-
-        Thread.__init__(self)
+        self.maxjobs = concurrent_jobs(Loudnorm.appdata['concurrent_jobs'],
+                                       Loudnorm.appdata['ffthreads'])
+        self.stream = audio_stream(self.passlist[0])
+        if '-vn' in split_args(self.passlist[0]):
+            self.video_pass1 = None
+        else:
+            self.video_pass1 = video_pass_args(self.passlist[0])
+        # the first pass is always an audio only analysis
+        self.pipelined = self.countmax > 1
+        self.meter = (loudness_meter.available()
+                      and Loudnorm.appdata['loudness_engine'] == 'numpy')
+        try:
+            self.cache = get_cache(os.path.join(Loudnorm.appdata['cachedir'],
+                                                DBNAME))
+        except sqlite3.Error:
+            self.cache = None  # measures every time
         self.start()  # start the thread (va in self.run())
 
     def run(self):
         """
         Subprocess initialize thread.
         """
-        filedone = []
-        summary = {'Input Integrated:': None, 'Input True Peak:': None,
-                   'Input LRA:': None, 'Input Threshold:': None,
-                   'Output Integrated:': None, 'Output True Peak:': None,
-                   'Output LRA:': None, 'Output Threshold:': None,
-                   'Normalization Type:': None, 'Target Offset:': None
-                   }
-        for (infile,
-             outfile,
-             duration) in itertools.zip_longest(self.input_flist,
-                                                self.output_flist,
-                                                self.duration,
-                                                fillvalue='',
-                                                ):
-            # --------------- first pass
-            pass1 = (f'"{Loudnorm.appdata["ffmpeg_cmd"]}" -nostdin -loglevel '
-                     f'info -stats -hide_banner {self.time_seq} -i "{infile}" '
-                     f'{self.passlist[0]} {Loudnorm.appdata["ffthreads"]} -y '
-                     f'{self.nul}'
-                     )
-            self.count += 1
-            count = (f'File {self.count}/{self.countmax} - Pass One\n '
-                     f'Loudnorm ebu: Getting statistics for measurements...')
-            cmd = (f'{count}\nSource: "{infile}"\nDestination: '
-                   f'"{self.nul}"\n\n'
-                   f'[COMMAND]:\n{pass1}')
-
-            wx.CallAfter(pub.sendMessage,
-                         "COUNT_EVT",
-                         count=count,
-                         fsource=f'Source:  "{infile}"',
-                         destination=f'Destination: "{self.nul}"',
-                         duration=duration,
-                         end='',
+        items = list(itertools.zip_longest(self.input_flist,
+                                           self.output_flist,
+                                           self.duration,
+                                           fillvalue='',
+                                           ))
+        if self.pipelined:
+            # not stopped: the measured jobs must send their end event
+            scheduler = JobScheduler(self.maxjobs)
+            with ThreadPoolExecutor(max_workers=1) as stage:
+                slots = Semaphore(Loudnorm.AHEAD)
+                measured = [stage.submit(self.measure_ahead, slots, jobid,
+                                         infile, duration)
+                            for jobid, (infile, _outfile, duration)
+                            in enumerate(items, start=1)]
+
+                def encode_measured(jobid, infile, outfile, duration):
+                    try:
+                        result = measured[jobid - 1].result()
+                    except Exception as err:  # unexpected measuring error
+                        logwrite('', f'{infile}: {err}', self.logname)
+                        result = 1, None
+                    slots.release()
+                    if result is None:  # stopped before measuring
+                        return None
+                    return self.encode(jobid, infile, outfile, duration,
+                                       *result)
+
+                results = scheduler.map(encode_measured, items)
+        else:
+            scheduler = JobScheduler(self.maxjobs, stop=self.stopped)
+            results = scheduler.map(self.process_file, items)
+
+        filedone = [infile for infile in results if infile]
+        time.sleep(.5)
+        self.events.send("END_EVT", msg=filedone)
+    # --------------------------------------------------------------------#
+
+    def process_file(self, jobid, infile, outfile, duration):
+        """
+        Measures the loudness of `infile` on first pass and applies
+        the normalization on second pass, this is a single job of
+        the scheduler. Returns `infile` on success, None otherwise.
+        """
+        status, summary = self.measure(jobid, infile, duration)
+        return self.encode(jobid, infile, outfile, duration, status,
+                           summary)
+    # --------------------------------------------------------------------#
+
+    def measure_ahead(self, slots, jobid, infile, duration):
+        """
+        Like `measure` but waits for one of the `slots` of the
+        measured files first, see `run`. Returns None if stopped
+        while waiting, before the job has started.
+        """
+        while not slots.acquire(timeout=0.5):
+            if self.stopped():
+                return None
+        return self.measure(jobid, infile, duration)
+    # --------------------------------------------------------------------#
+
+    def measure(self, jobid, infile, duration):
+        """
+        First pass: measures the loudness of `infile`. Returns
+        a tuple (exit status, dict of LOUDNORM_KEYS items).
+        """
+        summary = dict.fromkeys(LOUDNORM_KEYS)
+        self.events.send("JOB_EVT",
+                         jobid=jobid,
+                         fname=infile,
+                         state='start',
                          )
-            logwrite(cmd, '', self.logname)  # write n/n + command only
+        if self.stopped():
+            return 'stop', summary
 
-            if not Loudnorm.OS == 'Windows':
-                pass1 = shlex.split(pass1)
-            try:
-                with Popen(pass1,
-                           stderr=subprocess.PIPE,
-                           bufsize=1,
-                           universal_newlines=True,
-                           encoding='utf8',
-                           ) as proc1:
-
-                    for line in proc1.stderr:
-                        wx.CallAfter(pub.sendMessage,
-                                     "UPDATE_EVT",
-                                     output=line,
-                                     duration=duration,
-                                     status=0
-                                     )
-                        if self.stop_work_thread:  # break first 'for' loop
-                            proc1.terminate()
-                            break
-
-                        for k in summary:
-                            if line.startswith(k):
-                                summary[k] = line.split(':')[1].split()[0]
-
-                    if proc1.wait():  # will add '..failed' to txtctrl
-                        wx.CallAfter(pub.sendMessage,
-                                     "UPDATE_EVT",
-                                     output='',
-                                     duration=duration,
-                                     status=proc1.wait(),
-                                     )
-                        logwrite('',
-                                 f"Exit status: {proc1.wait()}",
-                                 self.logname,
-                                 )  # append exit error number
-                        break
-
-            except (OSError, FileNotFoundError) as err:
-                excepterr = f"{err}\n  {Loudnorm.NOT_EXIST_MSG}"
-                wx.CallAfter(pub.sendMessage,
-                             "COUNT_EVT",
-                             count=excepterr,
-                             fsource='',
-                             destination='',
-                             duration=0,
-                             end='error'
-                             )
-                break
-
-            if self.stop_work_thread:  # break first 'for' loop
-                proc1.terminate()
-                break  # fermo il ciclo for, altrimenti passa avanti
-
-            if proc1.wait() == 0:  # will add '..terminated' to txtctrl
-                wx.CallAfter(pub.sendMessage,
-                             "COUNT_EVT",
-                             count='',
-                             fsource='',
-                             destination='',
+        stream = self.file_stream(infile)
+        meter = self.meter and stream not in (None, ALL_AUDIO)
+        if meter:
+            pass1 = pcm_args(Loudnorm.appdata['ffmpeg_cmd'], infile,
+                             self.time_seq, stream)
+        elif stream is not None:
+            pass1 = analysis_args(Loudnorm.appdata['ffmpeg_cmd'], infile,
+                                  self.passlist[2], self.time_seq, stream)
+        else:  # the preset maps, without video
+            pass1 = self.loudnorm_args(['-i', infile], self.passlist[0],
+                                       Loudnorm.appdata['ffthreads'],
+                                       ['-vn', '-y', self.nul])
+        count = (f'File {jobid}/{self.countmax} - Pass One\n '
+                 f'Loudnorm ebu: Getting statistics for measurements...')
+
+        def measure(line):
+            event = parse_line(line)
+            if event.kind == LOUDNORM:
+                summary[event.key] = event.value
+
+        cached = self.cached(infile, stream, meter)
+        if cached:
+            summary.update(cached)
+            self.skip(jobid, count, infile, [self.nul], duration,
+                      'Measurements found in the cache, skipped')
+            return 0, summary
+
+        if meter:
+            return self.meter_measure(jobid, count, infile, pass1,
+                                      duration, summary, stream)
+        status = self.execute(jobid, count, infile, self.nul,
+                              pass1, duration, on_line=measure)
+        if status == 0:
+            self.store(infile, summary, stream)
+        return status, summary
+    # --------------------------------------------------------------------#
+
+    def file_stream(self, infile):
+        """
+        Returns the audio stream key of the first pass (see
+        `probe_cache.audio_stream`) for `infile`, whose data are
+        needed to resolve the absolute `-map 0:N` options. None
+        if it can't be resolved.
+        """
+        if self.stream is not None:
+            return self.stream
+        probe = self.cache.ffprobe if self.cache else ffprobe
+        try:
+            data = probe(infile, Loudnorm.appdata['ffprobe_cmd'],
+                         profile='import', hide_banner=None, pretty=None)[0]
+        except sqlite3.Error:
+            data = None
+        if not data:
+            return None
+        return audio_stream(self.passlist[0], data.get('streams', []))
+    # --------------------------------------------------------------------#
+
+    def meter_measure(self, jobid, count, infile, pass1, duration, summary,
+                      stream):
+        """
+        First pass with the NumPy loudness meter: measures the
+        samples of the audio `stream` decoded by `pass1` (see
+        `ffmpeg_runner.pcm_args`) and fills `summary`. Returns
+        like `measure`.
+        """
+        start = time.perf_counter()
+
+        def progress(seconds):
+            elapsed = time.perf_counter() - start
+            speed = f'{seconds / elapsed:.2f}x' if elapsed else 'N/A'
+            self.events.send("PROGRESS_EVT",
+                             progress=Progress({
+                                 'out_time_us': str(int(seconds * 1e6)),
+                                 'speed': speed,
+                                 'progress': 'continue'}),
                              duration=duration,
-                             end='Done'
+                             jobid=jobid,
                              )
-            # --------------- second pass ----------------#
+
+        reader = loudness_meter.MeterReader(progress=progress)
+        status = self.execute(jobid, count, infile, self.nul, pass1,
+                              duration, reader=reader)
+        if status == 0 and reader.meter is None:
+            logwrite('', reader.error or 'No audio stream to measure',
+                     self.logname)
+            status = 1
+        if status == 0:
+            result = reader.meter.result()
+            logwrite('\n'.join(loudness_meter.report(result)), '',
+                     self.logname)
+            summary.update(loudness_meter.loudnorm_stats(result))
+            summary['Target Offset'] = '0.0'
+            self.store(infile, result, stream, meter=True)
+        return status, summary
+    # --------------------------------------------------------------------#
+
+    def encode(self, jobid, infile, outfile, duration, status, summary):
+        """
+        Second pass: applies the normalization to `infile` with
+        the `summary` of the first pass, if its exit `status`
+        is 0. The video of the first pass, if any, is encoded
+        before. Returns `infile` on success, None otherwise.
+        """
+        workdir = None
+        if self.video_pass1 and self.maxjobs > 1:
+            # encoders write the pass stats file in the working dir
+            workdir = os.path.join(Loudnorm.appdata['cachedir'], 'tmp',
+                                   'Loudnorm', str(jobid))
+            os.makedirs(workdir, exist_ok=True)
+
+        if status == 0 and not self.stopped() and self.video_pass1:
+            pass1 = self.ffmpeg_args(self.time_seq, ['-i', infile],
+                                     self.video_pass1,
+                                     Loudnorm.appdata['ffthreads'],
+                                     ['-y', self.nul])
+            count = f'File {jobid}/{self.countmax} - Pass One (video)'
+            status = self.execute(jobid, count, infile, self.nul,
+                                  pass1, duration, workdir)
+
+        if status == 0 and not self.stopped():
             filters = (f'{self.passlist[2]}'
-                       f':measured_I={summary["Input Integrated:"]}'
-                       f':measured_LRA={summary["Input LRA:"]}'
-                       f':measured_TP={summary["Input True Peak:"]}'
-                       f':measured_thresh={summary["Input Threshold:"]}'
-                       f':offset={summary["Target Offset:"]}'
+                       f':measured_I={summary["Input Integrated"]}'
+                       f':measured_LRA={summary["Input LRA"]}'
+                       f':measured_TP={summary["Input True Peak"]}'
+                       f':measured_thresh={summary["Input Threshold"]}'
+                       f':offset={summary["Target Offset"]}'
                        f':linear=true:dual_mono=true'
                        )
-            time.sleep(.5)
-
-            pass2 = (f'"{Loudnorm.appdata["ffmpeg_cmd"]}" -nostdin -loglevel '
-                     f'info -stats -hide_banner {self.time_seq} -i '
-                     f'"{infile}" {self.passlist[1]} '
-                     f'-filter:a:{self.audio_outmap[1]} {filters} '
-                     f'{Loudnorm.appdata["ffthreads"]} -y "{outfile}"'
-                     )
-            count = (f'File {self.count}/{self.countmax} - Pass Two\n'
+            pass2 = self.loudnorm_args(['-i', infile], self.passlist[1],
+                                       [f'-filter:a:{self.audio_outmap[1]}',
+                                        filters],
+                                       Loudnorm.appdata['ffthreads'],
+                                       ['-y', outfile])
+            count = (f'File {jobid}/{self.countmax} - Pass Two\n'
                      f'Loudnorm ebu: apply EBU R128...'
                      )
-            cmd = (f'\n{count}\nSource: "{infile}"\n'
-                   f'Destination: "{outfile}"\n\n'
-                   f'[COMMAND]:\n{pass2}'
-                   )
-
-            wx.CallAfter(pub.sendMessage,
-                         "COUNT_EVT",
-                         count=count,
-                         fsource=f'Source:  "{infile}"',
-                         destination=f'Destination: "{outfile}"',
-                         duration=duration,
-                         end='',
+            status = self.execute(jobid, count, infile, outfile,
+                                  pass2, duration, workdir)
+        else:
+            status = status or 'stop'
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        self.events.send("JOB_EVT",
+                         jobid=jobid,
+                         fname=infile,
+                         state='end',
                          )
-            logwrite(cmd, '', self.logname)
-
-            if not Loudnorm.OS == 'Windows':
-                pass2 = shlex.split(pass2)
-            with Popen(pass2,
-                       stderr=subprocess.PIPE,
-                       bufsize=1,
-                       universal_newlines=True,
-                       encoding='utf8',
-                       ) as proc2:
-
-                for line2 in proc2.stderr:
-                    wx.CallAfter(pub.sendMessage,
-                                 "UPDATE_EVT",
-                                 output=line2,
-                                 duration=duration,
-                                 status=0,
-                                 )
-                    if self.stop_work_thread:  # break first 'for' loop
-                        proc2.terminate()
-                        break
-
-                if proc2.wait():  # will add '..failed' to txtctrl
-                    wx.CallAfter(pub.sendMessage,
-                                 "UPDATE_EVT",
-                                 output='',
-                                 duration=duration,
-                                 status=proc2.wait(),
-                                 )
-                    logwrite('',
-                             f"Exit status: {proc2.wait()}",
-                             self.logname,
-                             )  # append exit error number
-
-            if self.stop_work_thread:  # break first 'for' loop
-                proc2.terminate()
-                break  # fermo il ciclo for, altrimenti passa avanti
-
-            if proc2.wait() == 0:  # will add '..terminated' to txtctrl
-                filedone.append(infile)
-                wx.CallAfter(pub.sendMessage,
-                             "COUNT_EVT",
-                             count='',
-                             fsource='',
-                             destination='',
-                             duration=duration,
-                             end='Done'
-                             )
-        time.sleep(.5)
-        wx.CallAfter(pub.sendMessage, "END_EVT", msg=filedone)
+        return infile if status == 0 else None
+    # --------------------------------------------------------------------#
+
+    def cached(self, infile, stream, meter=False):
+        """
+        Returns the stored first pass statistics of the audio
+        `stream` of `infile` (taken by the NumPy `meter` if True)
+        as a dict of LOUDNORM_KEYS items, None if not found.
+        """
+        if not self.cache or stream is None:
+            return None
+        kind = loudness_meter.METER if meter else LOUDNORM
+        try:
+            data = self.cache.measurement(infile, kind, self.time_seq,
+                                          stream)
+        except sqlite3.Error:
+            return None
+        if data and meter:
+            return dict(loudness_meter.loudnorm_stats(data),
+                        **{'Target Offset': '0.0'})
+        if not data or None in (data.get(key) for key in MEASURED):
+            return None
+        summary = {key: data[key] for key in MEASURED}
+        summary['Target Offset'] = data['offsets'].get(self.passlist[2],
+                                                       '0.0')
+        return summary
+    # --------------------------------------------------------------------#
+
+    def store(self, infile, summary, stream, meter=False):
+        """
+        Stores the first pass statistics of the audio `stream`
+        of `infile`, keeping the target offsets of the other
+        loudnorm targets. With the NumPy `meter` `summary` is
+        the result of the meter.
+        """
+        if stream is None:
+            return
+        if meter and self.cache:
+            try:
+                self.cache.put_measurement(infile, loudness_meter.METER,
+                                           self.time_seq, stream,
+                                           summary)
+            except sqlite3.Error:
+                pass  # measures again next time
+            return
+        if not self.cache or None in (summary[key] for key in MEASURED):
+            return
+        try:
+            data = self.cache.measurement(infile, LOUDNORM, self.time_seq,
+                                          stream) or {}
+            offsets = data.get('offsets', {})
+            offsets[self.passlist[2]] = summary['Target Offset']
+            data = {key: summary[key] for key in MEASURED}
+            data['offsets'] = offsets
+            self.cache.put_measurement(infile, LOUDNORM, self.time_seq,
+                                       stream, data)
+        except sqlite3.Error:
+            pass  # measures again next time
     # --------------------------------------------------------------------#
 
-    def stop(self):
+    def loudnorm_args(self, *parts):
         """
-        Sets the stop work thread to terminate the process
+        Like `ffmpeg_args` but with the `info` log level needed
+        to read the loudnorm measurements, instead of the one
+        of the user settings.
         """
-        self.stop_work_thread = True
+        return build_args([Loudnorm.appdata['ffmpeg_cmd']],
+                          '-nostdin -loglevel info -hide_banner',
+                          self.time_seq, *parts)
@@ -25,15 +25,20 @@ This file is part of Videomass.
    along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
 """
 import os
+import sqlite3
+from collections import deque
 from threading import Thread
-import subprocess
-import platform
 import wx
 from pubsub import pub
-from videomass.vdms_utils.utils import Popen
-from videomass.vdms_io.make_filelog import make_log_template
-if not platform.system() == 'Windows':
-    import shlex
+from videomass.vdms_threads.ffmpeg_output import parse_line, VOLUMEDETECT
+from videomass.vdms_threads.ffmpeg_runner import (analysis_args, pcm_args,
+                                                  join_args, ProcessRunner,
+                                                  ALL_AUDIO)
+from videomass.vdms_threads.job_scheduler import JobScheduler
+from videomass.vdms_threads import loudness_meter
+from videomass.vdms_io.probe_cache import audio_stream
+from videomass.vdms_io.make_filelog import (make_log_template,
+                                            get_logwriter)
 
 
 class VolumeDetectThread(Thread):
@@ -42,15 +47,31 @@ class VolumeDetectThread(Thread):
     audio volume peak level when required for audio normalization
     process.
 
+    The files are analyzed by up to `maxjobs` ffmpeg processes
+    at the same time (see `JobScheduler`), parsing only the
+    volumedetect statistics while the output is read; the
+    results keep the order of the file list. The statistics are
+    stored on the given `cache` (see `ProbeCache.measurement`)
+    and the files already measured are not decoded again.
+
+    With the 'numpy' `engine` the decoded samples are measured
+    by the `loudness_meter` module instead of the volumedetect
+    filter, the per-channel and per-segment statistics are
+    written to the log as well.
+
     NOTE: all error handling (including verification of the
     existence of files) is entrusted to ffmpeg, except for the
     lack of ffmpeg of course.
 
     """
+    TAIL = 100  # output lines reported on errors
 
-    def __init__(self, timeseq, filelist, audiomap, logdir, ffmpeg_url):
+    def __init__(self, timeseq, filelist, audiomap, logdir, ffmpeg_url,
+                 maxjobs=1, niceness=0, affinity=None, cache=None,
+                 engine='ffmpeg'):
         """
-        Replace /dev/null with NUL on Windows.
+        The audio stream to measure is the one selected by the
+        `audiomap` option (see `ffmpeg_runner.analysis_args`).
 
         self.status: None, if nothing error,
                      'str error' if errors.
@@ -63,9 +84,14 @@ class VolumeDetectThread(Thread):
         self.time_seq = timeseq
         self.audiomap = audiomap
         self.ffmpeg_url = ffmpeg_url
+        self.maxjobs = maxjobs
+        self.cache = cache
+        self.stream = audio_stream(audiomap) or ''  # the default if None
+        self.meter = (engine == 'numpy' and loudness_meter.available()
+                      and self.stream != ALL_AUDIO)
+        self.runner = ProcessRunner(niceness, affinity)
         self.status = None
         self.data = None
-        self.nul = 'NUL' if platform.system() == 'Windows' else '/dev/null'
         self.logf = os.path.join(logdir, 'volumedected.log')
         make_log_template('volumedected.log', logdir)
         # set initial file LOG
@@ -83,44 +109,19 @@ class VolumeDetectThread(Thread):
               the end of the process to close of the pop-up
 
         """
+        scheduler = JobScheduler(self.maxjobs,
+                                 stop=lambda: self.status is not None)
+        results = scheduler.map(self.analyze,
+                                [(name,) for name in self.filelist])
         volume = []
-
-        for files in self.filelist:
-            cmd = (f'"{self.ffmpeg_url}" {self.time_seq} -i "{files}" '
-                   f'-hide_banner {self.audiomap} -af volumedetect '
-                   f'-vn -sn -dn -f null {self.nul}'
-                   )
-            self.logwrite(cmd)
-
-            if not platform.system() == 'Windows':
-                cmd = shlex.split(cmd)
-            try:
-                with Popen(cmd,
-                           stdout=subprocess.PIPE,
-                           stderr=subprocess.STDOUT,
-                           universal_newlines=True,
-                           encoding='utf8',
-                           ) as proc:
-
-                    output = proc.communicate()
-
-                    if proc.returncode:  # if error occurred
-                        self.status = output[0]
-                        break
-
-                    raw_list = output[0].split()  # splitta tutti gli spazi
-                    if 'mean_volume:' in raw_list:
-                        mean_volume = raw_list.index("mean_volume:")
-                        # mean_volume is indx integear
-                        medvol = f"{raw_list[mean_volume + 1]} dB"
-                        max_volume = raw_list.index("max_volume:")
-                        # max_volume is indx integear
-                        maxvol = f"{raw_list[max_volume + 1]} dB"
-                        volume.append([maxvol, medvol])
-
-            except (OSError, FileNotFoundError) as err:  # ffmpeg do not exist
-                self.status = err
+        for result in results:
+            if result is None:  # skipped or stopped after an error
+                continue
+            if result[1]:  # the first error in order of the list
+                self.status = result[1]
                 break
+            if result[0]:
+                volume.append(result[0])
 
         self.data = (volume, self.status)
 
@@ -133,18 +134,126 @@ class VolumeDetectThread(Thread):
                      )
     # ----------------------------------------------------------------#
 
+    def analyze(self, jobid, filename):
+        """
+        Runs volumedetect on `filename` and returns a tuple
+        ([maxvol, medvol] or None, None or errors), None if
+        the process has been stopped because another one failed.
+        """
+        stats = self.cached(filename)
+        if stats:
+            return [f"{stats['max_volume']} dB",
+                    f"{stats['mean_volume']} dB"], None
+
+        if self.meter:
+            return self.measure(filename)
+
+        cmd = analysis_args(self.ffmpeg_url, filename, 'volumedetect',
+                            self.time_seq, self.stream)
+        self.logwrite(join_args(cmd))
+        stats = {}
+        tail = deque(maxlen=VolumeDetectThread.TAIL)
+
+        def output(line):
+            tail.append(line)
+            if 'volumedetect' in line:
+                event = parse_line(line)
+                if event.kind == VOLUMEDETECT:
+                    stats[event.key] = event.value
+
+        try:
+            status = self.runner.run(cmd, output, lambda report: None)[0]
+        except OSError as err:  # ffmpeg do not exist
+            self.status = err
+            return None, err
+
+        if status == 'stop':
+            return None
+        if status:  # if error occurred
+            self.status = ''.join(tail)
+            self.runner.cancel()  # don't wait for the other files
+            return None, self.status
+        if 'mean_volume' in stats:
+            self.store(filename, stats)
+            return [f"{stats['max_volume']} dB",
+                    f"{stats['mean_volume']} dB"], None
+        return None, None
+    # ----------------------------------------------------------------#
+
+    def measure(self, filename):
+        """
+        Measures `filename` with the NumPy loudness meter,
+        returns the same as `analyze`.
+        """
+        cmd = pcm_args(self.ffmpeg_url, filename, self.time_seq,
+                       self.stream)
+        self.logwrite(join_args(cmd))
+        try:
+            status, result, error = loudness_meter.measure_file(
+                self.runner, self.ffmpeg_url, filename, self.time_seq,
+                self.stream)
+        except OSError as err:  # ffmpeg do not exist
+            self.status = err
+            return None, err
+
+        if status == 'stop':
+            return None
+        if status:  # if error occurred
+            self.status = error
+            self.runner.cancel()  # don't wait for the other files
+            return None, self.status
+        self.store(filename, result)
+        self.logwrite('\n'.join(loudness_meter.report(result)))
+        stats = loudness_meter.volumedetect_stats(result)
+        return [f"{stats['max_volume']} dB",
+                f"{stats['mean_volume']} dB"], None
+    # ----------------------------------------------------------------#
+
+    def cached(self, filename):
+        """
+        Returns the stored statistics of `filename`, if any
+        """
+        kind = loudness_meter.METER if self.meter else VOLUMEDETECT
+        if self.cache:
+            try:
+                stats = self.cache.measurement(filename, kind,
+                                               self.time_seq, self.stream)
+            except sqlite3.Error:
+                self.cache = None
+                return None
+            if stats and self.meter:
+                return loudness_meter.volumedetect_stats(stats)
+            return stats
+        return None
+    # ----------------------------------------------------------------#
+
+    def store(self, filename, stats):
+        """
+        Stores the statistics of `filename` on the cache, the
+        whole result of the meter with the 'numpy' engine.
+        """
+        if not self.meter:
+            stats = {'max_volume': stats['max_volume'],
+                     'mean_volume': stats['mean_volume']}
+        kind = loudness_meter.METER if self.meter else VOLUMEDETECT
+        if self.cache:
+            try:
+                self.cache.put_measurement(filename, kind, self.time_seq,
+                                           self.stream, stats)
+            except sqlite3.Error:
+                self.cache = None
+    # ----------------------------------------------------------------#
+
     def logwrite(self, cmd):
         """
         write ffmpeg command log
         """
-        with open(self.logf, "a", encoding='utf8') as log:
-            log.write(f"{cmd}\n")
+        get_logwriter(self.logf).write(f"{cmd}\n")
     # ----------------------------------------------------------------#
 
     def logerror(self):
         """
         write ffmpeg volumedected errors
         """
-        with open(self.logf, "a", encoding='utf8') as logerr:
-            logerr.write(f"\n[FFMPEG] volumedetect "
-                         f"ERRORS:\n{self.status}\n")
+        get_logwriter(self.logf).write(f"\n[FFMPEG] volumedetect "
+                                       f"ERRORS:\n{self.status}\n")
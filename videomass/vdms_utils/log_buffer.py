@@ -0,0 +1,107 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: log_buffer.py
+Porpose: Bounded buffer of the lines shown by the log view
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyleft - 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of Videomass.
+
+   Videomass is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   Videomass is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with Videomass.  If not, see <http://www.gnu.org/licenses/>.
+"""
+from collections import deque
+
+
+class LogBuffer:
+    """
+    Keeps the last `maxlines` lines of a log as (text, colour)
+    tuples, where colour is a key of the icon theme colours
+    (e.g. 'INFO', 'WARN', 'ERR0'). Older lines are discarded,
+    the whole log being written on disk by the log file.
+
+    Lines are numbered from the start of the log, the line
+    numbers of the lines kept are `start` to `start + len - 1`.
+    The line number of the first error line is kept even if
+    the line is discarded, see `position`.
+
+    Usage:
+        >>> buf = LogBuffer(1000)
+        >>> buf.append('ffmpeg version ...\\n', 'TXT3')
+        >>> buf[0]
+        ('ffmpeg version ...', 'TXT3')
+    """
+    ERRORS = ('ERR0', 'ERR1')  # colours of the error lines
+
+    def __init__(self, maxlines=10000):
+        self.lines = deque(maxlen=maxlines)
+        self.start = 0  # line number of the first line kept
+        self.partial = False  # True if the last line is not ended
+        self.first_error = None  # line number of the first error
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __getitem__(self, index):
+        return self.lines[index]
+
+    def clear(self):
+        """
+        Discards all lines
+        """
+        self.lines.clear()
+        self.start = 0
+        self.partial = False
+        self.first_error = None
+
+    def append(self, text, colour):
+        """
+        Appends `text` with the given colour. As in a text
+        control, a text not ending with a newline is continued
+        by the next one. Returns the number of lines discarded.
+        """
+        if not text:
+            return 0
+        pieces = text.split('\n')
+        ended = pieces[-1] == ''
+        if ended:
+            pieces.pop()
+
+        dropped = 0
+        for num, piece in enumerate(pieces):
+            if num == 0 and self.partial and self.lines:
+                last, clr = self.lines[-1]  # errors colour the whole line
+                clr = colour if colour in LogBuffer.ERRORS else clr
+                self.lines[-1] = (last + piece, clr)
+            else:
+                if len(self.lines) == self.lines.maxlen:
+                    self.start += 1
+                    dropped += 1
+                self.lines.append((piece, colour))
+            if colour in LogBuffer.ERRORS and self.first_error is None:
+                self.first_error = self.start + len(self.lines) - 1
+        self.partial = not ended
+        return dropped
+
+    def position(self, lineno):
+        """
+        Returns the index of the line number `lineno` in the
+        buffer, None if it has been discarded or it is None.
+        """
+        if lineno is None or lineno < self.start:
+            return None
+        return lineno - self.start
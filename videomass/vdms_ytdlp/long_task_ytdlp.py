@@ -28,7 +28,8 @@ from __future__ import unicode_literals
 from pubsub import pub
 import wx
 from videomass.vdms_dialogs.widget_utils import notification_area
-from videomass.vdms_io.make_filelog import make_log_template
+from videomass.vdms_io.make_filelog import (make_log_template,
+                                            get_logwriter)
 from videomass.vdms_ytdlp.ydl_downloader import YdlDownloader
 
 
@@ -146,8 +147,8 @@ class LogOut(wx.Panel):
             elif '[download]' not in output:
                 self.txtout.SetDefaultStyle(wx.TextAttr(self.clr['TXT1']))
                 self.txtout.AppendText(f'{output}\n')
-                with open(self.logfile, "a", encoding='utf8') as logerr:
-                    logerr.write(f"[YT_DLP]: {status} > {output}\n")
+                get_logwriter(self.logfile).write(f"[YT_DLP]: {status} > "
+                                                  f"{output}\n")
 
         elif status == 'DOWNLOAD':
             perc = duration['_percent_str'].strip()
@@ -162,8 +163,7 @@ class LogOut(wx.Panel):
             self.txtout.AppendText(f'{duration}\n')
 
         if status in ['ERROR', 'WARNING']:
-            with open(self.logfile, "a", encoding='utf8') as logerr:
-                logerr.write(f"[YT_DLP]: {output}\n")
+            get_logwriter(self.logfile).write(f"[YT_DLP]: {output}\n")
     # ---------------------------------------------------------------------#
 
     def update_count(self, count, fsource, destination, duration, end):